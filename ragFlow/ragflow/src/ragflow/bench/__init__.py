@@ -0,0 +1,5 @@
+"""Benchmarks for the Ragflow pipeline.
+
+Each module can be run with ``python -m ragflow.bench.<name>`` and prints a
+small report on standard output.
+"""
@@ -0,0 +1,171 @@
+"""Import-time and startup benchmark of the ``kickoff`` entry point.
+
+Each measurement runs in a fresh interpreter:
+
+1. ``python -X importtime -c "import ragflow.main"``: total import time, the
+   packages with the largest self time, and which route-specific heavy
+   dependencies (sympy, LangChain, Qdrant, ...) were loaded at startup
+   although no question has been routed yet;
+2. ``kickoff`` itself, timed until the question prompt appears on stdout.
+
+LiteLLM's remote model cost map and CrewAI telemetry are disabled in the
+child processes, so the numbers do not depend on the network. Every run is
+appended to ``.ragflow/bench_importtime.jsonl`` and compared with the previous
+one; ``--max-ms`` exits with status 1 when the time to the first prompt
+exceeds a budget (regression gate).
+
+Usage:
+    python -m ragflow.bench.importtime --repeat 5 --top 15
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ragflow.runtime import FLOW_SETTINGS
+
+HEAVY_MODULES = ("sympy", "langchain", "langchain_core", "langchain_openai", "qdrant_client", "ddgs")
+PROMPT = "Inserisci la tua domanda"
+CHILD_ENV = {"LITELLM_LOCAL_MODEL_COST_MAP": "True", "CREWAI_DISABLE_TELEMETRY": "true", "OTEL_SDK_DISABLED": "true"}
+
+
+def child_env() -> Dict[str, str]:
+    """Return the environment of the measured interpreters."""
+    env = dict(os.environ)
+    env.update(CHILD_ENV)
+    return env
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """Parse ``-X importtime`` output into (module, self us, cumulative us) rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        self_us, cumulative_us, name = int(fields[0]), int(fields[1]), fields[2].strip()
+        rows.append((name, self_us, cumulative_us))
+    return rows
+
+
+def measure_imports(module: str = "ragflow.main") -> Dict[str, Any]:
+    """Import ``module`` in a fresh interpreter and summarize ``-X importtime``.
+
+    Raises:
+        RuntimeError: If the import fails.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=child_env(), check=False,
+    )
+    if proc.returncode:
+        raise RuntimeError(f"Import di {module} fallito:\n{proc.stderr[-500:]}")
+    rows = parse_importtime(proc.stderr)
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+    loaded = {name.split(".")[0] for name, _, _ in rows} | {name for name, _, _ in rows}
+    return {
+        "total_ms": sum(self_us for _, self_us, _ in rows) / 1000.0,
+        "modules": len(rows),
+        "packages_ms": {name: us / 1000.0 for name, us in by_package.items()},
+        "heavy_loaded": [name for name in HEAVY_MODULES if name in loaded],
+    }
+
+
+def time_to_prompt(timeout_s: float = 120.0) -> float:
+    """Start ``kickoff`` in a fresh interpreter and return the seconds until it asks the question.
+
+    Raises:
+        RuntimeError: If the process exits or times out before prompting.
+    """
+    started = time.perf_counter()
+    proc = subprocess.Popen(  # pylint: disable=consider-using-with
+        [sys.executable, "-u", "-c", "from ragflow.main import kickoff; kickoff()"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=child_env(),
+    )
+    timer = threading.Timer(timeout_s, proc.kill)
+    timer.start()
+    output = b""
+    try:
+        while PROMPT.encode("utf-8") not in output:
+            chunk = proc.stdout.read1(4096)
+            if not chunk:
+                raise RuntimeError(f"kickoff è terminato prima della domanda: {output[-300:]!r}")
+            output += chunk
+        return time.perf_counter() - started
+    finally:
+        timer.cancel()
+        proc.kill()
+        proc.wait()
+
+
+def log_path() -> str:
+    """JSONL file collecting the results of every run."""
+    return os.path.join(FLOW_SETTINGS.state_dir, "bench_importtime.jsonl")
+
+
+def previous_run() -> Optional[Dict[str, Any]]:
+    """Return the last logged run, if any."""
+    if not os.path.exists(log_path()):
+        return None
+    with open(log_path(), encoding="utf-8") as handle:
+        lines = [line for line in handle if line.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Print the import-time breakdown and the time to the first prompt."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="pacchetti più lenti da mostrare")
+    parser.add_argument("--max-ms", type=float, default=0.0, help="budget del primo prompt (0: nessun controllo)")
+    args = parser.parse_args(argv)
+
+    imports = [measure_imports() for _ in range(args.repeat)]
+    prompts = [time_to_prompt() * 1000.0 for _ in range(args.repeat)]
+    packages: Dict[str, List[float]] = defaultdict(list)
+    for run in imports:
+        for name, ms in run["packages_ms"].items():
+            packages[name].append(ms)
+    result = {
+        "ts": time.time(),
+        "import_ms": round(statistics.median(run["total_ms"] for run in imports), 1),
+        "prompt_ms": round(statistics.median(prompts), 1),
+        "modules": imports[-1]["modules"],
+        "heavy_loaded": imports[-1]["heavy_loaded"],
+    }
+
+    print(f"{'pacchetto':<24} {'self_ms':>9}")
+    slowest = sorted(packages.items(), key=lambda item: -statistics.median(item[1]))[:args.top]
+    for name, values in slowest:
+        print(f"{name:<24} {statistics.median(values):>9.1f}")
+    print(f"Import di ragflow.main: {result['import_ms']:.0f}ms ({result['modules']} moduli)")
+    print(f"Primo prompt di kickoff: {result['prompt_ms']:.0f}ms")
+    heavy = ", ".join(result["heavy_loaded"]) or "nessuna"
+    print(f"Dipendenze pesanti caricate all'avvio: {heavy}")
+
+    previous = previous_run()
+    if previous is not None:
+        print(
+            f"Rispetto al run precedente: import {result['import_ms'] - previous['import_ms']:+.0f}ms, "
+            f"primo prompt {result['prompt_ms'] - previous['prompt_ms']:+.0f}ms"
+        )
+    os.makedirs(FLOW_SETTINGS.state_dir, exist_ok=True)
+    with open(log_path(), "a", encoding="utf-8") as handle:
+        handle.write(json.dumps(result) + "\n")
+
+    if args.max_ms and result["prompt_ms"] > args.max_ms:
+        print(f"❌ Primo prompt oltre il budget di {args.max_ms:.0f}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
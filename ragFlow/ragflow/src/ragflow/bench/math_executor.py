@@ -0,0 +1,78 @@
+"""Benchmark of the math function executor on many small evaluations.
+
+For each backend (``inline`` and ``process``) the benchmark runs ``--calls``
+small functions, once with distinct sources (validation and compile cache
+misses) and once with a small set of repeated sources (cache hits), from
+``--threads`` concurrent callers. It reports throughput and p50/p95 latency,
+then checks that a runaway function is stopped by the timeout.
+
+Usage:
+    python -m ragflow.bench.math_executor --calls 2000 --threads 4
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from ragflow.tools.math_executor import MathExecutor, validate_function_code
+
+
+def make_sources(calls: int, distinct: int) -> List[str]:
+    """Return ``calls`` function sources drawn from ``distinct`` variants."""
+    return [
+        f"def calc_{i % distinct}():\n    return sqrt({i % distinct} + 1) * sin(pi / 3) + {i % distinct} ** 2"
+        for i in range(calls)
+    ]
+
+
+def run_batch(executor: MathExecutor, sources: List[str], threads: int):
+    """Run every source and return (elapsed seconds, per-call latencies in ms)."""
+    def timed(source: str) -> float:
+        started = time.perf_counter()
+        executor.run(source)
+        return (time.perf_counter() - started) * 1000.0
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(timed, sources))
+    return time.perf_counter() - started, latencies
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Print throughput and latency of each backend."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    print(f"{'backend':<8} {'sorgenti':<9} {'calls/s':>9} {'p50_ms':>8} {'p95_ms':>8}")
+    for backend in ("inline", "process"):
+        executor = MathExecutor(backend, workers=args.workers, timeout_s=args.timeout)
+        started = time.perf_counter()
+        executor.start()
+        warmup = time.perf_counter() - started
+        for label, distinct in (("distinte", args.calls), ("ripetute", 20)):
+            validate_function_code.cache_clear()
+            elapsed, latencies = run_batch(executor, make_sources(args.calls, distinct), args.threads)
+            p95 = statistics.quantiles(latencies, n=20)[-1]
+            print(
+                f"{backend:<8} {label:<9} {args.calls / elapsed:>9.0f} "
+                f"{statistics.median(latencies):>8.3f} {p95:>8.3f}"
+            )
+        if backend == "process":
+            print(f"   avvio pool: {warmup * 1000:.0f}ms")
+            started = time.perf_counter()
+            try:
+                executor.run("def runaway():\n    return factorial(10**7)")
+            except ValueError as exc:
+                print(f"   runaway: {exc} dopo {time.perf_counter() - started:.2f}s")
+            print(f"   statistiche: {dict(executor.stats)}")
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Offline end-to-end benchmark of the Intelligent Search Flow.
+
+Runs ``IntelligentSearchFlow`` over a fixed question set covering the four
+routes with no network: the crews and the RAG chain use the deterministic
+models of `ragflow.bench.standin_models`, Qdrant runs embedded in process
+(``:memory:``) and web searches go to the local `StandinServer`. State,
+logs and traces live in a temporary directory, and the answer caches
+(routing, LLM, tutorial, web results) are off unless ``--caches`` is given,
+so every run does the full work.
+
+After a warm-up pass (crew templates, RAG ingestion, imports) the question
+set is run:
+
+1. sequentially with zero-latency stand-ins: the time per route is the
+   orchestration overhead of the flow itself;
+2. sequentially with ``--llm-latency``/``--web-latency``: per-route p50/p95
+   latency, LLM calls and tokens from the run traces;
+3. with ``--concurrency`` flows at a time: throughput in questions per second.
+
+Usage:
+    bench --repeat 3 --llm-latency 0.05 --web-latency 0.05 --concurrency 4
+    python -m ragflow.bench.offline --repeat 3
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from ragflow.bench.standin import StandinServer
+
+QUESTIONS: List[Tuple[str, str]] = [
+    ("Calcola 12 * (7 + 3)", "math_calc"),
+    ("Risolvi x^2 - 5x + 6 = 0", "math_calc"),
+    ("Spiega come risolvere le equazioni di secondo grado", "math_tutorial"),
+    ("Spiega il teorema di Pitagora con un esempio", "math_tutorial"),
+    ("Quali sono i sintomi dell'asma?", "rag"),
+    ("Come si cura il diabete di tipo 2?", "rag"),
+    ("Qual è la capitale dell'Australia?", "web"),
+    ("Come funziona il GPS?", "web"),
+]
+
+
+def configure_environment(state_dir: str, search_url: str, caches: bool) -> None:
+    """Point the flow settings at the temporary state and the stand-in server.
+
+    Must run before ``ragflow`` settings are imported (they are read once from
+    the environment).
+    """
+    env = {
+        "RAGFLOW_STATE_DIR": state_dir,
+        "RAGFLOW_VERBOSE": "0",
+        "RAGFLOW_WEB_SEARCH_BACKEND": "http",
+        "RAGFLOW_WEB_SEARCH_URL": search_url,
+        "RAGFLOW_WEB_SEARCH_MODE": "pipeline",
+        # Nessuna chiamata di rete da litellm e dalla telemetria di CrewAI
+        "LITELLM_LOCAL_MODEL_COST_MAP": "True",
+        "CREWAI_DISABLE_TELEMETRY": "true",
+        "OTEL_SDK_DISABLED": "true",
+    }
+    if not caches:
+        env.update({
+            "RAGFLOW_FAST_ROUTE_ENABLED": "0",
+            "RAGFLOW_ROUTING_CACHE_ENABLED": "0",
+            "RAGFLOW_LLM_CACHE_ENABLED": "0",
+            "RAGFLOW_TUTORIAL_CACHE_ENABLED": "0",
+            "RAGFLOW_WEB_CACHE_SIZE": "0",
+        })
+    os.environ.update(env)
+
+
+RunResult = Tuple[str, float, str]
+
+
+def run_question(flow_class: Any, question: str) -> RunResult:
+    """Run one question through a new flow; return (route, seconds, error or "")."""
+    flow = flow_class()
+    started = time.perf_counter()
+    error = ""
+    try:
+        flow.kickoff(inputs={"user_query": question})
+    except Exception as exc:  # pylint: disable=broad-except
+        error = f"{type(exc).__name__}: {exc}"
+    return flow.state.search_type or "?", time.perf_counter() - started, error
+
+
+def run_pass(flow_class: Any, questions: List[str], concurrency: int = 1) -> Tuple[float, List[RunResult]]:
+    """Run ``questions`` with ``concurrency`` flows at a time; return (elapsed, per-run results)."""
+    started = time.perf_counter()
+    # L'output del flow (print delle crew e dei risultati) non interessa al benchmark
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda question: run_question(flow_class, question), questions))
+    return time.perf_counter() - started, results
+
+
+def set_latency(models: Dict[str, Any], server: StandinServer, llm_s: float, embedding_s: float, web_s: float) -> None:
+    """Set the artificial latency of every stand-in."""
+    models["llm"].latency_s = llm_s
+    models["chat"].latency_s = llm_s
+    models["embeddings"].latency_s = embedding_s
+    server.latency_s = web_s
+    server.page_latency_s = web_s
+
+
+def median_by_route(results: List[RunResult]) -> Dict[str, float]:
+    """Return the median seconds of the successful runs of each route."""
+    by_route: Dict[str, List[float]] = {}
+    for route, seconds, error in results:
+        if not error:
+            by_route.setdefault(route, []).append(seconds)
+    return {route: statistics.median(values) for route, values in by_route.items()}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Print orchestration overhead, per-route latency and throughput of the flow."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="passate sul set di domande per fase")
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--embedding-latency", type=float, default=0.02)
+    parser.add_argument("--web-latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--caches", action="store_true", help="lascia attive le cache delle risposte")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="ragflow-bench-") as state_dir, StandinServer() as server:
+        configure_environment(state_dir, server.search_url, args.caches)
+        # pylint: disable=import-outside-toplevel
+        from ragflow.bench.standin_models import FakeChatModel, FakeLLM, HashEmbeddings, install
+        from ragflow.main import IntelligentSearchFlow
+        from ragflow.runtime import FLOW_SETTINGS
+        from ragflow.tools.rag_tool import SETTINGS
+        from ragflow.tracing import aggregate, read_traces
+
+        SETTINGS.qdrant_url = ":memory:"
+        SETTINGS.retrieval_cache_enabled = args.caches
+        models = {"llm": FakeLLM, "chat": FakeChatModel(), "embeddings": HashEmbeddings()}
+        install(embeddings=models["embeddings"], chat_model=models["chat"])
+        questions = [question for question, _ in QUESTIONS] * args.repeat
+        expected = dict(QUESTIONS)
+
+        set_latency(models, server, 0.0, 0.0, 0.0)
+        _, warmup = run_pass(IntelligentSearchFlow, [question for question, _ in QUESTIONS])
+        misrouted = sum(1 for (question, _), (route, _, _) in zip(QUESTIONS, warmup) if route != expected[question])
+        _, overhead = run_pass(IntelligentSearchFlow, questions)
+
+        set_latency(models, server, args.llm_latency, args.embedding_latency, args.web_latency)
+        traced_before = len(read_traces(FLOW_SETTINGS.trace_log_path))
+        serial_s, latency = run_pass(IntelligentSearchFlow, questions)
+        report = aggregate(read_traces(FLOW_SETTINGS.trace_log_path)[traced_before:])
+        parallel_s, concurrent = run_pass(IntelligentSearchFlow, questions, args.concurrency)
+
+    overhead_ms = median_by_route(overhead)
+    errors = [error for results in (warmup, overhead, latency, concurrent) for _, _, error in results if error]
+    print(
+        f"Stand-in: LLM {args.llm_latency * 1e3:.0f}ms, embedding {args.embedding_latency * 1e3:.0f}ms, "
+        f"web {args.web_latency * 1e3:.0f}ms, "
+        f"{len(questions)} domande per fase, cache {'attive' if args.caches else 'disattivate'}"
+    )
+    print(f"{'rotta':<14} {'overhead_ms':>11} {'p50_s':>8} {'p95_s':>8} {'LLM':>6} {'token':>8}")
+    for route, row in report.items():
+        print(
+            f"{route:<14} {overhead_ms.get(route, 0.0) * 1e3:>11.1f} {row['p50_s']:>8.3f} {row['p95_s']:>8.3f} "
+            f"{row['llm_calls']:>6.1f} {row['tokens']:>8.0f}"
+        )
+    print(
+        f"Throughput: {len(questions) / serial_s:.2f} domande/s in serie, "
+        f"{len(questions) / parallel_s:.2f} domande/s con {args.concurrency} flow concorrenti"
+    )
+    print(f"Errori: {len(errors)}, domande instradate diversamente dall'atteso: {misrouted}")
+    if errors:
+        print(f"   primo errore: {errors[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Benchmark of per-question crew orchestration overhead.
+
+Compares building every crew from scratch (``CrewClass().crew()``, as the
+flow did for each question) with acquiring it from the process-wide
+`CrewPool`. No LLM is called: only YAML parsing and agent/task/LLM wrapper
+construction are measured.
+
+Usage:
+    python -m ragflow.bench.orchestration --repeat 20
+"""
+
+import argparse
+import statistics
+import time
+from typing import Callable, List, Optional
+
+from ragflow.crew_pool import CREW_CLASSES, CrewPool, load_crew_class
+
+
+def time_calls(fn: Callable[[], object], repeat: int) -> List[float]:
+    """Return the duration in milliseconds of ``repeat`` calls to ``fn``."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000.0)
+    return timings
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Print fresh-build vs pooled acquisition time for each crew."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--crews", nargs="*", default=list(CREW_CLASSES))
+    args = parser.parse_args(argv)
+
+    pool = CrewPool()
+    print(f"{'crew':<12} {'fresh_ms':>10} {'pool_ms':>10} {'speedup':>8}")
+    total_fresh = total_pool = 0.0
+    for name in args.crews:
+        crew_class = load_crew_class(name)
+        fresh = statistics.median(time_calls(lambda: crew_class().crew(), args.repeat))
+        pool.template(name)
+        pooled = statistics.median(time_calls(lambda: pool.acquire(name), args.repeat))
+        total_fresh += fresh
+        total_pool += pooled
+        print(f"{name:<12} {fresh:>10.2f} {pooled:>10.2f} {fresh / pooled:>7.1f}x")
+    print(f"{'totale':<12} {total_fresh:>10.2f} {total_pool:>10.2f} {total_fresh / total_pool:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Local stand-in for the web search service, used by the benchmarks.
+
+`StandinServer` runs a threaded HTTP server on 127.0.0.1 that answers
+``GET /search?q=...&max_results=...`` with deterministic JSON results shaped
+like the DuckDuckGo ones, after an artificial latency. The results point to
+``/pages/<n>`` on the same server, small HTML articles with navigation and
+footer boilerplate around the main text (``?delay=<s>`` overrides the page
+latency, to simulate a slow host). Every request is counted per path,
+so a benchmark can check how many calls actually reached the "network",
+together with the peak number of requests served at once on that path.
+
+Usage:
+    python -m ragflow.bench.standin --port 8765
+"""
+
+import argparse
+import contextlib
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import parse_qs, quote, urlparse
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><title>{title}</title><script>var tracking = true;</script></head>
+<body>
+<nav><a href="/">Home</a> | <a href="/news">Notizie</a> | <a href="/login">Accedi</a></nav>
+<article>
+<h1>{title}</h1>
+{paragraphs}
+</article>
+<footer>Copyright 2025 — Tutti i diritti riservati. Cookie policy. Privacy.</footer>
+</body></html>
+"""
+
+
+def make_page(index: int, query: str = "") -> str:
+    """Return the HTML of the fixture page ``index``."""
+    topic = query or f"argomento {index}"
+    paragraphs = "\n".join(
+        f"<p>Paragrafo {p} della pagina {index} su {topic}: questo testo descrive in dettaglio "
+        f"l'argomento con esempi, dati e riferimenti utili alla risposta.</p>"
+        for p in range(1, 6)
+    )
+    return PAGE_TEMPLATE.format(title=f"Pagina {index} — {topic}", paragraphs=paragraphs)
+
+
+class StandinServer:
+    """Threaded local HTTP server answering searches and serving fixture pages.
+
+    Args:
+        latency_s (float): Artificial delay of every search response.
+        page_latency_s (float): Artificial delay of every page response.
+        port (int): Port to bind (0 picks a free one).
+    """
+
+    def __init__(self, latency_s: float = 0.05, page_latency_s: float = 0.05, port: int = 0):
+        self.latency_s = latency_s
+        self.page_latency_s = page_latency_s
+        self.requests: Counter = Counter()
+        self.active: Counter = Counter()
+        self.peak: Counter = Counter()
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Root URL of the server."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def search_url(self) -> str:
+        """URL of the search endpoint."""
+        return f"{self.base_url}/search"
+
+    @contextlib.contextmanager
+    def _serving(self, path: str):
+        """Count a request on ``path`` and track the concurrent ones while it is served."""
+        with self._lock:
+            self.requests[path] += 1
+            self.active[path] += 1
+            self.peak[path] = max(self.peak[path], self.active[path])
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.active[path] -= 1
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Request handler bound to the enclosing `StandinServer`."""
+
+            def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+                pass
+
+            def _send(self, status: int, content_type: str, body: str) -> None:
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                url = urlparse(self.path)
+                params = parse_qs(url.query)
+                if url.path == "/search":
+                    with server._serving("/search"):
+                        time.sleep(server.latency_s)
+                    query = params.get("q", [""])[0]
+                    count = int(params.get("max_results", ["3"])[0])
+                    results = [
+                        {
+                            "title": f"Risultato {i} per {query}",
+                            "href": f"{server.base_url}/pages/{i}?q={quote(query)}",
+                            "body": f"Descrizione del risultato {i} per {query}.",
+                        }
+                        for i in range(1, count + 1)
+                    ]
+                    self._send(200, "application/json", json.dumps(results, ensure_ascii=False))
+                elif url.path.startswith("/pages/"):
+                    with server._serving("/pages"):
+                        time.sleep(float(params.get("delay", [server.page_latency_s])[0]))
+                    index = int(url.path.rsplit("/", 1)[-1] or 0)
+                    self._send(200, "text/html; charset=utf-8", make_page(index, params.get("q", [""])[0]))
+                else:
+                    self._send(404, "text/plain", "not found")
+
+        return Handler
+
+    def start(self) -> "StandinServer":
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Shut the server down."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "StandinServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the stand-in server in the foreground."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args(argv)
+    server = StandinServer(latency_s=args.latency, page_latency_s=args.latency, port=args.port)
+    print(f"Stand-in in ascolto su {server.search_url} (RAGFLOW_WEB_SEARCH_BACKEND=http)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Deterministic local stand-ins for the Azure models, used by the benchmarks.
+
+* `FakeLLM`: a CrewAI LLM (behind the same cache and tracing as `CachedLLM`)
+  that sleeps ``latency_s`` and answers from the prompt: the classifier task
+  gets a JSON label chosen by keyword rules, ReAct agents call their first
+  tool taking a ``query`` argument once and then give a final answer, plain
+  prompts (the web summarization) get a plain answer;
+* `FakeChatModel`: the LangChain chat model of the RAG chain, answering from
+  the first source of the context;
+* `HashEmbeddings`: feature-hashing embeddings of the words of a text, so
+  texts sharing words are close and the hybrid search ranks meaningfully.
+
+Answers and vectors depend only on the input, so runs are reproducible.
+"""
+
+import hashlib
+import json
+import re
+import time
+from typing import Any, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings  # pylint: disable=import-error
+from langchain_core.language_models.chat_models import BaseChatModel  # pylint: disable=import-error
+from langchain_core.messages import AIMessage  # pylint: disable=import-error
+from langchain_core.outputs import ChatGeneration, ChatResult  # pylint: disable=import-error
+
+from ragflow.llm_cache import CachedLLM, set_llm_factory
+from ragflow.tools.rag_tool import override_models
+from ragflow.tracing import record, trace_call
+
+MEDICAL_WORDS = ("sintom", "malatt", "cura", "curare", "diabet", "asma", "polmon", "farmac", "terapi", "influenz")
+CALC_PATTERN = re.compile(r"\d.*([+\-*/^=]|\bx\b)|\b(calcola|quanto fa|risolvi)\b.*\d")
+TUTORIAL_WORDS = ("spiega", "cos'è", "teorema", "equazion", "derivat", "integral", "dimostra")
+
+
+def classify(question: str) -> dict:
+    """Return the classifier's JSON answer for ``question`` (keyword rules)."""
+    lowered = question.lower()
+    if any(word in lowered for word in MEDICAL_WORDS):
+        return {"label": "medical", "confidence": 0.95}
+    if CALC_PATTERN.search(lowered):
+        return {"label": "math_calc", "confidence": 0.95}
+    if any(word in lowered for word in TUTORIAL_WORDS):
+        return {"label": "math_tutorial", "confidence": 0.9}
+    return {"label": "general", "confidence": 0.9}
+
+
+def filler(topic: str, chars: int) -> str:
+    """Return a deterministic answer about ``topic`` of about ``chars`` characters."""
+    sentence = f"Risposta simulata su {topic}: punti chiave, esempi e conclusione. "
+    return (sentence * (chars // len(sentence) + 1))[:chars].strip()
+
+
+def _text(messages: Any) -> str:
+    if isinstance(messages, str):
+        return messages
+    return "\n".join(str(message.get("content", "")) for message in messages)
+
+
+class FakeLLM(CachedLLM):
+    """CrewAI LLM answering deterministically after ``latency_s`` seconds.
+
+    ``latency_s`` and ``answer_chars`` are class attributes, so a benchmark can
+    change them for every instance, including the ones held by pooled crews.
+    """
+
+    latency_s = 0.05
+    answer_chars = 600
+
+    def respond(self, messages: Any) -> str:
+        """Return the answer to ``messages``."""
+        text = _text(messages)
+        task = re.search(r"Current Task: (.*)", text)
+        quoted = re.search(r'"([^"]+)"', task.group(1) if task else text)
+        topic = quoted.group(1) if quoted else text.strip().splitlines()[-1][:80]
+
+        classification = re.search(r'Classifica questa domanda: "(.*?)"', text)
+        if classification:
+            return f"Thought: Classifico la domanda.\nFinal Answer: {json.dumps(classify(classification.group(1)))}"
+        if "Final Answer:" not in text:
+            return filler(topic, self.answer_chars)
+
+        used_tool = not isinstance(messages, str) and any(m.get("role") == "assistant" for m in messages)
+        tools = re.findall(r"Tool Name: (.+)\nTool Arguments: \{'(\w+)'", text)
+        tool = next((name for name, argument in tools if argument == "query"), None)
+        if tool and not used_tool:
+            return (
+                f"Thought: Uso lo strumento {tool}.\nAction: {tool}\n"
+                f"Action Input: {json.dumps({'query': topic}, ensure_ascii=False)}"
+            )
+        return f"Thought: Ho tutte le informazioni.\nFinal Answer: {filler(topic, self.answer_chars)}"
+
+    def _traced_call(self, messages, *args, **kwargs):
+        with trace_call("llm"):
+            time.sleep(self.latency_s)
+            response = self.respond(messages)
+        record(prompt_tokens=len(_text(messages)) // 4, completion_tokens=len(response) // 4)
+        return response
+
+
+class FakeChatModel(BaseChatModel):
+    """LangChain chat model answering from the first source of the prompt."""
+
+    latency_s: float = 0.05
+    answer_chars: int = 600
+
+    @property
+    def _llm_type(self) -> str:
+        return "ragflow-fake-chat"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency_s)
+        prompt = "\n".join(str(message.content) for message in messages)
+        source = re.search(r"\[source:([^\]]+)\]", prompt)
+        question = re.search(r"Domanda:\n(.*)", prompt)
+        topic = question.group(1) if question else "la domanda"
+        content = filler(topic, self.answer_chars) + (f" [source:{source.group(1)}]" if source else "")
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=content))],
+            llm_output={"token_usage": usage},
+        )
+
+
+class HashEmbeddings(Embeddings):
+    """Feature-hashing bag-of-words embeddings.
+
+    Args:
+        dim (int): Vector size.
+        latency_s (float): Artificial delay of every model call.
+    """
+
+    def __init__(self, dim: int = 256, latency_s: float = 0.0):
+        self.dim = dim
+        self.latency_s = latency_s
+
+    def _vector(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dim
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        else:
+            vector[0] = 1.0
+        return vector.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Return the vector of ``text``."""
+        time.sleep(self.latency_s)
+        return self._vector(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Return the vectors of ``texts`` (one model call)."""
+        time.sleep(self.latency_s)
+        return [self._vector(text) for text in texts]
+
+
+def install(embeddings: Optional[HashEmbeddings] = None, chat_model: Optional[FakeChatModel] = None) -> None:
+    """Route every crew, the RAG chain and the embeddings to the stand-ins."""
+    set_llm_factory(lambda model: FakeLLM(model=model))
+    override_models(embeddings=embeddings or HashEmbeddings(), llm=chat_model or FakeChatModel())
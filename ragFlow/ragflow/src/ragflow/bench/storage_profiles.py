@@ -0,0 +1,146 @@
+"""Benchmark of the rag_chunks storage profiles at synthetic scale.
+
+For every profile in ``STORAGE_PROFILES`` the benchmark creates a collection
+through ``recreate_collection_for_rag``, fills it with random unit vectors
+(1M by default), waits for indexing and then measures semantic search latency
+with the profile's search parameters. Memory is read from the Qdrant server
+``/metrics`` endpoint (``memory_resident_bytes``) after each profile's queries, with
+only that profile's collection loaded.
+
+Usage:
+    python -m ragflow.bench.storage_profiles --points 1000000 --dim 1536
+"""
+
+import argparse
+import dataclasses
+import re
+import statistics
+import time
+import urllib.request
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ragflow.tools.rag_tool import (
+    SETTINGS,
+    STORAGE_PROFILES,
+    get_qdrant_client,
+    recreate_collection_for_rag,
+    semantic_search_params,
+)
+from qdrant_client.models import CollectionStatus, PointStruct
+
+
+def server_rss_bytes(url: str) -> Optional[int]:
+    """Return the resident memory of the Qdrant server, if it exposes it.
+
+    Args:
+        url (str): Base URL of the Qdrant server.
+
+    Returns:
+        Optional[int]: Resident set size in bytes, or None when unavailable.
+    """
+    try:
+        with urllib.request.urlopen(f"{url.rstrip('/')}/metrics", timeout=10) as resp:
+            text = resp.read().decode("utf-8", "replace")
+    except OSError:
+        return None
+    match = re.search(r"^memory_resident_bytes\s+([0-9.e+]+)", text, re.MULTILINE)
+    return int(float(match.group(1))) if match else None
+
+
+def random_unit_vectors(rng: np.random.Generator, count: int, dim: int) -> np.ndarray:
+    """Return ``count`` random float32 vectors of norm 1."""
+    vecs = rng.standard_normal((count, dim), dtype=np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs
+
+
+def fill_collection(client, collection: str, points: int, dim: int, batch: int, seed: int) -> float:
+    """Upload ``points`` synthetic chunks and wait until the collection is indexed.
+
+    Returns:
+        float: Ingest time in seconds, indexing included.
+    """
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    for offset in range(0, points, batch):
+        count = min(batch, points - offset)
+        vecs = random_unit_vectors(rng, count, dim)
+        client.upsert(
+            collection_name=collection,
+            points=[
+                PointStruct(
+                    id=offset + i + 1,
+                    vector=vecs[i].tolist(),
+                    payload={"doc_id": f"doc-{(offset + i) // 10}", "text": f"chunk sintetico {offset + i}",
+                             "chunk_id": offset + i},
+                )
+                for i in range(count)
+            ],
+            wait=False,
+        )
+    while client.get_collection(collection).status != CollectionStatus.GREEN:
+        time.sleep(1.0)
+    return time.perf_counter() - start
+
+
+def measure_latency(client, settings, dim: int, queries: int, limit: int, seed: int) -> Dict[str, float]:
+    """Run ``queries`` random searches and return latency statistics in ms."""
+    rng = np.random.default_rng(seed + 1)
+    params = semantic_search_params(settings)
+    timings: List[float] = []
+    for vec in random_unit_vectors(rng, queries, dim):
+        start = time.perf_counter()
+        client.query_points(
+            collection_name=settings.collection,
+            query=vec.tolist(),
+            limit=limit,
+            with_payload=False,
+            search_params=params,
+        )
+        timings.append((time.perf_counter() - start) * 1000.0)
+    timings.sort()
+    return {
+        "p50_ms": statistics.median(timings),
+        "p95_ms": timings[int(0.95 * (len(timings) - 1))],
+        "mean_ms": statistics.fmean(timings),
+        "qps": 1000.0 / statistics.fmean(timings),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the storage profile benchmark and print one row per profile."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=SETTINGS.qdrant_url)
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=SETTINGS.top_n_semantic)
+    parser.add_argument("--profiles", nargs="*", default=list(STORAGE_PROFILES))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="non eliminare le collection di benchmark")
+    args = parser.parse_args(argv)
+
+    base = dataclasses.replace(SETTINGS, qdrant_url=args.url, retrieval_cache_enabled=False)
+    client = get_qdrant_client(base)
+    print(f"Benchmark profili di storage: {args.points} punti x {args.dim} dim, {args.queries} query")
+    print(f"{'profilo':<12} {'ingest_s':>9} {'rss_MB':>9} {'p50_ms':>8} {'p95_ms':>8} {'qps':>8}")
+    for name in args.profiles:
+        settings = dataclasses.replace(base, collection=f"bench_{name.replace('-', '_')}", storage_profile=name)
+        recreate_collection_for_rag(client, settings, args.dim)
+        ingest_s = fill_collection(client, settings.collection, args.points, args.dim, args.batch, args.seed)
+        stats = measure_latency(client, settings, args.dim, args.queries, args.limit, args.seed)
+        rss = server_rss_bytes(args.url)  # dopo le query: include le pagine caricate in RAM
+        rss_mb = f"{rss / 2**20:.0f}" if rss is not None else "n/a"
+        print(
+            f"{name:<12} {ingest_s:>9.1f} {rss_mb:>9} {stats['p50_ms']:>8.2f} "
+            f"{stats['p95_ms']:>8.2f} {stats['qps']:>8.1f}"
+        )
+        if not args.keep:
+            client.delete_collection(settings.collection)
+
+
+if __name__ == "__main__":
+    main()
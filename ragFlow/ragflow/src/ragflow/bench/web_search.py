@@ -0,0 +1,69 @@
+"""Benchmark of the cached web search against a local stand-in server.
+
+Runs ``--calls`` searches drawn from ``--distinct`` queries from ``--threads``
+concurrent callers, first the way ``search_web`` used to (a new session and
+a network request per call), then through `WebSearcher` (pooled client, TTL
+cache, in-flight deduplication). Reports throughput, latency, hit rate and
+the number of requests that reached the server.
+
+Usage:
+    python -m ragflow.bench.web_search --calls 200 --distinct 10 --threads 8
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from ragflow.bench.standin import StandinServer
+from ragflow.tools.web_search import HTTPBackend, WebSearcher
+
+
+def run_calls(search: Callable[[str], object], queries: List[str], threads: int):
+    """Run every query and return (elapsed seconds, per-call latencies in ms)."""
+    def timed(query: str) -> float:
+        started = time.perf_counter()
+        search(query)
+        return (time.perf_counter() - started) * 1000.0
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(timed, queries))
+    return time.perf_counter() - started, latencies
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Print throughput, latency and hit rate with and without the cache."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--distinct", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    queries = [f"domanda {i % args.distinct}" for i in range(args.calls)]
+    print(f"{'modalità':<12} {'calls/s':>9} {'p50_ms':>8} {'p95_ms':>8} {'richieste':>10}")
+    with StandinServer(latency_s=args.latency) as server:
+        def uncached(query: str):
+            backend = HTTPBackend(server.search_url)
+            try:
+                return backend.search(query, "it-it", 3)
+            finally:
+                backend.close()
+
+        searcher = WebSearcher(HTTPBackend(server.search_url, pool_size=args.threads))
+        for label, search in (("senza cache", uncached), ("web searcher", searcher.search)):
+            before = server.requests["/search"]
+            elapsed, latencies = run_calls(search, queries, args.threads)
+            p95 = statistics.quantiles(latencies, n=20)[-1]
+            print(
+                f"{label:<12} {args.calls / elapsed:>9.0f} {statistics.median(latencies):>8.2f} "
+                f"{p95:>8.2f} {server.requests['/search'] - before:>10}"
+            )
+        print(f"   statistiche: {searcher.stats()}")
+        searcher.backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""Caching primitives shared by the Ragflow pipeline.
+
+Provides query normalization and fingerprinting helpers, an in-process LRU
+cache with TTL and a small SQLite-backed key-value store that several
+processes can share on the same machine.
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterator, Optional, Tuple
+
+_MISSING = object()
+
+
+def normalize_query(text: str) -> str:
+    """Normalize a user question so that trivially different spellings match.
+
+    Applies Unicode NFKC normalization, lower-casing, whitespace collapsing and
+    removal of trailing punctuation.
+
+    Args:
+        text (str): The raw question.
+
+    Returns:
+        str: The normalized question.
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip(" ?!.;:")
+
+
+def fingerprint(obj: Any) -> str:
+    """Return a short stable hash of a dataclass, mapping or JSON-serializable value.
+
+    Args:
+        obj (Any): The object to fingerprint.
+
+    Returns:
+        str: A 16-character hexadecimal digest.
+    """
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        obj = dataclasses.asdict(obj)
+    raw = json.dumps(obj, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache whose entries expire after a TTL.
+
+    Args:
+        max_size (int): Maximum number of entries; the least recently used
+            entry is evicted first.
+        ttl_s (float): Time-to-live in seconds (0 disables expiry).
+    """
+
+    def __init__(self, max_size: int = 256, ttl_s: float = 600.0):
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for ``key`` or ``default``.
+
+        Args:
+            key (Hashable): Cache key.
+            default (Any): Value returned on a miss.
+
+        Returns:
+            Any: The cached value or ``default``.
+        """
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                stored_at, value = entry
+                if not self.ttl_s or time.monotonic() - stored_at < self.ttl_s:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store ``value`` under ``key``, evicting the LRU entry if needed.
+
+        Args:
+            key (Hashable): Cache key.
+            value (Any): Value to store.
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        """Remove ``key`` from the cache if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove every entry (statistics are kept)."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss statistics.
+
+        Returns:
+            Dict[str, Any]: Size, hits, misses, evictions and hit rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SqliteStore:
+    """Persistent JSON key-value store in a local SQLite file.
+
+    Entries live in a namespace, expire after ``ttl_s`` and, once more than
+    ``max_entries`` are stored or their values exceed ``max_bytes`` in total,
+    the least recently accessed ones are evicted.
+
+    Args:
+        path (str): SQLite file path (parent directories are created).
+        namespace (str): Logical table partition, e.g. ``"retrieval"``.
+        max_entries (int): Size bound (0 means unbounded).
+        ttl_s (float): Time-to-live in seconds (0 disables expiry).
+        max_bytes (int): Bound on the total size of the stored values (0 means unbounded).
+    """
+
+    def __init__(self, path: str, namespace: str, max_entries: int = 0, ttl_s: float = 0.0, max_bytes: int = 0):
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS kv_accessed ON kv (namespace, accessed)")
+        self._conn.commit()
+
+    def get_with_age(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return ``(value, age_in_seconds)`` for ``key`` or None when absent/expired.
+
+        Args:
+            key (str): Entry key.
+
+        Returns:
+            Optional[Tuple[Any, float]]: The stored value and its age.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM kv WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if self.ttl_s and now - created >= self.ttl_s:
+                self._conn.execute(
+                    "DELETE FROM kv WHERE namespace = ? AND key = ?", (self.namespace, key)
+                )
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE kv SET accessed = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key),
+            )
+            self._conn.commit()
+        return json.loads(value), now - created
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the value stored under ``key`` or ``default``."""
+        entry = self.get_with_age(key)
+        return default if entry is None else entry[0]
+
+    def set(self, key: str, value: Any) -> None:
+        """Store ``value`` (JSON-serializable) under ``key`` and enforce the size bound.
+
+        Args:
+            key (str): Entry key.
+            value (Any): JSON-serializable value.
+        """
+        now = time.time()
+        raw = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO kv (namespace, key, value, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, raw, now, now),
+            )
+            if self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM kv WHERE namespace = ? AND key IN ("
+                    " SELECT key FROM kv WHERE namespace = ?"
+                    " ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.namespace, self.namespace, self.max_entries),
+                )
+            if self.max_bytes:
+                # Somma cumulativa dalle voci più recenti: oltre il limite si elimina
+                self._conn.execute(
+                    "DELETE FROM kv WHERE namespace = ? AND key IN ("
+                    " SELECT key FROM ("
+                    "  SELECT key, SUM(LENGTH(value)) OVER ("
+                    "   ORDER BY accessed DESC ROWS UNBOUNDED PRECEDING) AS total"
+                    "  FROM kv WHERE namespace = ?)"
+                    " WHERE total > ?)",
+                    (self.namespace, self.namespace, self.max_bytes),
+                )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        """Remove ``key`` if present."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM kv WHERE namespace = ? AND key = ?", (self.namespace, key)
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Remove every entry of the namespace."""
+        with self._lock:
+            self._conn.execute("DELETE FROM kv WHERE namespace = ?", (self.namespace,))
+            self._conn.commit()
+
+    def keys(self) -> Iterator[str]:
+        """Iterate over the keys of non-expired entries."""
+        cutoff = time.time() - self.ttl_s if self.ttl_s else float("-inf")
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM kv WHERE namespace = ? AND created > ?",
+                (self.namespace, cutoff),
+            ).fetchall()
+        return iter([row[0] for row in rows])
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM kv WHERE namespace = ?", (self.namespace,)
+            ).fetchone()
+        return int(row[0])
@@ -0,0 +1,92 @@
+"""Process-wide pool of prebuilt crews.
+
+Building a crew through its ``CrewBase`` class re-reads the YAML configs and
+constructs every agent, task and LLM wrapper. The pool builds each crew once
+(a template) and hands out ``Crew.copy()`` instances: copies get fresh agents
+and tasks with no outputs or usage metrics from previous runs, while sharing
+the already-configured LLM objects and tools of the template.
+
+Crew classes are imported lazily, so a process only pays for the crews (and
+their tool dependencies) it actually uses.
+"""
+
+import importlib
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+CREW_CLASSES: Dict[str, str] = {
+    "classifier": "ragflow.crews.classifier_crew.classifier_crew:ClassifierCrew",
+    "math": "ragflow.crews.math_crew.math_crew:MathCrew",
+    "rag": "ragflow.crews.rag_crew.rag_crew:RagCrew",
+    "search": "ragflow.crews.search_crew.search_crew:SearchCrew",
+    "tutorial": "ragflow.crews.tutorial_crew.tutorial_crew:TutorialCrew",
+}
+
+
+def load_crew_class(name: str) -> Any:
+    """Import and return the ``CrewBase`` class registered under ``name``.
+
+    Raises:
+        KeyError: If ``name`` is not a known crew.
+    """
+    module_name, class_name = CREW_CLASSES[name].split(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class CrewPool:
+    """Builds each crew once and hands out reset copies."""
+
+    def __init__(self):
+        self._templates: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.build_seconds: Dict[str, float] = {}
+        self.acquisitions: Dict[str, int] = {}
+
+    def template(self, name: str) -> Any:
+        """Return the template crew for ``name``, building it on first use."""
+        crew = self._templates.get(name)
+        if crew is None:
+            with self._lock:
+                crew = self._templates.get(name)
+                if crew is None:
+                    started = time.perf_counter()
+                    crew = load_crew_class(name)().crew()
+                    self.build_seconds[name] = time.perf_counter() - started
+                    self._templates[name] = crew
+        return crew
+
+    def acquire(self, name: str) -> Any:
+        """Return a fresh copy of the ``name`` crew, safe to kick off once.
+
+        Args:
+            name (str): One of the keys of `CREW_CLASSES`.
+
+        Returns:
+            Crew: A copy of the template with reset agents and tasks.
+        """
+        crew = self.template(name).copy()
+        self.acquisitions[name] = self.acquisitions.get(name, 0) + 1
+        return crew
+
+    def warm(self, names: Optional[Iterable[str]] = None) -> None:
+        """Build the templates of ``names`` (all crews by default) ahead of time."""
+        for name in names or CREW_CLASSES:
+            self.template(name)
+
+    def clear(self) -> None:
+        """Drop every template (they are rebuilt on next use)."""
+        with self._lock:
+            self._templates.clear()
+
+
+# Istanza globale
+_crew_pool: Optional[CrewPool] = None
+
+
+def get_crew_pool() -> CrewPool:
+    """Return the process-wide crew pool."""
+    global _crew_pool  # pylint: disable=global-statement
+    if _crew_pool is None:
+        _crew_pool = CrewPool()
+    return _crew_pool
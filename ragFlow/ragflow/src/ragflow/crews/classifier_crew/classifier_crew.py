@@ -1,19 +1,71 @@
-"""Crew di classificazione a due livelli per domande utente.
+"""Crew di classificazione delle domande utente in una sola chiamata.
 
-Questo modulo definisce la classe `ClassifierCrew`, che utilizza agenti e
-task per determinare se una domanda è di matematica e, in caso negativo,
-classificarne il dominio.
+Questo modulo definisce la classe `ClassifierCrew`, che utilizza un agente e
+un task per assegnare a una domanda una delle quattro etichette di routing
+(calcolo matematico, spiegazione matematica, medica, generale) con una
+confidenza, e la funzione `parse_classification` che ne interpreta l'output.
 """
 
-from typing import List
+import json
+import re
+from typing import Any, List, Literal
 
+from pydantic import BaseModel, Field, ValidationError
 from crewai import Agent, Crew, Process, Task  # pylint: disable=import-error
 from crewai.project import CrewBase, agent, crew, task  # pylint: disable=import-error
 from crewai.agents.agent_builder.base_agent import BaseAgent  # pylint: disable=import-error
+from ragflow.llm_cache import build_llm
+from ragflow.runtime import FLOW_SETTINGS
+
+ROUTE_LABELS = ("math_calc", "math_tutorial", "medical", "general")
+
+
+class QueryClassification(BaseModel):
+    """Structured output of the classification task.
+
+    Attributes:
+        label (str): One of "math_calc", "math_tutorial", "medical", "general".
+        confidence (float): Confidence of the classifier between 0 and 1.
+    """
+    label: Literal["math_calc", "math_tutorial", "medical", "general"]
+    confidence: float = Field(default=0.0, ge=0.0, le=1.0)
+
+
+def parse_classification(output: Any) -> QueryClassification:
+    """Interpret the output of the classifier crew.
+
+    Uses the pydantic output when available, otherwise extracts the JSON object
+    from the raw text and, as a last resort, looks for a known label. Unreadable
+    answers are routed to "general" with zero confidence.
+
+    Args:
+        output (Any): A ``CrewOutput`` or the raw text returned by the LLM.
+
+    Returns:
+        QueryClassification: The parsed classification.
+    """
+    parsed = getattr(output, "pydantic", None)
+    if isinstance(parsed, QueryClassification):
+        return parsed
+
+    raw = str(getattr(output, "raw", output))
+    match = re.search(r"\{.*?\}", raw, re.DOTALL)
+    if match:
+        try:
+            return QueryClassification(**json.loads(match.group(0)))
+        except (ValueError, TypeError, ValidationError):
+            pass
+
+    lowered = raw.lower()
+    for label in ROUTE_LABELS:
+        if label in lowered:
+            return QueryClassification(label=label, confidence=0.5)
+    return QueryClassification(label="general", confidence=0.0)
+
 
 @CrewBase
 class ClassifierCrew():
-    """Crew per classificare il dominio delle domande utente a due livelli.
+    """Crew per classificare le domande utente con una sola chiamata LLM.
 
     Attributes:
         agents (List[BaseAgent]): List of agents used in the crew.
@@ -27,61 +79,40 @@ class ClassifierCrew():
     tasks_config: dict
 
     @agent
-    def math_detector(self) -> Agent:
-        """Creates the math detector agent.
+    def query_classifier(self) -> Agent:
+        """Creates the query classifier agent.
 
         Returns:
-            Agent: An agent configured to detect math-related questions.
+            Agent: An agent configured to assign one of the four routing labels.
         """
         return Agent(
-            config=self.agents_config['math_detector'],
-            verbose=True
-        )
-
-    @agent
-    def domain_classifier(self) -> Agent:
-        """Creates the domain classifier agent.
-
-        Returns:
-            Agent: An agent configured to classify the domain of non-math questions.
-        """
-        return Agent(
-            config=self.agents_config['domain_classifier'],
-            verbose=True
-        )
-
-    @task
-    def detect_math_task(self) -> Task:
-        """Creates the task for detecting math questions.
-
-        Returns:
-            Task: A task for identifying whether a question is math-related.
-        """
-        return Task(
-            config=self.tasks_config['detect_math_task']
+            config=self.agents_config['query_classifier'],
+            llm=build_llm(self.agents_config['query_classifier']['llm']),
+            verbose=FLOW_SETTINGS.verbose
         )
 
     @task
-    def classify_nonmath_domain_task(self) -> Task:
-        """Creates the task for classifying non-math domains.
+    def classify_query_task(self) -> Task:
+        """Creates the four-way classification task.
 
         Returns:
-            Task: A task for classifying the domain of non-math questions.
+            Task: A task returning a `QueryClassification` (label and confidence).
         """
         return Task(
-            config=self.tasks_config['classify_nonmath_domain_task']
+            config=self.tasks_config['classify_query_task'],
+            output_pydantic=QueryClassification
         )
 
     @crew
     def crew(self) -> Crew:
-        """Creates the two-level classifier crew.
+        """Creates the single-call classifier crew.
 
         Returns:
-            Crew: The crew object with agents and tasks set up for classification.
+            Crew: The crew object with the classification agent and task.
         """
         return Crew(
             agents=self.agents,
             tasks=self.tasks,
             process=Process.sequential,
-            verbose=True,
+            verbose=FLOW_SETTINGS.verbose,
         )
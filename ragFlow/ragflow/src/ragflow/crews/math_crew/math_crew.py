@@ -2,7 +2,9 @@ from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
 from typing import List
-from ragflow.tools.math_tool import execute_math_function  # Import del nostro tool
+from ragflow.tools.math_tool import evaluate_math_batch, execute_math_function, solve_equations  # Import dei nostri tool
+from ragflow.llm_cache import build_llm
+from ragflow.runtime import FLOW_SETTINGS
 
 @CrewBase
 class MathCrew():
@@ -15,8 +17,9 @@ class MathCrew():
     def math_solver(self) -> Agent:
         return Agent(
             config=self.agents_config['math_solver'],
-            tools=[execute_math_function],  # Aggiungiamo il tool
-            verbose=True
+            llm=build_llm(self.agents_config['math_solver']['llm']),
+            tools=[execute_math_function, evaluate_math_batch, solve_equations],  # Aggiungiamo i tool
+            verbose=FLOW_SETTINGS.verbose
         )
     
     @task  
@@ -32,5 +35,5 @@ class MathCrew():
             agents=self.agents,
             tasks=self.tasks,
             process=Process.sequential,
-            verbose=True,
+            verbose=FLOW_SETTINGS.verbose,
         )
\ No newline at end of file
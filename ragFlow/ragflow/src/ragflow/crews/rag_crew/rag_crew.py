@@ -22,6 +22,8 @@ from crewai import Agent, Crew, Process, Task  # pylint: disable=import-error
 from crewai.project import CrewBase, agent, crew, task  # pylint: disable=import-error
 from crewai.agents.agent_builder.base_agent import BaseAgent  # pylint: disable=import-error
 from ragflow.tools.rag_tool import medical_search_tool
+from ragflow.llm_cache import build_llm
+from ragflow.runtime import FLOW_SETTINGS
 
 @CrewBase
 class RagCrew():
@@ -78,8 +80,9 @@ class RagCrew():
         """
         return Agent(
             config=self.agents_config['medical_specialist'],
+            llm=build_llm(self.agents_config['medical_specialist']['llm']),
             tools=[medical_search_tool],
-            verbose=True
+            verbose=FLOW_SETTINGS.verbose
         )
 
     @task
@@ -143,5 +146,5 @@ class RagCrew():
             agents=self.agents,
             tasks=self.tasks,
             process=Process.sequential,
-            verbose=True,
+            verbose=FLOW_SETTINGS.verbose,
         )
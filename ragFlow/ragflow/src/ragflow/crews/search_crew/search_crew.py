@@ -1,7 +1,10 @@
 """Crew per ricerche web e sintesi dei risultati.
 
 Questo modulo definisce `SearchCrew`, una classe che coordina un agente di ricerca web
-e i task correlati per produrre riassunti strutturati dei contenuti trovati online.
+e i task correlati per produrre riassunti strutturati dei contenuti trovati online,
+e la modalità "pipeline" (`summarize_search`), che chiama ``search_web`` direttamente
+e ottiene il riassunto con una sola chiamata LLM usando gli stessi prompt YAML,
+senza il ciclo di ragionamento e tool dell'agente.
 
 Example:
     Utilizzo base di SearchCrew:
@@ -14,12 +17,103 @@ Example:
     >>> # Utilizza la crew per eseguire ricerche web
 """
 
-from typing import List
+import json
+import os
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
+import yaml
 from crewai import Agent, Crew, Process, Task  # pylint: disable=import-error
 from crewai.project import CrewBase, agent, crew, task  # pylint: disable=import-error
 from crewai.agents.agent_builder.base_agent import BaseAgent  # pylint: disable=import-error
 from ragflow.tools.custom_tool import search_web  # pylint: disable=import-error
+from ragflow.llm_cache import build_llm
+from ragflow.runtime import FLOW_SETTINGS
+
+CONFIG_DIR = Path(__file__).parent / "config"
+
+
+@lru_cache(maxsize=None)
+def _load_config(name: str) -> dict:
+    return yaml.safe_load((CONFIG_DIR / name).read_text(encoding="utf-8"))
+
+
+def build_summary_messages(query: str, search_output: str) -> List[Dict[str, str]]:
+    """Costruisce i messaggi della chiamata di sintesi della modalità pipeline.
+
+    Usa ruolo, obiettivo e backstory di ``web_research_specialist`` e il prompt
+    di ``search_and_summarize_task``, con i risultati di ``search_web`` già inclusi.
+
+    Args:
+        query (str): La domanda dell'utente.
+        search_output (str): L'output di ``search_web`` per la domanda.
+
+    Returns:
+        List[Dict[str, str]]: Messaggi system e user per il LLM.
+    """
+    agent_config = _load_config("agents.yaml")["web_research_specialist"]
+    task_config = _load_config("tasks.yaml")["search_and_summarize_task"]
+    system = (
+        f"Sei {agent_config['role'].strip()}. {agent_config['backstory'].strip()}\n"
+        f"Il tuo obiettivo: {agent_config['goal'].strip()}"
+    )
+    user = (
+        f"{task_config['description'].replace('{query}', query).strip()}\n\n"
+        "La ricerca con search_web è già stata eseguita: usa solo questi risultati, "
+        f"senza altre ricerche.\n\n{search_output}\n\n"
+        f"Risultato atteso: {task_config['expected_output'].replace('{query}', query).strip()}"
+    )
+    return [{"role": "system", "content": system}, {"role": "user", "content": user}]
+
+
+def summarize_search(query: str, search_output: str) -> str:
+    """Riassume i risultati di ``search_web`` con una sola chiamata LLM.
+
+    Args:
+        query (str): La domanda dell'utente.
+        search_output (str): L'output di ``search_web`` per la domanda.
+
+    Returns:
+        str: Il riassunto strutturato.
+    """
+    model = _load_config("agents.yaml")["web_research_specialist"]["llm"]
+    return str(build_llm(model).call(build_summary_messages(query, search_output)))
+
+
+def log_web_run(mode: str, llm_calls: int, latency_s: float, path: Optional[str] = None) -> None:
+    """Aggiunge al log JSONL le chiamate LLM e la latenza di una ricerca web.
+
+    Args:
+        mode (str): "pipeline" o "agent".
+        llm_calls (int): Chiamate LLM della domanda.
+        latency_s (float): Secondi spesi tra ricerca e sintesi.
+        path (Optional[str]): File di log; predefinito ``FLOW_SETTINGS.web_run_log_path``.
+    """
+    path = path or FLOW_SETTINGS.web_run_log_path
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    record = {"mode": mode, "llm_calls": llm_calls, "latency_s": round(latency_s, 3), "ts": time.time()}
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps(record) + "\n")
+
+
+def web_run_averages(path: Optional[str] = None) -> Dict[str, Tuple[int, float, float]]:
+    """Restituisce per modalità ``(domande, chiamate LLM medie, latenza media)`` dal log."""
+    path = path or FLOW_SETTINGS.web_run_log_path
+    totals: Dict[str, List[float]] = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                total = totals.setdefault(record["mode"], [0, 0.0, 0.0])
+                total[0] += 1
+                total[1] += record["llm_calls"]
+                total[2] += record["latency_s"]
+    return {mode: (int(n), calls / n, latency / n) for mode, (n, calls, latency) in totals.items()}
+
 
 @CrewBase
 class SearchCrew():
@@ -75,8 +169,9 @@ class SearchCrew():
         """
         return Agent(
             config=self.agents_config['web_research_specialist'],
+            llm=build_llm(self.agents_config['web_research_specialist']['llm']),
             tools=[search_web],
-            verbose=True
+            verbose=FLOW_SETTINGS.verbose
         )
 
     @task
@@ -135,5 +230,5 @@ class SearchCrew():
             agents=self.agents,
             tasks=self.tasks,
             process=Process.sequential,
-            verbose=True,
+            verbose=FLOW_SETTINGS.verbose,
         )
@@ -1,7 +1,15 @@
 """Crew per la creazione di tutorial e spiegazioni strutturate.
 
 Definisce `TutorialCrew`, che coordina agenti e task per pianificare, redigere
-e compilare tutorial completi in modo sequenziale.
+e compilare tutorial completi.
+
+I task formano un piccolo DAG: dopo `plan_tutorial` l'introduzione e il
+contenuto principale dipendono solo dal piano, quindi in modalità parallela
+(``RAGFLOW_TUTORIAL_PARALLEL``, attiva di default) vengono scritti in
+contemporanea da `content_writer_1` e `content_writer_2` e si ricongiungono in
+`compile_final`. In questa modalità il manager non delega (l'assegnazione
+delle sezioni è già fissata dal DAG) e il suo ciclo è limitato da
+``RAGFLOW_TUTORIAL_MANAGER_MAX_ITER``.
 """
 
 from typing import List
@@ -9,6 +17,8 @@ from typing import List
 from crewai import Agent, Crew, Process, Task  # pylint: disable=import-error
 from crewai.project import CrewBase, agent, crew, task  # pylint: disable=import-error
 from crewai.agents.agent_builder.base_agent import BaseAgent  # pylint: disable=import-error
+from ragflow.llm_cache import build_llm
+from ragflow.runtime import FLOW_SETTINGS
 
 
 @CrewBase
@@ -35,8 +45,11 @@ class TutorialCrew():
         """
         return Agent(
             config=self.agents_config['tutorial_manager'],
-            verbose=True,
-            allow_delegation=True
+            llm=build_llm(self.agents_config['tutorial_manager']['llm']),
+            verbose=FLOW_SETTINGS.verbose,
+            # Con il DAG parallelo le sezioni sono già assegnate: niente round di delega
+            allow_delegation=not FLOW_SETTINGS.tutorial_parallel,
+            max_iter=FLOW_SETTINGS.tutorial_manager_max_iter
         )
 
     @agent
@@ -48,7 +61,8 @@ class TutorialCrew():
         """
         return Agent(
             config=self.agents_config['content_writer_1'],
-            verbose=True
+            llm=build_llm(self.agents_config['content_writer_1']['llm']),
+            verbose=FLOW_SETTINGS.verbose
         )
 
     @agent
@@ -60,7 +74,8 @@ class TutorialCrew():
         """
         return Agent(
             config=self.agents_config['content_writer_2'],
-            verbose=True
+            llm=build_llm(self.agents_config['content_writer_2']['llm']),
+            verbose=FLOW_SETTINGS.verbose
         )
 
     @task
@@ -80,11 +95,14 @@ class TutorialCrew():
         """Crea il task per scrivere l'introduzione.
 
         Returns:
-            Task: Un task per la scrittura dell'introduzione.
+            Task: Un task per la scrittura dell'introduzione, dipendente solo
+            dal piano (asincrono in modalità parallela).
         """
         return Task(
             config=self.tasks_config['write_introduction'],
-            agent=self.content_writer_1()
+            agent=self.content_writer_1(),
+            context=[self.plan_tutorial()],
+            async_execution=FLOW_SETTINGS.tutorial_parallel
         )
 
     @task
@@ -92,11 +110,14 @@ class TutorialCrew():
         """Crea il task per scrivere il contenuto principale.
 
         Returns:
-            Task: Un task per la scrittura del contenuto principale.
+            Task: Un task per la scrittura del contenuto principale, dipendente
+            solo dal piano (asincrono in modalità parallela).
         """
         return Task(
             config=self.tasks_config['write_main_content'],
-            agent=self.content_writer_2()
+            agent=self.content_writer_2(),
+            context=[self.plan_tutorial()],
+            async_execution=FLOW_SETTINGS.tutorial_parallel
         )
 
     @task
@@ -105,7 +126,7 @@ class TutorialCrew():
 
         Returns:
             Task: Un task per la compilazione finale del tutorial, che utilizza
-            il contesto dei task precedenti.
+            il contesto dei task precedenti e attende le sezioni asincrone.
         """
         return Task(
             config=self.tasks_config['compile_final'],
@@ -122,11 +143,12 @@ class TutorialCrew():
         """Crea e restituisce la crew TutorialCrew.
 
         Returns:
-            Crew: La crew configurata per la creazione di tutorial in modo sequenziale.
+            Crew: La crew configurata per la creazione di tutorial (sezioni
+            in parallelo, compilazione finale in coda).
         """
         return Crew(
             agents=self.agents,
             tasks=self.tasks,
-            verbose=True,
+            verbose=FLOW_SETTINGS.verbose,
             process=Process.sequential,
         )
\ No newline at end of file
@@ -0,0 +1,207 @@
+"""Disk-backed exact-match cache of LLM responses shared by every crew.
+
+Every agent of the five crews and the LangChain chain of the RAG system call
+Azure gpt-4o, and identical prompts were recomputed each time. `LLMCache`
+stores each response in the local SQLite store under a hash of the model,
+the exact messages and the generation parameters (temperature, stop words,
+response format), with LRU eviction bounded by number of entries and total
+size and a TTL.
+
+The cache is wired in two places:
+
+* `CachedLLM`, a CrewAI ``LLM`` subclass returned by `build_llm`, used by
+  the crews instead of the plain ``llm:`` model string of their YAML;
+* ``LangChainLLMCache`` (in `ragflow.llm_cache_langchain`, so the flow does
+  not import LangChain until the RAG system is built), a ``BaseCache``
+  adapter passed to the ``AzureChatOpenAI`` of ``RAGSystem``.
+
+``RAGFLOW_LLM_CACHE_ENABLED=0`` disables it entirely, while
+``RAGFLOW_LLM_CACHE_BYPASS=1`` skips lookups but still stores fresh answers
+(useful to refresh the cache). Calls with native tool/function definitions
+are never cached. ``python -m ragflow.llm_cache`` shows its size and ``--clear``
+empties it; `LLMCache.stats` reports the hit rate of the current process.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from crewai import LLM  # pylint: disable=import-error
+
+from ragflow.cache import SqliteStore
+from ragflow.runtime import FLOW_SETTINGS
+from ragflow.tracing import record, trace_call
+
+
+class LLMCache:
+    """Exact-match response cache in a local SQLite file.
+
+    Args:
+        path (str): SQLite file.
+        max_entries (int): Maximum cached responses (LRU eviction).
+        max_bytes (int): Maximum total size of the cached responses.
+        ttl_s (float): Time-to-live of a response (0 disables expiry).
+        bypass (bool): Skip lookups (responses are still stored).
+    """
+
+    def __init__(self, path: str, max_entries: int, max_bytes: int, ttl_s: float, bypass: bool = False):
+        self.store = SqliteStore(path, "llm", max_entries=max_entries, ttl_s=ttl_s, max_bytes=max_bytes)
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stores = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, messages: Any, params: Optional[Dict[str, Any]] = None) -> str:
+        """Hash of the model, the exact messages and the generation parameters."""
+        raw = json.dumps(
+            {"model": model, "messages": messages, "params": params or {}},
+            sort_keys=True, default=str, ensure_ascii=False,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Any:
+        """Return the cached response for ``key``, or None on a miss or in bypass mode."""
+        if self.bypass:
+            with self._lock:
+                self.bypassed += 1
+            return None
+        value = self.store.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store the response ``value`` (JSON-serializable) under ``key``."""
+        self.store.set(key, value)
+        with self._lock:
+            self.stores += 1
+
+    def clear(self) -> None:
+        """Drop every cached response."""
+        self.store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size, hits, misses, bypassed lookups, stored responses and hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.store),
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "stores": self.stores,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Istanza globale
+_llm_cache: Optional[LLMCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Return the process-wide LLM cache, or None when disabled."""
+    global _llm_cache  # pylint: disable=global-statement
+    if not FLOW_SETTINGS.llm_cache_enabled:
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMCache(
+                os.path.join(FLOW_SETTINGS.state_dir, "llm_cache.sqlite"),
+                max_entries=FLOW_SETTINGS.llm_cache_size,
+                max_bytes=FLOW_SETTINGS.llm_cache_max_mb * 1024 * 1024,
+                ttl_s=FLOW_SETTINGS.llm_cache_ttl_s,
+                bypass=FLOW_SETTINGS.llm_cache_bypass,
+            )
+        return _llm_cache
+
+
+class CachedLLM(LLM):
+    """CrewAI ``LLM`` whose text completions go through `get_llm_cache`."""
+
+    def _cache_params(self) -> Dict[str, Any]:
+        response_format = getattr(self, "response_format", None)
+        return {
+            "temperature": self.temperature,
+            "stop": list(self.stop or []),
+            "response_format": str(response_format) if response_format else None,
+        }
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+        """Return the cached response of identical messages or call the model."""
+        cache = get_llm_cache()
+        key = None
+        if cache is not None and not tools:
+            if isinstance(messages, str):
+                messages = [{"role": "user", "content": messages}]
+            key = cache.key(self.model, messages, self._cache_params())
+            cached = cache.get(key)
+            if cached is not None:
+                record(llm_calls=1, llm_cached=1)
+                return cached
+        response = self._traced_call(messages, tools, callbacks, available_functions, **kwargs)
+        if key is not None and isinstance(response, str) and response.strip():
+            cache.set(key, response)
+        return response
+
+    def _traced_call(self, messages, *args, **kwargs):
+        """Call the model, charging time and tokens to the current run trace."""
+        before = dict(getattr(self, "_token_usage", None) or {})
+        with trace_call("llm"):
+            response = super().call(messages, *args, **kwargs)
+        after = getattr(self, "_token_usage", None) or {}
+        prompt = after.get("prompt_tokens", 0) - before.get("prompt_tokens", 0)
+        completion = after.get("completion_tokens", 0) - before.get("completion_tokens", 0)
+        if not prompt and not completion:
+            # Utilizzo non riportato dal provider: stima di ~4 caratteri per token
+            prompt = len(json.dumps(messages, default=str, ensure_ascii=False)) // 4
+            completion = len(str(response)) // 4
+        record(prompt_tokens=prompt, completion_tokens=completion)
+        return response
+
+
+# Sostituto dei modelli Azure (benchmark offline), None in produzione
+_llm_factory: Optional[Callable[[str], LLM]] = None
+
+
+def set_llm_factory(factory: Optional[Callable[[str], LLM]]) -> None:
+    """Make `build_llm` return ``factory(model)`` instead of the Azure model (None restores it).
+
+    Crews already built (e.g. the templates of the crew pool) keep their LLM.
+    """
+    global _llm_factory  # pylint: disable=global-statement
+    _llm_factory = factory
+
+
+def build_llm(model: str) -> LLM:
+    """Return the CrewAI LLM of ``model`` (e.g. ``"azure/gpt-4o"``), behind the response cache."""
+    if _llm_factory is not None:
+        return _llm_factory(model)
+    return CachedLLM(model=model)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Inspect or clear the LLM response cache from the command line."""
+    parser = argparse.ArgumentParser(description="Gestione della cache delle risposte LLM")
+    parser.add_argument("--clear", action="store_true", help="svuota la cache")
+    args = parser.parse_args(argv)
+    cache = get_llm_cache()
+    if cache is None:
+        print("Cache LLM disabilitata (RAGFLOW_LLM_CACHE_ENABLED=0)")
+        return
+    if args.clear:
+        cache.clear()
+        print("🧹 Cache LLM svuotata")
+    print(f"Risposte in cache: {len(cache.store)} — {cache.store.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""LangChain adapters of the LLM response cache and of the run tracing.
+
+Kept apart from `ragflow.llm_cache` so that importing the CrewAI side of the
+cache (every crew, and the flow at startup) does not import LangChain: only
+``RAGSystem`` uses these adapters, on the medical route.
+"""
+
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from langchain_core.caches import BaseCache  # pylint: disable=import-error
+from langchain_core.callbacks import BaseCallbackHandler  # pylint: disable=import-error
+from langchain_core.load import dumps, loads  # pylint: disable=import-error
+
+from ragflow.llm_cache import LLMCache, get_llm_cache
+from ragflow.tracing import record
+
+
+def langchain_llm_cache() -> Any:
+    """Return the LangChain cache adapter, or None when the LLM cache is disabled."""
+    cache = get_llm_cache()
+    return LangChainLLMCache(cache) if cache is not None else None
+
+
+class LangChainLLMCache(BaseCache):
+    """LangChain ``BaseCache`` adapter storing generations in an `LLMCache`.
+
+    LangChain's ``llm_string`` already encodes the model and its parameters
+    (deployment, temperature, ...), so it takes the place of the model name
+    in the key.
+
+    Args:
+        cache (LLMCache): The shared response cache.
+    """
+
+    def __init__(self, cache: LLMCache):
+        self.cache = cache
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Any]]:
+        """Return the cached generations of ``prompt`` for ``llm_string``."""
+        raw = self.cache.get(self.cache.key(llm_string, prompt))
+        if not raw:
+            return None
+        record(llm_cached=1)
+        return [loads(generation) for generation in raw]
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Any]) -> None:
+        """Store the generations of ``prompt`` for ``llm_string``."""
+        self.cache.set(self.cache.key(llm_string, prompt), [dumps(generation) for generation in return_val])
+
+    def clear(self, **kwargs: Any) -> None:
+        """Drop every cached response."""
+        self.cache.clear()
+
+
+class LangChainTraceHandler(BaseCallbackHandler):
+    """LangChain callback charging LLM calls, latency and tokens to the run trace."""
+
+    def __init__(self):
+        self._started: Dict[Any, float] = {}
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):  # pylint: disable=unused-argument
+        """Remember when the call started."""
+        self._started[run_id] = time.perf_counter()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):  # pylint: disable=unused-argument
+        """Remember when the chat call started."""
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):  # pylint: disable=unused-argument
+        """Record the call with its duration and token usage."""
+        started = self._started.pop(run_id, time.perf_counter())
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        record(
+            llm_calls=1,
+            llm_s=time.perf_counter() - started,
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+        )
@@ -3,17 +3,26 @@
 Defines the state and flow to route user questions to the appropriate
 specialized crews (math, tutorial, medical RAG, or web search) and prints
 formatted results.
+
+Crews and route-specific tools (symbolic solver, web search, RAG system) are
+imported by the step that uses them, so reaching the first prompt only pays
+for CrewAI and the routing modules (``python -m ragflow.bench.importtime``).
 """
 
+import time
+
 from pydantic import BaseModel
-from crewai import Crew  # pylint: disable=import-error
 from crewai.flow.flow import Flow, listen, router, start  # pylint: disable=import-error
 
-from ragflow.crews.classifier_crew.classifier_crew import ClassifierCrew
-from ragflow.crews.math_crew.math_crew import MathCrew
-from ragflow.crews.rag_crew.rag_crew import RagCrew
-from ragflow.crews.search_crew.search_crew import SearchCrew
-from ragflow.crews.tutorial_crew.tutorial_crew import TutorialCrew
+from ragflow.crews.classifier_crew.classifier_crew import QueryClassification, parse_classification
+from ragflow.crew_pool import get_crew_pool
+from ragflow.llm_cache import get_llm_cache
+from ragflow.route_classifier import FAST_ROUTE_STATS, fast_route_hit_rate, log_route, predict_route
+from ragflow.routing_cache import get_routing_cache
+from ragflow.runtime import FLOW_SETTINGS
+from ragflow.speculative import get_speculator
+from ragflow.tracing import current_trace, trace_run, traced_step
+from ragflow.tutorial_cache import get_tutorial_cache
 
 class IntelligentSearchState(BaseModel):
     """State for the Intelligent Search Flow.
@@ -24,6 +33,17 @@ class IntelligentSearchState(BaseModel):
         math_type (str): "CALCULATION" or "EXPLANATION" for math questions.
         domain_classification (str): "medical" or "general" for non-math questions.
         search_type (str): The selected search type ("math_calc", "math_tutorial", "rag", "web").
+        route_confidence (float): Confidence of the routing classification (0-1).
+        routing_latency_s (float): Wall-clock seconds spent classifying the question.
+        routing_llm_calls (int): LLM classification calls made for this question.
+        route_source (str): "cache", "local" (local classifier) or "llm".
+        speculative_hit (bool): Whether the winning route found its prefetch ready.
+        math_fast_path (bool): Whether the calculation was answered without the MathCrew.
+        math_engine (str): "arithmetic", "sympy" or "crew".
+        tutorial_cached (bool): Whether the tutorial came from the tutorial cache.
+        web_mode (str): "pipeline" or "agent" (how the web answer was produced).
+        web_llm_calls (int): LLM calls made to answer a web question.
+        web_latency_s (float): Wall-clock seconds spent searching and summarizing.
         summary (str): The summary or answer generated by the system.
         result (str): The final result message.
     """
@@ -32,16 +52,52 @@ class IntelligentSearchState(BaseModel):
     math_type: str = ""  # "CALCULATION" o "EXPLANATION"
     domain_classification: str = ""  # "medical" o "general" (solo per non-math)
     search_type: str = ""  # "math_calc", "math_tutorial", "rag", "web"
+    route_confidence: float = 0.0
+    routing_latency_s: float = 0.0
+    routing_llm_calls: int = 0
+    route_source: str = ""
+    speculative_hit: bool = False
+    math_fast_path: bool = False
+    math_engine: str = ""
+    tutorial_cached: bool = False
+    web_mode: str = ""
+    web_llm_calls: int = 0
+    web_latency_s: float = 0.0
     summary: str = ""
     result: str = ""
 
 class IntelligentSearchFlow(Flow[IntelligentSearchState]):
     """Main flow for intelligent question routing and answering."""
 
+    _speculation = None  # prefetch speculativo della domanda corrente
+    trace = None  # traccia dell'ultima esecuzione (None con il tracing disattivato)
+
+    def kickoff(self, *args, **kwargs):
+        """Run the flow inside a run trace, logged with the question and its route."""
+        with trace_run() as trace:
+            self.trace = trace
+            try:
+                return super().kickoff(*args, **kwargs)
+            finally:
+                if trace is not None:
+                    trace.query = self.state.user_query
+                    trace.route = self.state.search_type
+
+    @staticmethod
+    def _print_trace():
+        """Print the cost of the question so far (calls, tokens and time per step)."""
+        trace = current_trace()
+        if trace is not None:
+            print(trace.format())
+
     @start()
+    @traced_step
     def get_user_question(self):
         """Prompt the user for a question and store it in the state.
 
+        A question already set in the state (``kickoff(inputs={"user_query": ...})``)
+        is used as is, without prompting.
+
         Returns:
             str: The user's question.
         """
@@ -53,7 +109,12 @@ class IntelligentSearchFlow(Flow[IntelligentSearchState]):
         print("🌍 Domande generali → Ricerca web")
         print()
 
-        query = input("❓ Inserisci la tua domanda: ").strip()
+        if self.state.user_query:
+            # Domanda passata a kickoff(inputs={"user_query": ...}): niente prompt interattivo
+            query = self.state.user_query.strip()
+            print(f"❓ Domanda: {query}")
+        else:
+            query = input("❓ Inserisci la tua domanda: ").strip()
         if not query:
             query = "Spiega come risolvere le equazioni di secondo grado"
             print(f"➡️ Domanda di esempio: {query}")
@@ -62,132 +123,184 @@ class IntelligentSearchFlow(Flow[IntelligentSearchState]):
         return query
 
     @listen(get_user_question)
-    def detect_math_question(self, query: str):
-        """Detect if the user's question is mathematical.
+    @traced_step
+    def classify_question(self, query: str):
+        """Classify the question into one of the four routes.
+
+        The routing cache is checked first, then the local route classifier;
+        the LLM classifier crew (a single call) is built only when both miss.
+        In speculative mode the web prefetch runs while the LLM classifies.
 
         Args:
             query (str): The user's question.
 
         Returns:
-            str: "MATH" if the question is mathematical, otherwise "NON-MATH".
+            str: The selected search type ("math_calc", "math_tutorial", "rag" or "web").
         """
-        print("\n🎯 LIVELLO 1: Verifico se è una domanda matematica...")
-
-        # Usa ClassifierCrew con task specifico per math detection
-        classifier_crew = ClassifierCrew()
-
-        # Esegui SOLO il task di math detection usando l'agent math_detector
-        math_detector_agent = classifier_crew.math_detector()
-        detect_task = classifier_crew.detect_math_task()
-        detect_task.agent = math_detector_agent
-
-        # Kickoff solo il task di math detection
-        temp_crew = Crew(
-            agents=[math_detector_agent],
-            tasks=[detect_task]
-        )
-
-        classification_result = temp_crew.kickoff(inputs={"question": query})
-        math_classification = str(classification_result).strip().upper()
-
-        # Pulisci la risposta per assicurarsi che sia solo MATH o NON-MATH
-        if "MATH" in math_classification and "NON" not in math_classification:
-            self.state.is_math = "MATH"
-            print("🧮 Domanda MATEMATICA rilevata → Analizzo il tipo...")
+        print("\n🎯 Classifico la domanda (calcolo, spiegazione, medica o generale)...")
+        started = time.perf_counter()
+
+        # Cache delle decisioni: domande già viste non vengono riclassificate
+        routing_cache = get_routing_cache()
+        cached = routing_cache.get(query) if routing_cache is not None else None
+        # Fast path: classificatore locale addestrato sulle decisioni passate del LLM
+        fast_route = predict_route(query) if cached is None else None
+        if cached is not None:
+            classification = QueryClassification(
+                label=cached["label"], confidence=cached["route_confidence"]
+            )
+            self.state.route_source = "cache"
+            self.state.routing_llm_calls = 0
+        elif fast_route is not None:
+            label, confidence = fast_route
+            classification = QueryClassification(label=label, confidence=confidence)
+            self.state.route_source = "local"
+            self.state.routing_llm_calls = 0
         else:
-            self.state.is_math = "NON-MATH"
-            print("📝 Domanda NON-MATEMATICA → Procedo con classificazione dominio...")
-
-        return self.state.is_math
-
-    @router(detect_math_question)
-    def route_after_math_detection(self):
-        """Route to the next step based on math detection.
-
-        Returns:
-            str: The next step ("classify_math_type" or "classify_nonmath_domain").
-        """
-        if self.state.is_math == "MATH":
-            return "classify_math_type"
-        return "classify_nonmath_domain"
+            speculator = get_speculator()
+            if speculator is not None:
+                # Retrieval e ricerca web partono mentre il LLM decide la rotta
+                self._speculation = speculator.start(query)
+            # Una sola chiamata: etichetta a quattro vie + confidenza
+            classifier_crew = get_crew_pool().acquire("classifier")
+            classification_result = classifier_crew.kickoff(inputs={"question": query})
+            classification = parse_classification(classification_result)
+            self.state.route_source = "llm"
+            self.state.routing_llm_calls = 1
+            log_route(query, classification.label)
+        FAST_ROUTE_STATS[self.state.route_source] += 1
+        self.state.routing_latency_s = time.perf_counter() - started
+
+        self._apply_classification(classification)
+        if self._speculation is not None:
+            if not get_speculator().resolve(self._speculation, self.state.search_type):
+                self._speculation = None
+        if routing_cache is not None and cached is None:
+            routing_cache.set(query, {
+                "label": classification.label,
+                "is_math": self.state.is_math,
+                "math_type": self.state.math_type,
+                "domain_classification": self.state.domain_classification,
+                "search_type": self.state.search_type,
+                "route_confidence": self.state.route_confidence,
+            })
+        if self.state.route_source == "cache":
+            stats = routing_cache.stats()
+            print(
+                f"💾 Routing dalla cache in {self.state.routing_latency_s * 1e3:.1f}ms "
+                f"(hit rate cache: {stats['hit_rate']:.0%})"
+            )
+        elif self.state.route_source == "local":
+            print(
+                f"⚡ Routing locale in {self.state.routing_latency_s * 1e6:.0f}µs "
+                f"(confidenza {classification.confidence:.2f})"
+            )
+        else:
+            print(f"⏱️ Routing in {self.state.routing_latency_s:.2f}s con 1 chiamata LLM")
+        print(f"📈 Hit rate fast path: {fast_route_hit_rate():.0%}")
+        return self.state.search_type
 
-    @listen("classify_math_type")
-    def determine_math_type(self):
-        """Determine if the math question is a calculation or an explanation.
+    def _apply_classification(self, classification: QueryClassification):
+        """Store a four-way classification in the flow state.
 
-        Returns:
-            str: "CALCULATION" or "EXPLANATION".
+        Args:
+            classification (QueryClassification): Label and confidence to apply.
         """
-        print("\n🎯 LIVELLO 2: Determino se è un calcolo o una richiesta di spiegazione...")
-
-        query_upper = self.state.user_query.upper()
-
-        # Keywords che indicano richiesta di spiegazione/tutorial
-        explanation_keywords = [
-            "SPIEGA", "SPIEGAMI", "PARLAMI", "COME SI", "COME FUNZIONA",
-            "COS'È", "COSA SONO", "DIMMI", "INSEGNA", "TUTORIAL",
-            "PERCHÉ", "QUANDO", "METODO", "TEORIA", "CONCETTO",
-            "DEFINIZIONE", "PROPRIETÀ", "REGOLA", "FORMULA"
-        ]
-
-        # Keywords che indicano calcolo puro
-        calculation_keywords = [
-            "CALCOLA", "RISOLVI", "TROVA", "QUANTO FA", "=", 
-            "RISULTATO", "VALORE", "DETERMINA IL VALORE"
-        ]
-
-        # Controlla se è una richiesta di spiegazione
-        is_explanation = any(keyword in query_upper for keyword in explanation_keywords)
+        label = classification.label
+        self.state.route_confidence = classification.confidence
+        self.state.is_math = "MATH" if label.startswith("math") else "NON-MATH"
 
-        # Controlla se è un calcolo esplicito
-        is_calculation = any(keyword in query_upper for keyword in calculation_keywords)
-
-        # Se contiene operatori matematici senza richiesta di spiegazione, è un calcolo
-        has_math_operators = any(
-            op in self.state.user_query for op in ['+', '-', '*', '/', '=', '^', '²', '³']
-        )
-
-        if is_explanation or (
-            not is_calculation and not has_math_operators and len(self.state.user_query.split()) > 3
-        ):
+        if label == "math_tutorial":
             self.state.math_type = "EXPLANATION"
             self.state.search_type = "math_tutorial"
             print("📖 Richiesta di SPIEGAZIONE matematica → Uso Tutorial Team")
-        else:
+        elif label == "math_calc":
             self.state.math_type = "CALCULATION"
             self.state.search_type = "math_calc"
             print("🧮 Richiesta di CALCOLO → Uso Math Solver")
+        elif label == "medical":
+            self.state.domain_classification = "medical"
+            self.state.search_type = "rag"
+            print("🏥 Domanda MEDICA rilevata → Uso database medico locale")
+        else:
+            self.state.domain_classification = "general"
+            self.state.search_type = "web"
+            print("🌍 Domanda GENERALE rilevata → Uso ricerca web")
 
-        return self.state.math_type
+    def _await_speculation(self):
+        """Wait for the prefetch of the winning route, if one was started."""
+        speculation, self._speculation = self._speculation, None
+        if speculation is None:
+            return
+        self.state.speculative_hit = get_speculator().finish(
+            speculation, FLOW_SETTINGS.speculative_wait_s
+        )
+        if self.state.speculative_hit:
+            hidden = time.perf_counter() - speculation.started
+            print(f"⚡ Prefetch speculativo pronto ({hidden:.2f}s sovrapposti alla classificazione)")
 
-    @router(determine_math_type)
-    def route_math_type(self):
-        """Route to calculation or tutorial based on math type.
+    @router(classify_question)
+    @traced_step
+    def route_question(self):
+        """Route to the specialized path selected by the classification.
 
         Returns:
-            str: The next step ("perform_math_calculation" or "create_math_tutorial").
+            str: The next step ("perform_math_calculation", "create_math_tutorial",
+            "perform_rag_search" or "perform_web_search").
         """
-        if self.state.math_type == "CALCULATION":
-            return "perform_math_calculation"
-        return "create_math_tutorial"
+        routes = {
+            "math_calc": "perform_math_calculation",
+            "math_tutorial": "create_math_tutorial",
+            "rag": "perform_rag_search",
+        }
+        return routes.get(self.state.search_type, "perform_web_search")
 
     # ========== PERCORSO TUTORIAL MATEMATICO ==========
     @listen("create_math_tutorial")
+    @traced_step
     def generate_math_tutorial(self):
         """Generate a detailed math tutorial using the TutorialCrew.
 
+        Tutorials already generated for the same or a near-duplicate topic
+        are returned from the tutorial cache; stale ones are regenerated in
+        the background.
+
         Returns:
             str: The generated tutorial summary.
         """
+        tutorial_cache = get_tutorial_cache()
+        cached = tutorial_cache.lookup(self.state.user_query) if tutorial_cache is not None else None
+        if cached is not None:
+            self.state.tutorial_cached = True
+            self.state.summary = cached.tutorial
+            print(
+                f"\n💾 Tutorial dalla cache (argomento: \"{cached.topic}\", "
+                f"similarità {cached.similarity:.2f}, età {cached.age_s / 3600:.1f}h)"
+            )
+            if cached.stale and FLOW_SETTINGS.tutorial_cache_revalidate:
+                topic = self.state.user_query
+                if tutorial_cache.revalidate(topic, lambda: self._generate_tutorial(topic)):
+                    print("🔄 Tutorial scaduto: rigenerazione in background")
+            return self.state.summary
+
         print("\n📖 Creo un tutorial matematico dettagliato...")
         print("👨‍🏫 Il manager sta organizzando il contenuto didattico...")
 
-        tutorial_crew = TutorialCrew().crew()
-        result = tutorial_crew.kickoff(inputs={"topic": self.state.user_query})
-        self.state.summary = str(result)
+        started = time.perf_counter()
+        self.state.summary = self._generate_tutorial(self.state.user_query)
+        print(f"⏱️ Tutorial generato in {time.perf_counter() - started:.1f}s")
+        if tutorial_cache is not None:
+            tutorial_cache.set(self.state.user_query, self.state.summary)
         return self.state.summary
 
+    @staticmethod
+    def _generate_tutorial(topic: str) -> str:
+        """Run the TutorialCrew on ``topic`` and return the tutorial text."""
+        tutorial_crew = get_crew_pool().acquire("tutorial")
+        return str(tutorial_crew.kickoff(inputs={"topic": topic}))
+
     @listen(generate_math_tutorial)
+    @traced_step
     def display_math_tutorial_results(self, summary: str):
         """Display the results of the math tutorial.
 
@@ -201,30 +314,68 @@ class IntelligentSearchFlow(Flow[IntelligentSearchState]):
         print("📖 TUTORIAL MATEMATICO")
         print("="*60)
         print(f"❓ Argomento: {self.state.user_query}")
-        print("👨‍🏫 Fonte: Tutorial Team Matematico")
+        source = "Cache dei tutorial" if self.state.tutorial_cached else "Tutorial Team Matematico"
+        print(f"👨‍🏫 Fonte: {source}")
         print("-"*60)
         print(f"📚 Tutorial:\n{summary}")
         print("="*60)
 
+        self._print_trace()
+
         self.state.result = "Tutorial matematico creato con successo!"
         return self.state.result
 
     # ========== PERCORSO CALCOLO MATEMATICO ==========
     @listen("perform_math_calculation")
+    @traced_step
     def calculate_with_math(self):
-        """Perform a mathematical calculation using the MathCrew.
+        """Perform a mathematical calculation.
+
+        Plain arithmetic and closed-form expressions are evaluated locally,
+        equations and systems are solved by the symbolic engine; the MathCrew
+        agent loop runs only when neither can parse the question.
 
         Returns:
             str: The calculation result summary.
         """
+        # pylint: disable=import-outside-toplevel
+        from ragflow.tools.arithmetic import ARITHMETIC_STATS, arithmetic_fast_path_ratio, try_evaluate
+        from ragflow.tools.equation_solver import solve_text, solver_summary  # importa sympy
+
         print("\n🧮 Eseguo il calcolo matematico...")
 
-        math_crew = MathCrew().crew()
+        fast_result = try_evaluate(self.state.user_query)
+        if fast_result is not None:
+            self.state.math_fast_path = True
+            self.state.math_engine = "arithmetic"
+            self.state.summary = fast_result.format()
+            average_us = ARITHMETIC_STATS["fast_latency_us"] / ARITHMETIC_STATS["fast"]
+            print(
+                f"⚡ Calcolo diretto in {fast_result.latency_s * 1e6:.0f}µs senza MathCrew "
+                f"(fast path: {arithmetic_fast_path_ratio():.0%}, media {average_us:.0f}µs)"
+            )
+            return self.state.summary
+
+        solved = solve_text(self.state.user_query)
+        if solved is not None:
+            self.state.math_fast_path = True
+            self.state.math_engine = "sympy"
+            self.state.summary = solved.format()
+            solved_count, attempted = solver_summary()
+            print(
+                f"⚡ Equazione risolta in {solved.latency_s * 1e3:.1f}ms dal solver simbolico "
+                f"({solved_count}/{attempted} risolte localmente)"
+            )
+            return self.state.summary
+
+        self.state.math_engine = "crew"
+        math_crew = get_crew_pool().acquire("math")
         result = math_crew.kickoff(inputs={"question": self.state.user_query})
         self.state.summary = str(result)
         return self.state.summary
 
     @listen(calculate_with_math)
+    @traced_step
     def display_math_results(self, summary: str):
         """Display the results of the mathematical calculation.
 
@@ -238,64 +389,21 @@ class IntelligentSearchFlow(Flow[IntelligentSearchState]):
         print("🧮 RISULTATO MATEMATICO")
         print("="*60)
         print(f"❓ Problema: {self.state.user_query}")
-        print("⚡ Fonte: Calcolatore matematico")
+        sources = {"arithmetic": "Valutazione diretta", "sympy": "Solver simbolico"}
+        source = sources.get(self.state.math_engine, "Calcolatore matematico")
+        print(f"⚡ Fonte: {source}")
         print("-"*60)
         print(f"📊 Soluzione:\n{summary}")
         print("="*60)
 
+        self._print_trace()
+
         self.state.result = "Calcolo matematico completato!"
         return self.state.result
 
-    @listen("classify_nonmath_domain")
-    def classify_domain_for_nonmath(self):
-        """Classify the domain of a non-math question (medical or general).
-
-        Returns:
-            str: The selected search type ("rag" or "web").
-        """
-        print("\n🎯 LIVELLO 2: Classifico il dominio (Medical vs General)...")
-
-        # Usa ClassifierCrew con task specifico per domain classification
-        classifier_crew = ClassifierCrew()
-
-        # Esegui SOLO il task di domain classification usando l'agent domain_classifier
-        domain_classifier_agent = classifier_crew.domain_classifier()
-        classify_task = classifier_crew.classify_nonmath_domain_task()
-        classify_task.agent = domain_classifier_agent
-
-        # Kickoff solo il task di domain classification
-        temp_crew = Crew(
-            agents=[domain_classifier_agent],
-            tasks=[classify_task]
-        )
-
-        classification_result = temp_crew.kickoff(inputs={"question": self.state.user_query})
-        domain_classification = str(classification_result).strip().upper()
-
-        if "MEDICAL" in domain_classification:
-            self.state.search_type = "rag"
-            self.state.domain_classification = "medical"
-            print("🏥 Domanda MEDICA rilevata → Uso database medico locale")
-        else:
-            self.state.search_type = "web"
-            self.state.domain_classification = "general"
-            print("🌍 Domanda GENERALE rilevata → Uso ricerca web")
-
-        return self.state.search_type
-
-    @router(classify_domain_for_nonmath)
-    def route_after_domain_classification(self):
-        """Route to RAG or web search based on domain classification.
-
-        Returns:
-            str: The next step ("perform_rag_search" or "perform_web_search").
-        """
-        if self.state.search_type == "rag":
-            return "perform_rag_search"
-        return "perform_web_search"
-
     # ========== PERCORSO RAG MEDICO ==========
     @listen("perform_rag_search")
+    @traced_step
     def search_with_rag(self):
         """Search the local medical database using RagCrew.
 
@@ -304,12 +412,13 @@ class IntelligentSearchFlow(Flow[IntelligentSearchState]):
         """
         print("\n📚 Cerco nel database medico locale...")
 
-        rag_crew = RagCrew().crew()
+        rag_crew = get_crew_pool().acquire("rag")
         result = rag_crew.kickoff(inputs={"question": self.state.user_query})
         self.state.summary = str(result)
         return self.state.summary
 
     @listen(search_with_rag)
+    @traced_step
     def display_rag_results(self, summary: str):
         """Display the results from the medical database.
 
@@ -328,25 +437,49 @@ class IntelligentSearchFlow(Flow[IntelligentSearchState]):
         print(f"📚 Risposta:\n{summary}")
         print("="*60)
 
+        self._print_trace()
+
         self.state.result = "Ricerca medica completata!"
         return self.state.result
 
     # ========== PERCORSO RICERCA WEB ==========
     @listen("perform_web_search")
+    @traced_step
     def search_with_web(self):
-        """Search the web using SearchCrew.
+        """Search the web and summarize the results.
+
+        In pipeline mode (default) the flow calls ``search_web`` itself and makes
+        a single summarization LLM call with the SearchCrew prompts; in agent
+        mode the SearchCrew agent decides the tool calls.
 
         Returns:
             str: The web search summary.
         """
-        print("\n🌍 Cerco su internet con DuckDuckGo...")
+        # pylint: disable=import-outside-toplevel
+        from ragflow.crews.search_crew.search_crew import log_web_run, summarize_search
+        from ragflow.tools.custom_tool import run_search
 
-        search_crew = SearchCrew().crew()
-        result = search_crew.kickoff(inputs={"query": self.state.user_query})
-        self.state.summary = str(result)
+        print("\n🌍 Cerco su internet con DuckDuckGo...")
+        self._await_speculation()
+        started = time.perf_counter()
+
+        self.state.web_mode = FLOW_SETTINGS.web_search_mode
+        if self.state.web_mode == "pipeline":
+            search_output = run_search(self.state.user_query)
+            self.state.summary = summarize_search(self.state.user_query, search_output)
+            self.state.web_llm_calls = 1
+        else:
+            search_crew = get_crew_pool().acquire("search")
+            result = search_crew.kickoff(inputs={"query": self.state.user_query})
+            self.state.summary = str(result)
+            usage = getattr(result, "token_usage", None)
+            self.state.web_llm_calls = getattr(usage, "successful_requests", 0)
+        self.state.web_latency_s = time.perf_counter() - started
+        log_web_run(self.state.web_mode, self.state.web_llm_calls, self.state.web_latency_s)
         return self.state.summary
 
     @listen(search_with_web)
+    @traced_step
     def display_web_results(self, summary: str):
         """Display the results from the web search.
 
@@ -364,6 +497,22 @@ class IntelligentSearchFlow(Flow[IntelligentSearchState]):
         print("-"*60)
         print(f"📄 Risultati:\n{summary}")
         print("="*60)
+        print(
+            f"🤖 Modalità {self.state.web_mode}: {self.state.web_llm_calls} chiamate LLM "
+            f"in {self.state.web_latency_s:.2f}s"
+        )
+        from ragflow.crews.search_crew.search_crew import web_run_averages  # pylint: disable=import-outside-toplevel
+
+        averages = web_run_averages()
+        if "pipeline" in averages and "agent" in averages:
+            _, pipeline_calls, pipeline_latency = averages["pipeline"]
+            _, agent_calls, agent_latency = averages["agent"]
+            print(
+                f"📉 Risparmio medio della pipeline sull'agente: {agent_calls - pipeline_calls:.1f} "
+                f"chiamate LLM e {agent_latency - pipeline_latency:.2f}s per domanda"
+            )
+
+        self._print_trace()
 
         self.state.result = "Ricerca web completata!"
         return self.state.result
@@ -372,6 +521,13 @@ class IntelligentSearchFlow(Flow[IntelligentSearchState]):
 def kickoff():
     """Kick off the IntelligentSearchFlow."""
     IntelligentSearchFlow().kickoff()
+    llm_cache = get_llm_cache()
+    if llm_cache is not None:
+        stats = llm_cache.stats()
+        print(
+            f"💾 Cache LLM: {stats['hits']} hit su {stats['hits'] + stats['misses']} chiamate "
+            f"(hit rate {stats['hit_rate']:.0%}, {stats['size']} risposte salvate)"
+        )
 
 def plot():
     """Plot the flow diagram for IntelligentSearchFlow."""
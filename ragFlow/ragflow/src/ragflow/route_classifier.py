@@ -0,0 +1,259 @@
+"""Local distilled route classifier for the Intelligent Search Flow.
+
+Every routing decision taken by the LLM classifier is logged as a
+``(query, label)`` pair. The ``train_router`` command fits a lightweight
+TF-IDF (character n-grams) k-nearest-neighbour model on the log; the flow
+consults it before building the classifier crew and calls the LLM only when
+the local confidence is below ``FlowSettings.fast_route_threshold``.
+
+Confidence is the weighted vote share of the winning label among the nearest
+neighbours multiplied by the cosine similarity of the closest one, so only
+questions very close to already-seen ones take the fast path.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ragflow.cache import normalize_query
+from ragflow.runtime import FLOW_SETTINGS
+
+# Conteggio delle decisioni prese dal percorso locale ("local") o dal LLM ("llm")
+FAST_ROUTE_STATS: Counter = Counter()
+
+
+def log_route(query: str, label: str, path: Optional[str] = None) -> None:
+    """Append a routing decision to the JSONL training log.
+
+    Args:
+        query (str): The user's question.
+        label (str): The final route label ("math_calc", "math_tutorial", "medical", "general").
+        path (Optional[str]): Log file; defaults to ``FLOW_SETTINGS.route_log_path``.
+    """
+    path = path or FLOW_SETTINGS.route_log_path
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps({"query": query, "label": label, "ts": time.time()}, ensure_ascii=False) + "\n")
+
+
+def read_route_log(path: str) -> List[Tuple[str, str]]:
+    """Read the routing log, keeping the latest label of each normalized query.
+
+    Args:
+        path (str): JSONL log file.
+
+    Returns:
+        List[Tuple[str, str]]: ``(normalized_query, label)`` pairs.
+    """
+    latest: Dict[str, str] = {}
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            latest[normalize_query(record["query"])] = record["label"]
+    return list(latest.items())
+
+
+def features(text: str) -> Dict[str, float]:
+    """Return term frequencies of words and word-bounded character 3-5 grams.
+
+    Args:
+        text (str): The question (normalized internally).
+
+    Returns:
+        Dict[str, float]: Feature counts.
+    """
+    counts: Dict[str, float] = defaultdict(float)
+    for word in normalize_query(text).split():
+        counts[f"w:{word}"] += 1.0
+        padded = f" {word} "
+        for n in (3, 4, 5):
+            for i in range(len(padded) - n + 1):
+                counts[padded[i:i + n]] += 1.0
+    return counts
+
+
+class LocalRouteClassifier:
+    """TF-IDF k-nearest-neighbour classifier over logged routing decisions.
+
+    Args:
+        k (int): Number of neighbours voting on the label.
+    """
+
+    def __init__(self, k: int = 5):
+        self.k = k
+        self.idf: Dict[str, float] = {}
+        self.labels: List[str] = []
+        self.index: Dict[str, List[Tuple[int, float]]] = {}
+
+    def _vector(self, text: str) -> Dict[str, float]:
+        vec = {
+            term: (1.0 + math.log(tf)) * self.idf[term]
+            for term, tf in features(text).items()
+            if term in self.idf
+        }
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+        return {term: v / norm for term, v in vec.items()}
+
+    def fit(self, pairs: Iterable[Tuple[str, str]]) -> "LocalRouteClassifier":
+        """Fit the model on ``(query, label)`` pairs.
+
+        Args:
+            pairs (Iterable[Tuple[str, str]]): Training examples.
+
+        Returns:
+            LocalRouteClassifier: The fitted classifier.
+        """
+        pairs = list(pairs)
+        doc_freq: Counter = Counter()
+        for query, _ in pairs:
+            doc_freq.update(features(query).keys())
+        total = len(pairs)
+        self.idf = {term: math.log((1 + total) / (1 + df)) + 1.0 for term, df in doc_freq.items()}
+        self.labels = [label for _, label in pairs]
+        self.index = defaultdict(list)
+        for doc_id, (query, _) in enumerate(pairs):
+            for term, weight in self._vector(query).items():
+                self.index[term].append((doc_id, weight))
+        self.index = dict(self.index)
+        return self
+
+    def predict(self, query: str) -> Tuple[Optional[str], float]:
+        """Return ``(label, confidence)`` for ``query``; ``(None, 0.0)`` if nothing matches.
+
+        Args:
+            query (str): The user's question.
+
+        Returns:
+            Tuple[Optional[str], float]: Predicted label and confidence in [0, 1].
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        for term, weight in self._vector(query).items():
+            for doc_id, doc_weight in self.index.get(term, ()):
+                scores[doc_id] += weight * doc_weight
+        if not scores:
+            return None, 0.0
+        neighbours = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:self.k]
+        votes: Dict[str, float] = defaultdict(float)
+        for doc_id, sim in neighbours:
+            votes[self.labels[doc_id]] += sim
+        label, weight = max(votes.items(), key=lambda item: item[1])
+        share = weight / (sum(votes.values()) or 1.0)
+        return label, min(1.0, share * neighbours[0][1])
+
+    def to_dict(self) -> Dict:
+        """Serialize the model to a JSON-compatible dictionary."""
+        return {"k": self.k, "idf": self.idf, "labels": self.labels, "index": self.index}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "LocalRouteClassifier":
+        """Rebuild a model serialized with `to_dict`."""
+        model = cls(k=data["k"])
+        model.idf = data["idf"]
+        model.labels = data["labels"]
+        model.index = {term: [tuple(p) for p in postings] for term, postings in data["index"].items()}
+        return model
+
+    def save(self, path: str) -> None:
+        """Write the model to ``path`` as JSON."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(self.to_dict(), handle, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "LocalRouteClassifier":
+        """Load a model saved with `save`."""
+        with open(path, encoding="utf-8") as handle:
+            return cls.from_dict(json.load(handle))
+
+
+# Istanza globale (None se il modello non è ancora stato addestrato)
+_route_classifier: Optional[LocalRouteClassifier] = None
+_route_classifier_loaded = False
+
+
+def get_route_classifier() -> Optional[LocalRouteClassifier]:
+    """Return the trained local classifier, loading it once; None if not trained."""
+    global _route_classifier, _route_classifier_loaded  # pylint: disable=global-statement
+    if not _route_classifier_loaded:
+        _route_classifier_loaded = True
+        if os.path.exists(FLOW_SETTINGS.route_model_path):
+            _route_classifier = LocalRouteClassifier.load(FLOW_SETTINGS.route_model_path)
+    return _route_classifier
+
+
+def predict_route(query: str) -> Optional[Tuple[str, float]]:
+    """Return the local ``(label, confidence)`` if it clears the fast-path threshold.
+
+    Args:
+        query (str): The user's question.
+
+    Returns:
+        Optional[Tuple[str, float]]: The fast-path decision, or None to fall back to the LLM.
+    """
+    if not FLOW_SETTINGS.fast_route_enabled:
+        return None
+    model = get_route_classifier()
+    if model is None:
+        return None
+    label, confidence = model.predict(query)
+    if label is None or confidence < FLOW_SETTINGS.fast_route_threshold:
+        return None
+    return label, confidence
+
+
+def fast_route_hit_rate() -> float:
+    """Fraction of routing decisions taken by the local classifier in this process."""
+    total = FAST_ROUTE_STATS["local"] + FAST_ROUTE_STATS["llm"]
+    return FAST_ROUTE_STATS["local"] / total if total else 0.0
+
+
+def train(argv: Optional[List[str]] = None) -> None:
+    """Train the local route classifier from the routing log (``train_router`` command).
+
+    A deterministic 20% hold-out split reports the fast-path coverage (share of
+    questions above the threshold) and its accuracy before the final model is
+    fitted on every example.
+    """
+    parser = argparse.ArgumentParser(description="Addestra il classificatore di routing locale")
+    parser.add_argument("--log", default=FLOW_SETTINGS.route_log_path)
+    parser.add_argument("--output", default=FLOW_SETTINGS.route_model_path)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=FLOW_SETTINGS.fast_route_threshold)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.log):
+        print(f"❌ Nessun log di routing trovato in {args.log}")
+        return
+    pairs = read_route_log(args.log)
+    print(f"📚 {len(pairs)} esempi: {dict(Counter(label for _, label in pairs))}")
+
+    shuffled = pairs[:]
+    random.Random(0).shuffle(shuffled)
+    cut = len(shuffled) // 5
+    if cut:
+        model = LocalRouteClassifier(k=args.k).fit(shuffled[cut:])
+        covered = correct = 0
+        for query, label in shuffled[:cut]:
+            predicted, confidence = model.predict(query)
+            if predicted is not None and confidence >= args.threshold:
+                covered += 1
+                correct += predicted == label
+        print(
+            f"🧪 Hold-out {cut} esempi: fast path {covered / cut:.0%}, "
+            f"accuratezza sul fast path {correct / covered if covered else 0.0:.0%}"
+        )
+
+    LocalRouteClassifier(k=args.k).fit(pairs).save(args.output)
+    print(f"✅ Modello salvato in {args.output}")
+
+
+if __name__ == "__main__":
+    train()
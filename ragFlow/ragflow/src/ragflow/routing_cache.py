@@ -0,0 +1,117 @@
+"""Persistent routing decision cache keyed by normalized query.
+
+Repeated questions skip the whole classification step: the cache maps the
+normalized question to the routing fields of the flow state (``is_math``,
+``math_type``, ``domain_classification``, ``search_type``) plus the label and
+confidence that produced them. Entries expire after a TTL and the least
+recently used ones are evicted beyond a size bound.
+
+The cache is tied to a fingerprint of the classifier prompts
+(``crews/classifier_crew/config/*.yaml``): when those files change, the
+entries computed with the old prompts are dropped on the next start. It can
+also be cleared by hand with ``python -m ragflow.routing_cache --clear``.
+"""
+
+import argparse
+import hashlib
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ragflow.cache import SqliteStore, normalize_query
+from ragflow.runtime import FLOW_SETTINGS
+
+CLASSIFIER_CONFIG_DIR = Path(__file__).parent / "crews" / "classifier_crew" / "config"
+
+
+def classifier_prompt_fingerprint() -> str:
+    """Return a hash of the classifier agent and task YAML configuration."""
+    digest = hashlib.sha256()
+    for name in ("agents.yaml", "tasks.yaml"):
+        digest.update((CLASSIFIER_CONFIG_DIR / name).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class RoutingCache:
+    """SQLite-backed routing cache with TTL, LRU eviction and hit/miss metrics.
+
+    Args:
+        path (str): SQLite file.
+        max_entries (int): Size bound.
+        ttl_s (float): Time-to-live of a decision in seconds.
+    """
+
+    def __init__(self, path: str, max_entries: int, ttl_s: float):
+        self.store = SqliteStore(path, "routing", max_entries=max_entries, ttl_s=ttl_s)
+        self.meta = SqliteStore(path, "routing_meta")
+        self.hits = 0
+        self.misses = 0
+        self.prompt_fingerprint = classifier_prompt_fingerprint()
+        if self.meta.get("prompt_fingerprint") != self.prompt_fingerprint:
+            # I prompt del classificatore sono cambiati: le vecchie decisioni non valgono più
+            self.invalidate()
+
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        """Return the cached routing decision for ``query`` or None."""
+        decision = self.store.get(normalize_query(query))
+        if decision is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return decision
+
+    def set(self, query: str, decision: Dict[str, Any]) -> None:
+        """Store the routing decision taken for ``query``."""
+        self.store.set(normalize_query(query), decision)
+
+    def invalidate(self) -> None:
+        """Drop every cached decision and record the current prompt fingerprint."""
+        self.store.clear()
+        self.meta.set("prompt_fingerprint", self.prompt_fingerprint)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size, hits, misses and hit rate of this process."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.store),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Istanza globale
+_routing_cache: Optional[RoutingCache] = None
+
+
+def get_routing_cache() -> Optional[RoutingCache]:
+    """Return the process-wide routing cache, or None when disabled."""
+    global _routing_cache  # pylint: disable=global-statement
+    if not FLOW_SETTINGS.routing_cache_enabled:
+        return None
+    if _routing_cache is None:
+        _routing_cache = RoutingCache(
+            os.path.join(FLOW_SETTINGS.state_dir, "routing_cache.sqlite"),
+            max_entries=FLOW_SETTINGS.routing_cache_size,
+            ttl_s=FLOW_SETTINGS.routing_cache_ttl_s,
+        )
+    return _routing_cache
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Inspect or clear the routing cache from the command line."""
+    parser = argparse.ArgumentParser(description="Gestione della cache di routing")
+    parser.add_argument("--clear", action="store_true", help="svuota la cache")
+    args = parser.parse_args(argv)
+    cache = get_routing_cache()
+    if cache is None:
+        print("Cache di routing disabilitata (RAGFLOW_ROUTING_CACHE_ENABLED=0)")
+        return
+    if args.clear:
+        cache.invalidate()
+        print("🧹 Cache di routing svuotata")
+    print(f"Voci: {len(cache.store)} — fingerprint prompt: {cache.prompt_fingerprint}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Runtime settings of the Intelligent Search Flow.
+
+`FlowSettings` groups the flow-level knobs (routing fast path, caches,
+execution modes) the same way `Settings` in ``rag_tool`` groups the RAG
+pipeline parameters. Every field can be overridden with an environment
+variable named ``RAGFLOW_<FIELD_NAME>`` (e.g. ``RAGFLOW_FAST_ROUTE_THRESHOLD=0.9``),
+exported in the shell or written in the ``.env`` file of the working
+directory (or of one of its parents), which is loaded before `FLOW_SETTINGS`
+is built.
+"""
+
+import dataclasses
+import os
+from dataclasses import dataclass
+
+from dotenv import find_dotenv, load_dotenv
+
+
+@dataclass
+class FlowSettings:
+    """Flow-level configuration.
+
+    Attributes:
+        state_dir (str): Directory for local logs, models and caches.
+        fast_route_enabled (bool): Consult the local route classifier before the LLM.
+        fast_route_threshold (float): Minimum local confidence to skip the LLM classifier.
+        routing_cache_enabled (bool): Reuse routing decisions of identical questions.
+        routing_cache_size (int): Maximum cached routing decisions (LRU eviction).
+        routing_cache_ttl_s (float): Time-to-live of a cached routing decision.
+        verbose (bool): Verbose logging of crews and agents.
+        speculative_enabled (bool): Prefetch web results while the LLM classifies.
+        speculative_workers (int): Threads dedicated to speculative prefetches.
+        speculative_wait_s (float): Maximum wait for the winning prefetch before kickoff.
+        math_executor_backend (str): "process" (sandboxed worker pool) or "inline".
+        math_executor_workers (int): Worker processes of the math executor.
+        math_executor_timeout_s (float): Wall clock limit of one math function call.
+        math_executor_memory_mb (int): Address space cap of each math worker (0 disables it).
+        tutorial_parallel (bool): Write the tutorial sections concurrently after planning.
+        tutorial_manager_max_iter (int): Maximum reasoning iterations of the tutorial manager.
+        tutorial_cache_enabled (bool): Reuse tutorials generated for the same or a similar topic.
+        tutorial_cache_size (int): Maximum cached tutorials (LRU eviction).
+        tutorial_cache_max_mb (int): Maximum total size of the cached tutorials.
+        tutorial_cache_similarity (float): Minimum topic similarity of a near-duplicate hit.
+        tutorial_cache_stale_s (float): Age after which a tutorial is served stale and regenerated.
+        tutorial_cache_revalidate (bool): Regenerate stale tutorials in the background.
+        web_search_backend (str): "ddgs" (DuckDuckGo) or "http" (JSON endpoint at ``web_search_url``).
+        web_search_url (str): Search endpoint of the http backend.
+        web_search_pool_size (int): Pooled search sessions/connections.
+        web_search_timeout_s (float): Timeout of one search request.
+        web_cache_size (int): Maximum cached web searches (LRU eviction).
+        web_cache_ttl_s (float): Time-to-live of a cached web search.
+        web_fetch_enabled (bool): Download the top result pages and pass their main text to the agent.
+        web_fetch_top_n (int): Result pages fetched per search.
+        web_fetch_budget_s (float): Overall latency budget of fetching and extracting the pages.
+        web_fetch_timeout_s (float): Hard timeout of one page request.
+        web_fetch_per_host (int): Maximum concurrent requests to the same host.
+        web_fetch_max_kb (int): Size cap of a downloaded page.
+        web_fetch_extract_workers (int): Text extraction processes (0 extracts in a thread).
+        web_fetch_passage_chars (int): Maximum length of the passages kept per page.
+        web_index_enabled (bool): Rank the fetched pages' chunks with an ephemeral vector index.
+        web_index_top_k (int): Passages passed to the web research agent.
+        web_index_chunk_size (int): Chunk size of the fetched pages.
+        web_search_mode (str): "pipeline" (direct search plus one summarization call) or "agent".
+        llm_cache_enabled (bool): Serve identical LLM prompts from the local response cache.
+        llm_cache_bypass (bool): Skip cache lookups while still storing fresh responses.
+        llm_cache_size (int): Maximum cached LLM responses (LRU eviction).
+        llm_cache_max_mb (int): Maximum total size of the cached LLM responses.
+        llm_cache_ttl_s (float): Time-to-live of a cached LLM response.
+        trace_enabled (bool): Account calls, tokens and latency of each question per step.
+        service_host (str): Address the HTTP service binds to.
+        service_port (int): Port of the HTTP service.
+        service_workers (int): Flows the service runs concurrently.
+        service_max_pending (int): Questions admitted at once (running or queued); beyond it the service answers 503.
+        service_timeout_s (float): Maximum time the service waits for one answer.
+        service_warm (bool): Build the crews and the RAG system when the service starts.
+    """
+
+    state_dir: str = ".ragflow"
+    fast_route_enabled: bool = True
+    fast_route_threshold: float = 0.85
+    routing_cache_enabled: bool = True
+    routing_cache_size: int = 5000
+    routing_cache_ttl_s: float = 7 * 24 * 3600.0
+    verbose: bool = True
+    speculative_enabled: bool = False
+    speculative_workers: int = 2
+    speculative_wait_s: float = 10.0
+    math_executor_backend: str = "process"
+    math_executor_workers: int = 2
+    math_executor_timeout_s: float = 2.0
+    math_executor_memory_mb: int = 512
+    tutorial_parallel: bool = True
+    tutorial_manager_max_iter: int = 5
+    tutorial_cache_enabled: bool = True
+    tutorial_cache_size: int = 200
+    tutorial_cache_max_mb: int = 50
+    tutorial_cache_similarity: float = 0.75
+    tutorial_cache_stale_s: float = 30 * 24 * 3600.0
+    tutorial_cache_revalidate: bool = True
+    web_search_backend: str = "ddgs"
+    web_search_url: str = ""
+    web_search_pool_size: int = 2
+    web_search_timeout_s: float = 10.0
+    web_cache_size: int = 256
+    web_cache_ttl_s: float = 900.0
+    web_fetch_enabled: bool = False
+    web_fetch_top_n: int = 3
+    web_fetch_budget_s: float = 4.0
+    web_fetch_timeout_s: float = 3.0
+    web_fetch_per_host: int = 2
+    web_fetch_max_kb: int = 1024
+    web_fetch_extract_workers: int = 2
+    web_fetch_passage_chars: int = 1200
+    web_index_enabled: bool = True
+    web_index_top_k: int = 5
+    web_index_chunk_size: int = 500
+    web_search_mode: str = "pipeline"
+    llm_cache_enabled: bool = True
+    llm_cache_bypass: bool = False
+    llm_cache_size: int = 5000
+    llm_cache_max_mb: int = 200
+    llm_cache_ttl_s: float = 7 * 24 * 3600.0
+    trace_enabled: bool = True
+    service_host: str = "127.0.0.1"
+    service_port: int = 8080
+    service_workers: int = 4
+    service_max_pending: int = 32
+    service_timeout_s: float = 300.0
+    service_warm: bool = True
+
+    @property
+    def route_log_path(self) -> str:
+        """JSONL file collecting (query, final route) pairs decided by the LLM."""
+        return os.path.join(self.state_dir, "route_log.jsonl")
+
+    @property
+    def route_model_path(self) -> str:
+        """JSON file holding the trained local route classifier."""
+        return os.path.join(self.state_dir, "route_model.json")
+
+    @property
+    def web_run_log_path(self) -> str:
+        """JSONL file collecting LLM calls and latency of each web search question."""
+        return os.path.join(self.state_dir, "web_runs.jsonl")
+
+    @property
+    def trace_log_path(self) -> str:
+        """JSONL file collecting the per-question traces."""
+        return os.path.join(self.state_dir, "traces.jsonl")
+
+    @classmethod
+    def from_env(cls) -> "FlowSettings":
+        """Build the settings, applying ``RAGFLOW_*`` environment overrides.
+
+        Returns:
+            FlowSettings: Settings with defaults replaced by the environment.
+        """
+        overrides = {}
+        for field in dataclasses.fields(cls):
+            raw = os.getenv(f"RAGFLOW_{field.name.upper()}")
+            if raw is None:
+                continue
+            if field.type in (bool, "bool"):
+                overrides[field.name] = raw.strip().lower() in ("1", "true", "yes", "on")
+            elif field.type in (int, "int"):
+                overrides[field.name] = int(raw)
+            elif field.type in (float, "float"):
+                overrides[field.name] = float(raw)
+            else:
+                overrides[field.name] = raw
+        return cls(**overrides)
+
+
+# .env prima delle impostazioni: i moduli che importano FLOW_SETTINGS la leggono già configurata
+load_dotenv(find_dotenv(usecwd=True))
+FLOW_SETTINGS = FlowSettings.from_env()
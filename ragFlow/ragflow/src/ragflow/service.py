@@ -0,0 +1,269 @@
+"""Non-interactive HTTP service running the Intelligent Search Flow.
+
+``kickoff`` reads one question from ``input()`` and prints the answer, so a
+process serves a single interactive user. `FlowService` accepts questions
+as JSON over HTTP on an asyncio server and runs each one in a new
+``IntelligentSearchFlow`` on a bounded thread pool:
+
+* ``POST /ask`` with ``{"question": "..."}`` returns the route, the answer,
+  the latency and the run trace (calls, tokens, time per step);
+* ``GET /health`` returns the pool size and the request counters.
+
+Everything expensive is process-wide and shared by the requests: the crew
+pool templates, the RAG system (embedded collection, chain and embeddings),
+the web searcher and page fetcher clients and the caches. With
+``RAGFLOW_SERVICE_WARM`` (default) the crews and the RAG system are built
+when the service starts instead of on the first question of each route.
+
+At most ``service_max_pending`` questions are admitted at once (running or
+waiting for a worker); beyond that the service answers 503 immediately
+instead of queueing without bound. A question that times out keeps its slot
+until its flow actually ends, so slow flows cannot pile up behind the limit.
+The HTTP layer is a small HTTP/1.1 implementation on ``asyncio`` streams
+(JSON bodies, keep-alive), so no web framework is needed.
+
+Usage:
+    serve --port 8080 --workers 4
+    curl -s localhost:8080/ask -d '{"question": "Come si cura il diabete?"}'
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional, Tuple
+
+from ragflow.main import IntelligentSearchFlow
+from ragflow.runtime import FLOW_SETTINGS
+
+MAX_BODY_BYTES = 64 * 1024
+Response = Tuple[int, Dict[str, Any]]
+
+
+class FlowService:
+    """Runs flows for JSON questions with bounded concurrency.
+
+    Args:
+        workers (int): Flows run concurrently.
+        max_pending (int): Questions admitted at once, running or queued.
+        timeout_s (float): Maximum wait for one answer.
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 32, timeout_s: float = 300.0):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout_s = timeout_s
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="flow")
+        self.pending = 0
+        self.served = 0
+        self.rejected = 0
+        self.errors = 0
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def warm(self) -> None:
+        """Build the crew templates and the RAG system ahead of the first questions."""
+        # pylint: disable=import-outside-toplevel
+        from ragflow.crew_pool import get_crew_pool
+        from ragflow.tools.rag_tool import get_rag_system
+
+        started = time.perf_counter()
+        get_crew_pool().warm()
+        get_rag_system()
+        print(f"🔥 Crew e sistema RAG pronti in {time.perf_counter() - started:.1f}s")
+
+    @staticmethod
+    def run_flow(question: str) -> Dict[str, Any]:
+        """Run one question through a new flow and return its structured result."""
+        started = time.perf_counter()
+        flow = IntelligentSearchFlow()
+        flow.kickoff(inputs={"user_query": question})
+        state = flow.state
+        return {
+            "question": state.user_query,
+            "route": state.search_type,
+            "route_source": state.route_source,
+            "route_confidence": state.route_confidence,
+            "answer": state.summary,
+            "result": state.result,
+            "latency_s": round(time.perf_counter() - started, 3),
+            "trace": flow.trace.to_dict() if flow.trace is not None else None,
+        }
+
+    async def ask(self, question: str) -> Response:
+        """Answer ``question`` on the worker pool, or reject it when the service is full."""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                return HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Servizio al completo, riprova più tardi"}
+            self.pending += 1
+        try:
+            future = self.executor.submit(self.run_flow, question)
+        except RuntimeError:
+            self._release()
+            raise
+        # Il posto si libera quando il flow termina davvero, non quando smettiamo di aspettarlo
+        future.add_done_callback(self._release)
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout_s)
+        except asyncio.TimeoutError:
+            # Un flow ancora in coda viene annullato; uno in esecuzione continua nel worker
+            # e occupa il suo posto fino alla fine, ma il risultato viene scartato
+            with self._lock:
+                self.errors += 1
+            return HTTPStatus.GATEWAY_TIMEOUT, {"error": f"Nessuna risposta entro {self.timeout_s:.0f}s"}
+        except Exception as exc:  # pylint: disable=broad-except
+            with self._lock:
+                self.errors += 1
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(exc).__name__}: {exc}"}
+        with self._lock:
+            self.served += 1
+        return HTTPStatus.OK, result
+
+    def _release(self, _future: Any = None) -> None:
+        """Free the admission slot of a question whose flow has finished or was cancelled."""
+        with self._lock:
+            self.pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the pool size and the request counters."""
+        with self._lock:
+            return {
+                "status": "ok",
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "served": self.served,
+                "rejected": self.rejected,
+                "errors": self.errors,
+                "uptime_s": round(time.time() - self.started, 1),
+            }
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> Response:
+        """Route one HTTP request to its handler."""
+        path = path.split("?", 1)[0]
+        if path == "/health":
+            if method != "GET":
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Usa GET"}
+            return HTTPStatus.OK, self.stats()
+        if path == "/ask":
+            if method != "POST":
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Usa POST"}
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                return HTTPStatus.BAD_REQUEST, {"error": "Il corpo deve essere JSON"}
+            question = payload.get("question") if isinstance(payload, dict) else None
+            if not isinstance(question, str) or not question.strip():
+                return HTTPStatus.BAD_REQUEST, {"error": 'Campo "question" mancante o vuoto'}
+            return await self.ask(question.strip())
+        return HTTPStatus.NOT_FOUND, {"error": f"Percorso sconosciuto: {path}"}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve the HTTP/1.1 requests of one connection (keep-alive)."""
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                if body is None:
+                    status, payload = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Corpo troppo grande"}
+                    keep_alive = False
+                else:
+                    status, payload = await self.dispatch(method, path, body)
+                    keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(encode_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int, warm: bool = True) -> None:
+        """Listen on ``host:port`` until cancelled."""
+        if warm:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.warm)
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"🚀 Servizio in ascolto su http://{host}:{port} ({self.workers} worker)")
+        async with server:
+            await server.serve_forever()
+
+    def shutdown(self) -> None:
+        """Stop the worker pool (running flows are completed, queued ones dropped)."""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], Optional[bytes]]]:
+    """Read one request; return None at end of stream.
+
+    Returns:
+        Optional[Tuple]: ``(method, path, headers, body)``; ``body`` is None when
+        the declared length exceeds `MAX_BODY_BYTES`.
+
+    Raises:
+        ValueError: If the request line or headers are malformed.
+    """
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    method, path, _ = line.decode("latin-1").split(" ", 2)
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, value = line.decode("latin-1").split(":", 1)
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", "0"))
+    if length > MAX_BODY_BYTES:
+        return method, path, headers, None
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+
+def encode_response(status: int, payload: Dict[str, Any], keep_alive: bool) -> bytes:
+    """Serialize a JSON response with its status line and headers."""
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    status = HTTPStatus(status)
+    head = [
+        f"HTTP/1.1 {status.value} {status.phrase}",
+        "Content-Type: application/json; charset=utf-8",
+        f"Content-Length: {len(body)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ]
+    if status == HTTPStatus.SERVICE_UNAVAILABLE:
+        head.append("Retry-After: 1")
+    return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Start the HTTP service (settings from ``RAGFLOW_SERVICE_*``, overridable on the command line).
+
+    The ``.env`` file is already loaded by ``ragflow.runtime``, so its values
+    are the defaults of the command-line options.
+    """
+    parser = argparse.ArgumentParser(description="Servizio HTTP dell'Intelligent Search Flow")
+    parser.add_argument("--host", default=FLOW_SETTINGS.service_host)
+    parser.add_argument("--port", type=int, default=FLOW_SETTINGS.service_port)
+    parser.add_argument("--workers", type=int, default=FLOW_SETTINGS.service_workers)
+    parser.add_argument("--max-pending", type=int, default=FLOW_SETTINGS.service_max_pending)
+    parser.add_argument("--no-warm", action="store_true", help="non preparare crew e RAG all'avvio")
+    args = parser.parse_args(argv)
+
+    service = FlowService(args.workers, args.max_pending, FLOW_SETTINGS.service_timeout_s)
+    try:
+        asyncio.run(service.serve(args.host, args.port, warm=FLOW_SETTINGS.service_warm and not args.no_warm))
+    except KeyboardInterrupt:
+        print("\n👋 Servizio arrestato")
+    finally:
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Speculative execution of candidate routes during classification.
+
+While the LLM classifier is deciding the route, the cheap and side-effect-free
+work of the routes that may win is started in background threads: the web
+search of the general route, whose query is the user's question itself (the
+pipeline calls ``run_search`` with it). Once the router has decided, the
+work of the losing routes is cancelled if still queued or simply discarded,
+and the winning route waits for its prefetch before searching, so the search
+becomes a cache hit.
+
+The medical RAG route is not prefetched: RagCrew's agent calls
+``medical_search_tool`` with a query it writes itself, so a retrieval of the
+literal question would almost never be reused and would cost an embedding
+and a Qdrant search per question.
+
+The mode is opt-in (``RAGFLOW_SPECULATIVE_ENABLED=1``).
+"""
+
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict, Iterable, Optional
+
+from ragflow.runtime import FLOW_SETTINGS
+
+
+def _prefetch_web(query: str):
+    from ragflow.tools.custom_tool import prefetch_search  # pylint: disable=import-outside-toplevel
+    return prefetch_search(query)
+
+
+# search_type -> lavoro speculativo della rotta
+PREFETCHERS: Dict[str, Callable[[str], object]] = {
+    "web": _prefetch_web,
+}
+
+
+class Speculation:
+    """Background prefetches started for one question.
+
+    Args:
+        executor (ThreadPoolExecutor): Pool running the prefetches.
+        query (str): The user's question.
+        routes (Iterable[str]): Search types to prefetch (keys of `PREFETCHERS`).
+    """
+
+    def __init__(self, executor: ThreadPoolExecutor, query: str, routes: Iterable[str]):
+        self.query = query
+        self.started = time.perf_counter()
+        self.futures: Dict[str, Future] = {
+            route: executor.submit(PREFETCHERS[route], query) for route in routes
+        }
+        self.winner: Optional[str] = None
+
+    def resolve(self, winner: str) -> None:
+        """Keep the prefetch of ``winner`` and cancel or discard the others."""
+        self.winner = winner
+        for route, future in self.futures.items():
+            if route != winner:
+                # Se è già in esecuzione il risultato viene semplicemente ignorato
+                future.cancel()
+
+    def wait(self, timeout: float) -> bool:
+        """Wait for the winning prefetch to complete.
+
+        Args:
+            timeout (float): Maximum seconds to wait.
+
+        Returns:
+            bool: True if the prefetch finished without errors.
+        """
+        future = self.futures.get(self.winner or "")
+        if future is None:
+            return False
+        try:
+            future.result(timeout=timeout)
+        except FutureTimeout:
+            return False
+        except Exception as exc:  # pylint: disable=broad-except
+            print(f"⚠️ Prefetch speculativo fallito: {exc}")
+            return False
+        return True
+
+
+class Speculator:
+    """Starts and tracks speculative prefetches for the flow.
+
+    Args:
+        max_workers (int): Threads dedicated to speculative work.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculative")
+        self.started = 0
+        self.hits = 0
+        self.discarded = 0
+
+    def start(self, query: str, routes: Iterable[str] = ("web",)) -> Speculation:
+        """Start the prefetches of ``routes`` for ``query``."""
+        self.started += 1
+        return Speculation(self.executor, query, routes)
+
+    def resolve(self, speculation: Speculation, winner: str) -> bool:
+        """Settle ``speculation`` on the route chosen by the router.
+
+        Returns:
+            bool: True if ``winner`` has a prefetch worth waiting for.
+        """
+        speculation.resolve(winner)
+        self.discarded += len([r for r in speculation.futures if r != winner])
+        return winner in speculation.futures
+
+    def finish(self, speculation: Speculation, timeout: float) -> bool:
+        """Wait for the winning prefetch and update the hit counter."""
+        ready = speculation.wait(timeout)
+        if ready:
+            self.hits += 1
+        return ready
+
+
+# Istanza globale
+_speculator: Optional[Speculator] = None
+
+
+def get_speculator() -> Optional[Speculator]:
+    """Return the process-wide speculator, or None when the mode is disabled."""
+    global _speculator  # pylint: disable=global-statement
+    if not FLOW_SETTINGS.speculative_enabled:
+        return None
+    if _speculator is None:
+        _speculator = Speculator(FLOW_SETTINGS.speculative_workers)
+    return _speculator
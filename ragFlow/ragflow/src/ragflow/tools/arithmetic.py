@@ -0,0 +1,255 @@
+"""Deterministic evaluation of plain arithmetic questions.
+
+Questions such as "Calcola 5+5" or "Quanto fa la radice quadrata di 2 per 3?"
+do not need an agent loop: the expression is extracted from the text,
+parsed with ``ast`` and evaluated node by node against the same whitelist of
+names used by ``execute_math_function`` (`ALLOWED_MATH_FUNCTIONS`). Anything
+outside the grammar (unknown words, variables, equations, attribute access)
+makes `try_evaluate` return None and the flow moves on to the equation
+solver and then to the MathCrew.
+"""
+
+import ast
+import math
+import operator
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+# Nomi consentiti: la stessa whitelist del tool execute_math_function
+from ragflow.tools.math_executor import MATH_NAMESPACE, Number
+
+_BIN_OPS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+_UNARY_OPS: Dict[type, Callable[[Any], Any]] = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+# Limiti contro espressioni costose (es. 9**9**9 o factorial(10**6))
+MAX_EXPRESSION_LENGTH = 200
+MAX_EXPONENT = 1000
+MAX_FACTORIAL = 1000
+
+# Frasi introduttive rimosse prima del parsing
+_LEAD_IN = re.compile(
+    r"^(?:(?:per favore|per piacere|mi|puoi|potresti|sai)\s+)*"
+    r"(?:calcola(?:re|mi)?|risolvi|valuta(?:re)?|dimmi|compute|calculate|evaluate|"
+    r"quanto\s+(?:fa|vale|è|e')|qual\s*(?:è|e')\s+il\s+risultato\s+di|what\s+is)\s*:?\s*",
+    re.IGNORECASE,
+)
+
+# Operatori scritti a parole → simboli (prima quelli di più parole: "diviso per" prima di "per")
+_WORD_OPERATORS = [
+    (r"^divisione\s+(?:tra\s+|di\s+)?", ""),
+    (r"\bdiviso(?:\s+per)?\b|\bdivided\s+by\b", "/"),
+    (r"\bradice\s+quadrata\s+di\s+(\d+(?:\.\d+)?)", r"sqrt(\1)"),
+    (r"\bradice\s+cubica\s+di\s+(\d+(?:\.\d+)?)", r"(\1)**(1/3)"),
+    (r"\bfattoriale\s+di\s+(\d+)", r"factorial(\1)"),
+    (r"\b(\d+(?:\.\d+)?)\s+al\s+quadrato\b", r"(\1)**2"),
+    (r"\b(\d+(?:\.\d+)?)\s+al\s+cubo\b", r"(\1)**3"),
+    (r"\belevato\s+(?:alla|a)\b", "**"),
+    (r"\bpiù\b|\bpiu\b|\bplus\b", "+"),
+    (r"\bmeno\b|\bminus\b", "-"),
+    (r"\bper\b|\btimes\b", "*"),
+    (r"\bmodulo\b|\bmod\b", "%"),
+    (r"\bpi\s*greco\b|π", "pi"),
+]
+
+# "1.000" è 1000 in italiano (punto separatore delle migliaia), 1.0 in Python: ambiguo
+_THOUSANDS_SEPARATOR = re.compile(r"\d\.\d{3}\b")
+# ":" vale come divisione solo se la domanda lo dice ("15:30" è di solito un orario)
+_EXPLICIT_DIVISION = re.compile(r"\bdivi(?:so|sione|di|dere)\b|\bdivided\b", re.IGNORECASE)
+
+# Articolo iniziale ("il risultato", "l'area"), senza toccare "log(...)"
+_ARTICLE = re.compile(r"^(?:(?:il|la|lo)\b|l')\s*")
+
+ARITHMETIC_STATS: Counter = Counter()
+
+
+@dataclass
+class ArithmeticResult:
+    """Outcome of the deterministic fast path.
+
+    Attributes:
+        expression (str): The normalized Python expression that was evaluated.
+        value (Number): The numeric result.
+        latency_s (float): Time spent extracting and evaluating the expression.
+    """
+    expression: str
+    value: Number
+    latency_s: float = 0.0
+
+    def format(self) -> str:
+        """Return the answer in the same register as the MathCrew."""
+        return f"Il risultato di {self.expression} è {format_number(self.value)}"
+
+
+def format_number(value: Number) -> str:
+    """Format a result without float noise (``0.1+0.2`` → ``0.3``)."""
+    if isinstance(value, float):
+        if value.is_integer() and abs(value) < 1e15:
+            return str(int(value))
+        return f"{value:.12g}"
+    return str(value)
+
+
+def _decimal_commas(text: str) -> str:
+    """Turn decimal commas into points, only outside parentheses.
+
+    Inside a call the comma separates the arguments: ``pow(10,3)`` must not
+    become ``pow(10.3)``.
+    """
+    chars = list(text)
+    depth = 0
+    for index, char in enumerate(chars):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth = max(depth - 1, 0)
+        elif char == "," and depth == 0 and 0 < index < len(chars) - 1 \
+                and chars[index - 1].isdigit() and chars[index + 1].isdigit():
+            chars[index] = "."
+    return "".join(chars)
+
+
+def extract_expression(question: str) -> Optional[str]:
+    """Turn a question into a candidate Python expression.
+
+    Args:
+        question (str): The user's question.
+
+    Returns:
+        Optional[str]: The expression text, or None if nothing numeric is left
+        or the notation is ambiguous (thousands separators, ``15:30``).
+    """
+    text = question.strip().lower()
+    if _THOUSANDS_SEPARATOR.search(text):
+        return None
+    text = _LEAD_IN.sub("", text)
+    text = _ARTICLE.sub("", text)
+    for pattern, replacement in _WORD_OPERATORS:
+        text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
+    text = _decimal_commas(text)
+    text = re.sub(r"(?<=[\d)])\s*[x×·]\s*(?=[\d(])", "*", text)
+    if ":" in text:
+        if not _EXPLICIT_DIVISION.search(question):
+            return None
+        text = text.replace(":", "/")
+    text = text.replace("÷", "/").replace("^", "**").replace("−", "-")
+    text = text.strip().rstrip("?!.=; ").strip()
+    if not text or len(text) > MAX_EXPRESSION_LENGTH or not re.search(r"\d|\bpi\b|\be\b", text):
+        return None
+    if not re.search(r"[-+*/%()]", text):
+        return None  # un numero isolato non è un calcolo
+    return text
+
+
+def _check_power(base: Any, exponent: Any) -> None:
+    if isinstance(exponent, (int, float)) and abs(exponent) > MAX_EXPONENT:
+        raise ValueError("Esponente troppo grande")
+    if isinstance(base, int) and isinstance(exponent, int) and base and exponent > 0:
+        if exponent * math.log10(abs(base) or 1) > 4300:
+            raise ValueError("Risultato troppo grande")
+
+
+def _evaluate(node: ast.AST) -> Number:  # pylint: disable=too-many-return-statements
+    """Evaluate a whitelisted AST node; raise ValueError on anything else."""
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) \
+            and not isinstance(node.value, bool):
+        return node.value
+    if isinstance(node, ast.Name):
+        value = MATH_NAMESPACE.get(node.id)
+        if isinstance(value, (int, float)):
+            return value
+        raise ValueError(f"Nome non consentito: {node.id}")
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        return _UNARY_OPS[type(node.op)](_evaluate(node.operand))
+    if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+        left, right = _evaluate(node.left), _evaluate(node.right)
+        if isinstance(node.op, ast.Pow):
+            _check_power(left, right)
+        return _BIN_OPS[type(node.op)](left, right)
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        func = MATH_NAMESPACE.get(node.func.id)
+        if not callable(func):
+            raise ValueError(f"Funzione non consentita: {node.func.id}")
+        args = [_evaluate(arg) for arg in node.args]
+        if node.func.id == "factorial" and args and args[0] > MAX_FACTORIAL:
+            raise ValueError("Fattoriale troppo grande")
+        if node.func.id == "pow" and len(args) == 2:
+            _check_power(*args)
+        return func(*args)
+    raise ValueError(f"Costrutto non consentito: {type(node).__name__}")
+
+
+def evaluate_expression(expression: str) -> Number:
+    """Safely evaluate an arithmetic expression over the whitelisted names.
+
+    Args:
+        expression (str): A Python arithmetic expression (e.g. ``"sqrt(16) + 2**3"``).
+
+    Returns:
+        Number: The finite numeric result.
+
+    Raises:
+        ValueError: If the expression is not valid arithmetic or the result is
+            not a finite number.
+    """
+    try:
+        tree = ast.parse(expression, mode="eval")
+        value = _evaluate(tree)
+    except (SyntaxError, TypeError, ZeroDivisionError, OverflowError, ArithmeticError) as exc:
+        raise ValueError(f"Espressione non valutabile: {exc}") from exc
+    if not isinstance(value, (int, float, complex)) or isinstance(value, bool):
+        raise ValueError("Il risultato non è numerico.")
+    if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+        raise ValueError("Risultato non valido (NaN o infinito).")
+    return value
+
+
+def try_evaluate(question: str) -> Optional[ArithmeticResult]:
+    """Answer ``question`` locally when it is plain arithmetic.
+
+    Updates `ARITHMETIC_STATS` ("fast" or "miss" plus the cumulative latency of
+    the fast path).
+
+    Args:
+        question (str): The user's question.
+
+    Returns:
+        Optional[ArithmeticResult]: The result, or None when the MathCrew is needed.
+    """
+    started = time.perf_counter()
+    expression = extract_expression(question)
+    result = None
+    if expression is not None:
+        try:
+            result = ArithmeticResult(expression, evaluate_expression(expression))
+        except ValueError:
+            result = None
+    if result is None:
+        ARITHMETIC_STATS["miss"] += 1
+        return None
+    result.latency_s = time.perf_counter() - started
+    ARITHMETIC_STATS["fast"] += 1
+    ARITHMETIC_STATS["fast_latency_us"] += int(result.latency_s * 1e6)
+    return result
+
+
+def arithmetic_fast_path_ratio() -> float:
+    """Fraction of calculation questions answered by the arithmetic fast path in this process."""
+    total = ARITHMETIC_STATS["fast"] + ARITHMETIC_STATS["miss"]
+    return ARITHMETIC_STATS["fast"] / total if total else 0.0
@@ -0,0 +1,127 @@
+"""Local key-value store for chunk payloads.
+
+The semantic search phase of the RAG pipeline only needs point IDs, scores and
+(for MMR) vectors. The chunk texts of the few winning points are hydrated from
+this store instead of being shipped by Qdrant for every candidate.
+
+The store always keeps an in-process dictionary; when a path is configured the
+payloads are also persisted in a SQLite file so that other processes (or a
+restarted one) can share them.
+"""
+
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class ChunkStore:
+    """Key-value store mapping ``(collection, point_id)`` to the chunk payload.
+
+    Args:
+        path (str): Optional SQLite file used as persistent backing store.
+            An empty string keeps the store purely in memory.
+    """
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self._memory: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                " collection TEXT NOT NULL,"
+                " point_id TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " PRIMARY KEY (collection, point_id))"
+            )
+            self._conn.commit()
+
+    def put_many(self, collection: str, items: Iterable[Tuple[Any, Dict[str, Any]]]) -> int:
+        """Store the payloads of many points.
+
+        Args:
+            collection (str): Name of the Qdrant collection the points belong to.
+            items (Iterable[Tuple[Any, Dict[str, Any]]]): ``(point_id, payload)`` pairs.
+
+        Returns:
+            int: Number of stored payloads.
+        """
+        rows = [(pid, dict(payload or {})) for pid, payload in items]
+        with self._lock:
+            for pid, payload in rows:
+                self._memory[(collection, pid)] = payload
+            if self._conn is not None:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO chunks (collection, point_id, payload) VALUES (?, ?, ?)",
+                    [(collection, str(pid), json.dumps(payload, ensure_ascii=False)) for pid, payload in rows],
+                )
+                self._conn.commit()
+        return len(rows)
+
+    def get_many(self, collection: str, ids: Iterable[Any]) -> Dict[Any, Dict[str, Any]]:
+        """Return the payloads known for ``ids``; unknown IDs are omitted.
+
+        Args:
+            collection (str): Name of the Qdrant collection.
+            ids (Iterable[Any]): Point IDs to look up.
+
+        Returns:
+            Dict[Any, Dict[str, Any]]: Mapping ``point_id -> payload``.
+        """
+        found: Dict[Any, Dict[str, Any]] = {}
+        missing: List[Any] = []
+        with self._lock:
+            for pid in ids:
+                payload = self._memory.get((collection, pid))
+                if payload is None:
+                    missing.append(pid)
+                else:
+                    found[pid] = payload
+            if missing and self._conn is not None:
+                by_key = {str(pid): pid for pid in missing}
+                placeholders = ",".join("?" for _ in by_key)
+                cursor = self._conn.execute(
+                    f"SELECT point_id, payload FROM chunks WHERE collection = ? AND point_id IN ({placeholders})",
+                    [collection, *by_key.keys()],
+                )
+                for key, raw in cursor.fetchall():
+                    pid = by_key[key]
+                    payload = json.loads(raw)
+                    self._memory[(collection, pid)] = payload
+                    found[pid] = payload
+        return found
+
+    def clear(self, collection: str) -> None:
+        """Drop every payload stored for ``collection``.
+
+        Args:
+            collection (str): Name of the Qdrant collection to clear.
+        """
+        with self._lock:
+            for key in [k for k in self._memory if k[0] == collection]:
+                del self._memory[key]
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM chunks WHERE collection = ?", (collection,))
+                self._conn.commit()
+
+
+# Istanza globale
+_chunk_store: Optional[ChunkStore] = None
+
+
+def get_chunk_store(path: str = "") -> ChunkStore:
+    """Return the process-wide chunk store, creating it on first use.
+
+    Args:
+        path (str): SQLite path used only when the store is first created.
+
+    Returns:
+        ChunkStore: The shared chunk store.
+    """
+    global _chunk_store  # pylint: disable=global-statement
+    if _chunk_store is None:
+        _chunk_store = ChunkStore(path)
+    return _chunk_store
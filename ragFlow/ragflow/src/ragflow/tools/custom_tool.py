@@ -2,13 +2,42 @@
 
 This module provides custom tool functions for use with CrewAI agents,
 including a web search tool that leverages DuckDuckGo via the ``ddgs`` library.
+Searches go through the process-wide `WebSearcher` (``tools/web_search.py``),
+which reuses pooled sessions, caches results and merges concurrent identical
+searches. With ``RAGFLOW_WEB_FETCH_ENABLED=1`` the top result pages are also
+downloaded (``tools/page_fetcher.py``): by default only their passages most
+relevant to the query, ranked by an ephemeral in-memory index
+(``tools/web_index.py``), are added after the results; with
+``RAGFLOW_WEB_INDEX_ENABLED=0`` each result gets an excerpt of its page instead.
 
 Functions:
     search_web(query: str) -> str: Performs a web search and returns formatted results.
+    prefetch_search(query: str) -> str: Runs the same search ahead of time (speculative mode).
 """
 
 from crewai.tools import tool  # pylint: disable=import-error
-from ddgs import DDGS  # pylint: disable=import-error
+
+from ragflow.runtime import FLOW_SETTINGS
+from ragflow.tools.page_fetcher import get_page_fetcher, select_passages
+from ragflow.tools.web_search import get_web_searcher, region_language
+
+SEARCH_REGION = "it-it"
+
+
+def prefetch_search(query: str) -> str:
+    """Run the web search for ``query`` now so that `search_web` hits the cache.
+
+    A prefetch still in flight when the crew calls `search_web` is shared
+    rather than repeated.
+
+    Args:
+        query (str): The search query.
+
+    Returns:
+        str: The formatted search results.
+    """
+    return run_search(query)
+
 
 @tool
 def search_web(query: str) -> str:
@@ -36,20 +65,18 @@ def search_web(query: str) -> str:
         TimeoutError: If the search times out.
         ValueError: If the query is invalid or another error occurs.
     """
+    return run_search(query)
+
+
+def run_search(query: str) -> str:
+    """Query DuckDuckGo and format the top 3 results (see `search_web`)."""
     try:
-        with DDGS(verify=False) as ddgs:
-            risultati = list(
-                ddgs.text(
-                    query,
-                    region="it-it",
-                    safesearch="off",
-                    max_results=3,
-                )
-            )
+        risultati = get_web_searcher().search(query, region=SEARCH_REGION, max_results=3)
 
         if not risultati:
             return f"Nessun risultato trovato per la query: {query}"
 
+        estratti, passaggi = fetch_page_context(query, risultati, SEARCH_REGION)
         lines = [f"Risultati della ricerca per '{query}':\n"]
         for index, result in enumerate(risultati, 1):
             titolo = result.get("title", "Senza titolo")
@@ -62,12 +89,54 @@ def search_web(query: str) -> str:
                         f"Titolo: {titolo}",
                         f"URL: {url}",
                         f"Descrizione: {snippet}",
+                        *([f"Estratto della pagina: {estratti[url]}"] if url in estratti else []),
                         "-" * 40,
                         "",
                     ]
                 )
             )
 
+        if passaggi:
+            lines.append("PASSAGGI PIÙ RILEVANTI DALLE PAGINE:\n")
+            lines.extend(f"[{url}] {testo}\n\n" for url, testo in passaggi)
         return "".join(lines)
     except (OSError, TimeoutError, ValueError) as exc:
         return f"Errore durante la ricerca: {exc}"
+
+
+def fetch_page_context(query: str, risultati: list, region: str = SEARCH_REGION) -> tuple:
+    """Fetch the top result pages within the budget and condense them for the agent.
+
+    Args:
+        query (str): The search query, used to pick the relevant passages.
+        risultati (list): The search results.
+        region (str): Region of the search, whose language tags the indexed passages.
+
+    Returns:
+        tuple: ``({url: excerpt}, [(url, passage), ...])``. The ranked passages
+        of the web index are preferred; the per-page excerpts are used when the
+        index is disabled or fails. Both are empty when fetching is disabled.
+    """
+    fetcher = get_page_fetcher()
+    if fetcher is None:
+        return {}, []
+    urls = [r.get("href") or r.get("url") for r in risultati[: FLOW_SETTINGS.web_fetch_top_n]]
+    pages = fetcher.fetch([url for url in urls if url])
+    if pages and FLOW_SETTINGS.web_index_enabled:
+        try:
+            from ragflow.tools.web_index import rank_web_passages  # pylint: disable=import-outside-toplevel
+
+            points = rank_web_passages(query, pages, lang=region_language(region))
+            passaggi = [(p.payload["source"], p.payload["text"]) for p in points]
+            totale = sum(len(page.text) for page in pages)
+            print(
+                f"📉 Contesto web: {sum(len(t) for _, t in passaggi)} caratteri "
+                f"di passaggi invece di {totale} delle pagine intere"
+            )
+            return {}, passaggi
+        except Exception as exc:  # pylint: disable=broad-except
+            print(f"⚠️ Indice web non disponibile, uso gli estratti delle pagine: {exc}")
+    return {
+        page.url: select_passages(page.text, query, FLOW_SETTINGS.web_fetch_passage_chars)
+        for page in pages
+    }, []
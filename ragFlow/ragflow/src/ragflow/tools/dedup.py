@@ -0,0 +1,207 @@
+"""Near-duplicate chunk elimination for the ingest pipeline.
+
+Chunks are shingled into word n-grams, summarized with MinHash signatures and
+bucketed with LSH banding. Candidate pairs sharing a bucket are verified with
+the exact Jaccard similarity of their shingle sets; pairs above the threshold
+are merged with union-find. Each cluster keeps its first chunk, whose metadata
+records the provenance of every merged copy under ``merged_sources``.
+"""
+
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Set, Tuple
+
+import numpy as np
+
+# Primo di Mersenne 2^31 - 1: a * x resta entro 64 bit con hash a 32 bit
+_PRIME = np.uint64((1 << 31) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+@dataclass
+class DedupReport:
+    """Outcome of one deduplication pass.
+
+    Attributes:
+        input_chunks (int): Chunks received from the splitter.
+        kept_chunks (int): Chunks passed on to embedding and upsert.
+        dropped_chunks (int): Near-duplicates merged into a kept chunk.
+        clusters (int): Kept chunks that absorbed at least one duplicate.
+        embeddings_saved (int): Texts that no longer need an embedding call.
+    """
+    input_chunks: int = 0
+    kept_chunks: int = 0
+    dropped_chunks: int = 0
+    clusters: int = 0
+    embeddings_saved: int = 0
+    cluster_sizes: List[int] = field(default_factory=list)
+
+    @property
+    def dedup_ratio(self) -> float:
+        """Fraction of input chunks removed as near-duplicates."""
+        return self.dropped_chunks / self.input_chunks if self.input_chunks else 0.0
+
+    def summary(self) -> str:
+        """Return a one-line human readable summary."""
+        return (
+            f"Deduplica: {self.input_chunks} chunk → {self.kept_chunks} "
+            f"({self.dropped_chunks} duplicati in {self.clusters} cluster, "
+            f"ratio {self.dedup_ratio:.1%}, embedding risparmiati: {self.embeddings_saved})"
+        )
+
+
+def shingles(text: str, size: int) -> Set[int]:
+    """Return the hashed word ``size``-grams of ``text``.
+
+    Args:
+        text (str): Chunk text.
+        size (int): Number of words per shingle.
+
+    Returns:
+        Set[int]: 32-bit CRC hashes of the normalized shingles.
+    """
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {
+        zlib.crc32(" ".join(words[i:i + size]).encode("utf-8"))
+        for i in range(len(words) - size + 1)
+    }
+
+
+def lsh_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """Pick ``(bands, rows)`` whose LSH S-curve midpoint is closest to ``threshold``.
+
+    Only divisors of ``num_perm`` are considered; ties favour more bands, which
+    trades a few extra candidate checks for better recall.
+    """
+    best = (num_perm, 1)
+    best_err = float("inf")
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        err = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if err < best_err:
+            best, best_err = (bands, rows), err
+    return best
+
+
+class MinHasher:
+    """Computes MinHash signatures with ``num_perm`` universal hash functions.
+
+    Args:
+        num_perm (int): Signature length.
+        seed (int): Seed of the hash function coefficients.
+    """
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashed_shingles: Set[int]) -> np.ndarray:
+        """Return the MinHash signature of a shingle set."""
+        if not hashed_shingles:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        x = np.fromiter(hashed_shingles, dtype=np.uint64, count=len(hashed_shingles))
+        values = (np.outer(x, self.a) + self.b) % _PRIME
+        return values.min(axis=0)
+
+
+def _find(parent: List[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def near_duplicate_clusters(
+    texts: Sequence[str], threshold: float, num_perm: int = 128, shingle_size: int = 3, seed: int = 1
+) -> List[List[int]]:
+    """Group the indices of ``texts`` into near-duplicate clusters.
+
+    Args:
+        texts (Sequence[str]): Chunk texts.
+        threshold (float): Minimum Jaccard similarity of two duplicates.
+        num_perm (int): MinHash signature length.
+        shingle_size (int): Words per shingle.
+        seed (int): Seed of the MinHash functions.
+
+    Returns:
+        List[List[int]]: Clusters in input order; each cluster is sorted and its
+        first index is the representative.
+    """
+    sets = [shingles(t, shingle_size) for t in texts]
+    hasher = MinHasher(num_perm, seed)
+    bands, rows = lsh_bands(num_perm, threshold)
+    buckets: Dict[Tuple[int, bytes], List[int]] = {}
+    for idx, shingle_set in enumerate(sets):
+        if not shingle_set:
+            continue
+        sig = hasher.signature(shingle_set)
+        for band in range(bands):
+            key = (band, sig[band * rows:(band + 1) * rows].tobytes())
+            buckets.setdefault(key, []).append(idx)
+
+    parent = list(range(len(texts)))
+    checked: Set[Tuple[int, int]] = set()
+    for members in buckets.values():
+        for pos, i in enumerate(members):
+            for j in members[pos + 1:]:
+                if (i, j) in checked:
+                    continue
+                checked.add((i, j))
+                union = len(sets[i] | sets[j])
+                if union and len(sets[i] & sets[j]) / union >= threshold:
+                    ri, rj = _find(parent, i), _find(parent, j)
+                    if ri != rj:
+                        parent[max(ri, rj)] = min(ri, rj)
+
+    clusters: Dict[int, List[int]] = {}
+    for idx in range(len(texts)):
+        clusters.setdefault(_find(parent, idx), []).append(idx)
+    return sorted(clusters.values(), key=lambda c: c[0])
+
+
+def _provenance(doc: Any) -> Dict[str, Any]:
+    meta = doc.metadata or {}
+    return {key: meta.get(key) for key in ("id", "source", "title", "malattia") if meta.get(key) is not None}
+
+
+def deduplicate_chunks(chunks: List[Any], settings: Any) -> Tuple[List[Any], DedupReport]:
+    """Drop near-duplicate chunks, keeping provenance on the survivors.
+
+    Args:
+        chunks (List[Any]): LangChain ``Document`` chunks from ``split_documents``.
+        settings: RAG ``Settings`` providing the dedup_* parameters.
+
+    Returns:
+        Tuple[List[Any], DedupReport]: Kept chunks in input order and the report.
+    """
+    report = DedupReport(input_chunks=len(chunks))
+    if not settings.dedup_enabled or len(chunks) < 2:
+        report.kept_chunks = len(chunks)
+        return list(chunks), report
+
+    clusters = near_duplicate_clusters(
+        [c.page_content for c in chunks],
+        threshold=settings.dedup_threshold,
+        num_perm=settings.dedup_num_perm,
+        shingle_size=settings.dedup_shingle_size,
+    )
+    kept: List[Any] = []
+    for cluster in clusters:
+        head = chunks[cluster[0]]
+        if len(cluster) > 1:
+            head.metadata["merged_sources"] = [_provenance(chunks[i]) for i in cluster[1:]]
+            report.clusters += 1
+            report.cluster_sizes.append(len(cluster))
+        kept.append(head)
+
+    report.kept_chunks = len(kept)
+    report.dropped_chunks = len(chunks) - len(kept)
+    report.embeddings_saved = report.dropped_chunks
+    return kept, report
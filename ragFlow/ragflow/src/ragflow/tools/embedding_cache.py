@@ -0,0 +1,106 @@
+"""Cached embedding layer shared by the RAG and web retrieval paths.
+
+`CachedEmbeddings` wraps a LangChain embeddings object and exposes the same
+``embed_query``/``embed_documents`` methods. Vectors are keyed by a hash of
+the model name and the exact text, kept in an in-process LRU cache and,
+when a path is configured, in the local SQLite store (as base64 float32, so
+a restarted process does not pay the API again for the same chunks). Only
+the texts missing from the cache are sent to the model, in one batch.
+"""
+
+import base64
+import hashlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ragflow.cache import SqliteStore, TTLCache
+from ragflow.tracing import record, trace_call
+
+
+def _encode(vector: List[float]) -> str:
+    return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+
+
+def _decode(raw: str) -> List[float]:
+    return np.frombuffer(base64.b64decode(raw), dtype=np.float32).astype(float).tolist()
+
+
+class CachedEmbeddings:
+    """Embeddings with an in-process and optional persistent vector cache.
+
+    Args:
+        embeddings: The wrapped LangChain embeddings (e.g. ``AzureOpenAIEmbeddings``).
+        model (str): Model name, part of the cache key.
+        memory_size (int): Vectors kept in process (LRU eviction).
+        path (str): Optional SQLite file persisting the vectors.
+        max_entries (int): Maximum persisted vectors (0 means unbounded).
+    """
+
+    def __init__(self, embeddings: Any, model: str, memory_size: int = 4096, path: str = "", max_entries: int = 0):
+        self.embeddings = embeddings
+        self.model = model
+        self.memory = TTLCache(max_size=memory_size, ttl_s=0)
+        self.store: Optional[SqliteStore] = None
+        if path:
+            self.store = SqliteStore(path, "embeddings", max_entries=max_entries)
+        self.computed = 0
+
+    def _key(self, kind: str, text: str) -> str:
+        raw = f"{self.model}\0{kind}\0{text}".encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()[:32]
+
+    def _lookup(self, key: str) -> Optional[List[float]]:
+        vector = self.memory.get(key)
+        if vector is None and self.store is not None:
+            raw = self.store.get(key)
+            if raw is not None:
+                vector = _decode(raw)
+                self.memory.set(key, vector)
+        return vector
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        self.memory.set(key, vector)
+        if self.store is not None:
+            self.store.set(key, _encode(vector))
+
+    def embed_query(self, text: str) -> List[float]:
+        """Return the query embedding of ``text``."""
+        key = self._key("query", text)
+        vector = self._lookup(key)
+        if vector is None:
+            with trace_call("embedding"):
+                vector = self.embeddings.embed_query(text)
+            record(embedded_texts=1)
+            self.computed += 1
+            self._remember(key, vector)
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Return the document embeddings of ``texts``, computing only the missing ones."""
+        keys = [self._key("document", text) for text in texts]
+        vectors: Dict[str, List[float]] = {}
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key in vectors or key in missing:
+                continue
+            vector = self._lookup(key)
+            if vector is None:
+                missing[key] = text
+            else:
+                vectors[key] = vector
+        if missing:
+            with trace_call("embedding"):
+                computed = self.embeddings.embed_documents(list(missing.values()))
+            record(embedded_texts=len(computed))
+            self.computed += len(computed)
+            for key, vector in zip(missing, computed):
+                self._remember(key, vector)
+                vectors[key] = vector
+        return [vectors[key] for key in keys]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return in-process cache statistics and the number of vectors computed by the model."""
+        stats = self.memory.stats()
+        stats["computed"] = self.computed
+        return stats
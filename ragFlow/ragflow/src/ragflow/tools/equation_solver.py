@@ -0,0 +1,251 @@
+"""Local symbolic solver for equations and small systems.
+
+Questions such as "Risolvi x² + 2x - 3 = 0" or "Risolvi 2x + y = 5; x - y = 1"
+are solved exactly with SymPy instead of asking the LLM to hand-write a
+Python function: polynomial and linear equations, linear and small nonlinear
+systems and simple transcendental equations over the reals. The same engine
+backs the ``Equation solver`` CrewAI tool (``math_tool.solve_equations``),
+used by the MathCrew for the questions the flow cannot parse on its own.
+
+SymPy runs in the sandboxed worker pool of ``math_executor``: a solve that
+exceeds `SOLVER_TIMEOUT_S` (e.g. ``x^x = 5``) is killed with its worker, so
+it neither blocks the following solves nor keeps the process from exiting.
+This module has no CrewAI dependency so that the workers can import it.
+
+The input text is checked against a character and name whitelist before it
+reaches ``sympy.parse_expr`` (which evaluates Python code): only numbers,
+operators, single-letter variables and the functions of `SOLVER_FUNCTIONS`
+are accepted.
+"""
+
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import sympy
+from sympy.parsing.sympy_parser import (
+    convert_xor,
+    implicit_multiplication_application,
+    parse_expr,
+    rationalize,
+    standard_transformations,
+)
+
+from ragflow.tools.math_executor import ExecutionTimeout, get_math_executor
+
+SOLVER_FUNCTIONS: Dict[str, object] = {
+    "sin": sympy.sin, "cos": sympy.cos, "tan": sympy.tan,
+    "asin": sympy.asin, "acos": sympy.acos, "atan": sympy.atan,
+    "sinh": sympy.sinh, "cosh": sympy.cosh, "tanh": sympy.tanh,
+    "exp": sympy.exp, "log": sympy.log, "ln": sympy.log, "sqrt": sympy.sqrt,
+    "abs": sympy.Abs, "pi": sympy.pi, "e": sympy.E,
+}
+
+SOLVER_TIMEOUT_S = 2.0
+MAX_EQUATION_LENGTH = 300
+
+_TRANSFORMATIONS = standard_transformations + (
+    implicit_multiplication_application, convert_xor, rationalize,
+)
+# Punti di partenza della ricerca numerica per le equazioni senza forma chiusa
+_NSOLVE_GUESSES = (-10.0, -2.0, -0.5, 0.5, 1.0, 2.0, 10.0)
+_ALLOWED_CHARS = re.compile(r"^[0-9a-z+\-*/^().,=;\s]+$")
+_IDENTIFIER = re.compile(r"[a-z]+")
+_SUPERSCRIPTS = str.maketrans({"²": "^2", "³": "^3", "⁴": "^4", "−": "-", "×": "*", "·": "*", "÷": "/"})
+_LEAD_IN = re.compile(
+    r"^.*?\b(?:risolvi|risolvere|solve|trova\s+\w+\s+tale\s+che|calcola\s+le\s+soluzioni\s+di)\b"
+    r"(?:\s+(?:l'|la|le|il|sistema|equazione|equazioni|disequazione))*\s*:?\s*",
+    re.IGNORECASE,
+)
+
+SOLVER_STATS: Counter = Counter()
+
+
+@dataclass
+class SolverResult:
+    """Solutions found by the symbolic engine.
+
+    Attributes:
+        equations (List[str]): The equations as understood by the solver.
+        symbols (List[str]): The unknowns, in solving order.
+        solutions (List[Dict[str, str]]): Exact solutions, one mapping per solution.
+        approximations (List[Dict[str, str]]): Numeric values of the same solutions.
+        general (str): Description of an infinite solution set (periodic equations).
+        latency_s (float): Time spent parsing and solving.
+    """
+    equations: List[str]
+    symbols: List[str]
+    solutions: List[Dict[str, str]] = field(default_factory=list)
+    approximations: List[Dict[str, str]] = field(default_factory=list)
+    general: str = ""
+    latency_s: float = 0.0
+
+    def format(self) -> str:
+        """Return a human readable answer."""
+        header = f"Soluzioni di {'; '.join(self.equations)}"
+        if self.general:
+            return f"{header}: {self.general}"
+        if not self.solutions:
+            return f"{header}: nessuna soluzione reale"
+        lines = []
+        for exact, approx in zip(self.solutions, self.approximations):
+            parts = []
+            for name in self.symbols:
+                if name not in exact:
+                    continue
+                text = f"{name} = {exact[name]}"
+                if approx.get(name) and approx[name] != exact[name]:
+                    text += f" (≈ {approx[name]})"
+                parts.append(text)
+            lines.append(", ".join(parts))
+        return f"{header}:\n" + "\n".join(f"- {line}" for line in lines)
+
+
+def normalize_equations(text: str) -> Optional[List[str]]:
+    """Extract the equations from a question and check them against the whitelist.
+
+    Args:
+        text (str): The question or the raw equations.
+
+    Returns:
+        Optional[List[str]]: One string per equation, or None if the text
+        contains anything outside the accepted grammar.
+    """
+    text = text.strip().lower().translate(_SUPERSCRIPTS)
+    text = _LEAD_IN.sub("", text).strip().rstrip("?!. ")
+    text = re.sub(r"(?<=\d),(?=\d)", ".", text)
+    parts = [p.strip() for p in re.split(r";|\n|\s+e\s+|,\s*(?=[^,]*=)", text) if p.strip()]
+    if not parts or len(text) > MAX_EQUATION_LENGTH:
+        return None
+    for part in parts:
+        if part.count("=") != 1 or not _ALLOWED_CHARS.match(part) or "__" in part:
+            return None
+        for name in _IDENTIFIER.findall(part):
+            # Solo variabili di una lettera o funzioni note (niente codice arbitrario)
+            if len(name) > 1 and name not in SOLVER_FUNCTIONS:
+                return None
+    return parts
+
+
+def _parse(part: str, local_dict: Dict[str, object]) -> sympy.Expr:
+    left, right = part.split("=")
+    return sympy.Eq(
+        parse_expr(left, local_dict=local_dict, transformations=_TRANSFORMATIONS),
+        parse_expr(right, local_dict=local_dict, transformations=_TRANSFORMATIONS),
+        evaluate=False,
+    )
+
+
+def _approx(value: sympy.Expr) -> str:
+    try:
+        number = complex(sympy.N(value, 12))
+    except (TypeError, ValueError):
+        return ""
+    if abs(number.imag) > 1e-12:
+        return f"{number.real:.6g}{number.imag:+.6g}i"
+    return f"{number.real:.6g}"
+
+
+def _describe_set(name: str, solution_set: sympy.Set) -> str:
+    """Describe periodic solution sets as ``x = pi/6 + 2*pi*k`` (k intero)."""
+    branches = solution_set.args if isinstance(solution_set, sympy.Union) else (solution_set,)
+    k = sympy.Symbol("k", integer=True)
+    described = []
+    for branch in branches:
+        if isinstance(branch, sympy.ImageSet) and branch.base_set == sympy.S.Integers:
+            variable = branch.lamda.variables[0]
+            described.append(f"{name} = {branch.lamda.expr.subs(variable, k)}")
+        else:
+            described.append(f"{name} ∈ {branch}")
+    suffix = " (k intero)" if any(isinstance(b, sympy.ImageSet) for b in branches) else ""
+    return "; ".join(described) + suffix
+
+
+def _numeric_roots(result: SolverResult, equation: sympy.Eq, symbol: sympy.Symbol) -> Optional[SolverResult]:
+    """Fill ``result`` with the real roots found by ``nsolve`` from a few starting points."""
+    expression = equation.lhs - equation.rhs
+    roots = []
+    for guess in _NSOLVE_GUESSES:
+        try:
+            root = float(sympy.nsolve(expression, symbol, guess))
+        except (ValueError, TypeError, ZeroDivisionError):
+            continue
+        if all(abs(root - other) > 1e-9 for other in roots):
+            roots.append(root)
+    if not roots:
+        return None
+    for root in sorted(roots):
+        result.solutions.append({symbol.name: f"{root:.10g}"})
+        result.approximations.append({symbol.name: ""})
+    return result
+
+
+def _solve(parts: List[str]) -> Optional[SolverResult]:
+    local_dict = dict(SOLVER_FUNCTIONS)
+    names = sorted({n for p in parts for n in _IDENTIFIER.findall(p) if n not in SOLVER_FUNCTIONS})
+    symbols = [sympy.Symbol(n, real=True) for n in names]
+    local_dict.update(zip(names, symbols))
+    if not symbols or len(symbols) > len(parts) + 1:
+        return None
+
+    equations = [_parse(p, local_dict) for p in parts]
+    result = SolverResult(equations=[f"{eq.lhs} = {eq.rhs}" for eq in equations], symbols=names)
+
+    if len(equations) == 1 and len(symbols) == 1:
+        solution_set = sympy.solveset(equations[0], symbols[0], domain=sympy.S.Reals)
+        if isinstance(solution_set, sympy.ConditionSet):
+            return _numeric_roots(result, equations[0], symbols[0])
+        if isinstance(solution_set, sympy.FiniteSet):
+            for value in sorted(solution_set, key=sympy.default_sort_key):
+                result.solutions.append({names[0]: str(value)})
+                result.approximations.append({names[0]: _approx(value)})
+        elif solution_set != sympy.S.EmptySet:
+            result.general = _describe_set(names[0], solution_set)
+        return result
+
+    for solution in sympy.solve(equations, symbols, dict=True):
+        result.solutions.append({str(k): str(v) for k, v in solution.items()})
+        result.approximations.append({str(k): _approx(v) for k, v in solution.items()})
+    return result
+
+
+def solve_text(text: str, timeout_s: float = SOLVER_TIMEOUT_S) -> Optional[SolverResult]:
+    """Solve the equations contained in ``text``.
+
+    Args:
+        text (str): A question ("Risolvi x^2 - 4 = 0") or the bare equations,
+            separated by ";" or newlines for systems.
+        timeout_s (float): Maximum seconds granted to SymPy.
+
+    Returns:
+        Optional[SolverResult]: The solutions, or None when the text is not a
+        supported equation or SymPy does not answer in time.
+    """
+    started = time.perf_counter()
+    parts = normalize_equations(text)
+    if parts is None:
+        SOLVER_STATS["miss"] += 1
+        return None
+    try:
+        # Nel pool di math_executor: allo scadere del timeout il worker viene ucciso e sostituito
+        result = get_math_executor().call(_solve, parts, timeout_s=timeout_s)
+    except ExecutionTimeout:
+        SOLVER_STATS["timeout"] += 1
+        return None
+    except Exception:  # pylint: disable=broad-except
+        # SymPy solleva anche PolynomialError, NotImplementedError, SympifyError, ...
+        result = None
+    if result is None:
+        SOLVER_STATS["miss"] += 1
+        return None
+    result.latency_s = time.perf_counter() - started
+    SOLVER_STATS["solved"] += 1
+    return result
+
+
+def solver_summary() -> Tuple[int, int]:
+    """Return (solved, attempted) counts of this process."""
+    attempted = SOLVER_STATS["solved"] + SOLVER_STATS["miss"] + SOLVER_STATS["timeout"]
+    return SOLVER_STATS["solved"], attempted
@@ -0,0 +1,290 @@
+"""Vectorized batch evaluation of a math function over ranges of values.
+
+Questions such as "tabula f(x) per x da 0 a 10" or "trova il massimo di f in
+[a, b]" used to make the agent call ``execute_math_function`` once per point.
+`evaluate_batch` receives a function of one or more variables plus their
+ranges, evaluates it on the whole grid with NumPy and returns a compact
+summary: a downsampled table, minimum and maximum with their coordinates and,
+for one variable, the roots located by sign change.
+
+The function goes through the same validation as ``execute_math_function``
+(``validate_function_code``); whitelisted math names are mapped to their
+NumPy ufuncs. Functions that cannot be vectorized (e.g. ``if x > 0`` on an
+array, or ``sum``, which has no element-wise equivalent) are evaluated point
+by point with the scalar namespace instead.
+Points where the result is NaN or infinite are excluded from the summary and
+counted; a batch with no finite value is rejected.
+
+Ranges syntax: ``"x=0:10:101"`` (start:stop:number of points, linspace),
+``"n=1,2,3,5,8"`` (explicit values); several variables are separated by ";"
+and combined as a grid.
+"""
+
+import ast
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from ragflow.tools.math_executor import (
+    ALLOWED_NAME_PREFIXES,
+    SCALAR_NAMESPACE,
+    load_function,
+)
+
+MAX_POINTS = 200_000
+DEFAULT_NUM = 101
+TABLE_ROWS = 11
+
+
+def _pairwise(ufunc: Callable[..., Any]) -> Callable[..., Any]:
+    """Element-wise ``min``/``max`` of two values; other arities are not vectorizable."""
+    def apply(*args):
+        if len(args) != 2:
+            raise TypeError(f"{ufunc.__name__} vettoriale richiede due argomenti")
+        return ufunc(*args)
+    return apply
+
+
+# Equivalenti vettoriali dei nomi consentiti
+VECTOR_NAMESPACE: Dict[str, Any] = {
+    "abs": np.abs, "round": np.round, "min": _pairwise(np.minimum), "max": _pairwise(np.maximum),
+    "pow": np.power, "int": np.trunc, "float": np.asarray,
+    "complex": lambda x, y=0: np.asarray(x) + 1j * np.asarray(y),
+    "sin": np.sin, "cos": np.cos, "tan": np.tan,
+    "asin": np.arcsin, "acos": np.arccos, "atan": np.arctan, "atan2": np.arctan2,
+    "sinh": np.sinh, "cosh": np.cosh, "tanh": np.tanh,
+    "sqrt": np.sqrt, "exp": np.exp, "log": np.log, "log10": np.log10, "log2": np.log2,
+    "ceil": np.ceil, "floor": np.floor, "degrees": np.degrees, "radians": np.radians,
+    "factorial": np.vectorize(lambda n: float(math.factorial(int(n))), otypes=[float]),
+    "pi": math.pi, "e": math.e,
+}
+
+# Nomi senza equivalente element-wise: sum(x) sommerebbe tutta la griglia in un solo valore
+SCALAR_ONLY_NAMES = {"sum"}
+
+_RANGE = re.compile(r"^\s*([a-z_]\w*)\s*=\s*(.+?)\s*$", re.IGNORECASE)
+
+
+@dataclass
+class BatchResult:
+    """Summary of a batch evaluation.
+
+    Attributes:
+        variables (List[str]): Variable names, in argument order.
+        points (int): Number of evaluated points.
+        invalid_points (int): Points whose result was NaN or infinite.
+        minimum (Tuple[Dict[str, float], float]): Coordinates and value of the minimum.
+        maximum (Tuple[Dict[str, float], float]): Coordinates and value of the maximum.
+        mean (float): Mean of the finite values.
+        roots (List[float]): Approximate roots (one variable only).
+        table (List[Tuple[List[float], float]]): Downsampled (coordinates, value) rows.
+        vectorized (bool): False when the function had to be evaluated point by point.
+    """
+    variables: List[str]
+    points: int
+    invalid_points: int
+    minimum: Tuple[Dict[str, float], float]
+    maximum: Tuple[Dict[str, float], float]
+    mean: float
+    roots: List[float] = field(default_factory=list)
+    table: List[Tuple[List[float], float]] = field(default_factory=list)
+    vectorized: bool = True
+
+    def format(self) -> str:
+        """Return the compact text summary given back to the agent."""
+        def coords(values: Dict[str, float]) -> str:
+            return ", ".join(f"{k}={_fmt(v)}" for k, v in values.items())
+
+        lines = [f"Valutati {self.points} punti" + (
+            f" ({self.invalid_points} esclusi: NaN o infinito)" if self.invalid_points else ""
+        )]
+        lines.append(f"Minimo: {_fmt(self.minimum[1])} in {coords(self.minimum[0])}")
+        lines.append(f"Massimo: {_fmt(self.maximum[1])} in {coords(self.maximum[0])}")
+        lines.append(f"Media: {_fmt(self.mean)}")
+        if len(self.variables) == 1:
+            roots = ", ".join(_fmt(r) for r in self.roots) if self.roots else "nessuna nell'intervallo"
+            lines.append(f"Zeri (cambio di segno): {roots}")
+        lines.append("Tabella:")
+        header = " | ".join(self.variables + ["f"])
+        lines.append(header)
+        for row, value in self.table:
+            lines.append(" | ".join([_fmt(v) for v in row] + [_fmt(value)]))
+        return "\n".join(lines)
+
+
+def _fmt(value: float) -> str:
+    return f"{value + 0.0:.6g}"  # + 0.0 evita "-0"
+
+
+def parse_ranges(ranges: str) -> Dict[str, np.ndarray]:
+    """Parse the ranges specification (see the module docstring).
+
+    Raises:
+        ValueError: If the syntax is invalid or a range is empty.
+    """
+    parsed: Dict[str, np.ndarray] = {}
+    for part in re.split(r"[;\n]", ranges or ""):
+        if not part.strip():
+            continue
+        match = _RANGE.match(part)
+        if not match:
+            raise ValueError(f"Intervallo non valido: {part.strip()!r} (usa es. 'x=0:10:101')")
+        name, spec = match.groups()
+        try:
+            if ":" in spec:
+                bounds = [float(v) for v in spec.split(":")]
+                if len(bounds) not in (2, 3):
+                    raise ValueError(spec)
+                num = int(bounds[2]) if len(bounds) == 3 else DEFAULT_NUM
+                if num < 1:
+                    raise ValueError(spec)
+                values = np.linspace(bounds[0], bounds[1], num)
+            else:
+                values = np.array([float(v) for v in spec.split(",") if v.strip()])
+        except ValueError as exc:
+            raise ValueError(f"Intervallo non valido per {name}: {spec!r}") from exc
+        if values.size == 0:
+            raise ValueError(f"Intervallo vuoto per {name}.")
+        parsed[name] = values
+    if not parsed:
+        raise ValueError("Nessun intervallo indicato (usa es. 'x=0:10:101').")
+    return parsed
+
+
+def _function_arguments(function_code: str) -> List[str]:
+    function = ast.parse(function_code).body[0]
+    arguments = function.args
+    if arguments.vararg or arguments.kwarg or arguments.kwonlyargs or arguments.defaults:
+        raise ValueError("La funzione deve avere solo argomenti posizionali semplici.")
+    names = [arg.arg for arg in arguments.args]
+    if not names:
+        raise ValueError("La funzione batch deve avere almeno una variabile (es. def f(x): ...).")
+    for name in names:
+        if not name.startswith(ALLOWED_NAME_PREFIXES):
+            raise ValueError(f"Nome di variabile non consentito: {name}")
+    return names
+
+
+def _sign_change_roots(xs: np.ndarray, ys: np.ndarray, valid: np.ndarray) -> List[float]:
+    """Roots of a sampled 1-D function by linear interpolation between sign changes."""
+    roots: List[float] = []
+    exact = xs[valid & (ys == 0)]
+    roots.extend(float(x) for x in exact)
+    both = valid[:-1] & valid[1:]
+    change = both & (np.sign(ys[:-1]) * np.sign(ys[1:]) < 0)
+    for i in np.nonzero(change)[0]:
+        x0, x1, y0, y1 = xs[i], xs[i + 1], ys[i], ys[i + 1]
+        roots.append(float(x0 - y0 * (x1 - x0) / (y1 - y0)))
+    return sorted(roots)
+
+
+def _uses_scalar_only_names(function_code: str) -> bool:
+    return any(
+        isinstance(node, ast.Name) and node.id in SCALAR_ONLY_NAMES
+        for node in ast.walk(ast.parse(function_code))
+    )
+
+
+def _evaluate_grid(function: Callable[..., Any], function_code: str, grids: List[np.ndarray]) -> Tuple[np.ndarray, bool]:
+    """Evaluate ``function`` on the whole grid, or point by point when it is not vectorizable.
+
+    Returns:
+        Tuple[np.ndarray, bool]: The values and whether the vectorized call worked.
+    """
+    if not _uses_scalar_only_names(function_code):
+        try:
+            values = np.asarray(function(*grids))
+            return np.broadcast_to(values, grids[0].shape), True
+        except (TypeError, ValueError):
+            pass
+    # Rami condizionali o funzioni non vettorizzabili: valutazione punto per punto
+    scalar = load_function(function_code, SCALAR_NAMESPACE)
+
+    def safe_scalar(*args):
+        try:
+            return scalar(*args)
+        except (ValueError, ZeroDivisionError, OverflowError):
+            return math.nan
+
+    return np.vectorize(safe_scalar, otypes=[complex])(*grids), False
+
+
+def evaluate_batch(function_code: str, ranges: str) -> BatchResult:
+    """Evaluate a function of one or more variables over a grid of values.
+
+    Args:
+        function_code (str): Python code defining one function whose arguments
+            are the variables (e.g. ``"def f(x):\\n    return x**2 - 2"``).
+        ranges (str): The values of each variable (e.g. ``"x=-3:3:61"``).
+
+    Returns:
+        BatchResult: The compact summary of the evaluation.
+
+    Raises:
+        ValueError: On validation errors, invalid ranges, too many points,
+            non-numeric or complex results, or when no value is finite.
+    """
+    function = load_function(function_code, VECTOR_NAMESPACE)
+    variables = _function_arguments(function_code)
+    grid_values = parse_ranges(ranges)
+    if set(grid_values) != set(variables):
+        raise ValueError(
+            f"Gli intervalli ({', '.join(grid_values)}) non corrispondono agli argomenti "
+            f"della funzione ({', '.join(variables)})."
+        )
+    axes = [grid_values[name] for name in variables]
+    points = int(np.prod([axis.size for axis in axes]))
+    if points > MAX_POINTS:
+        raise ValueError(f"Troppi punti ({points}, max {MAX_POINTS}).")
+    grids = np.meshgrid(*axes, indexing="ij")
+
+    with np.errstate(all="ignore"):
+        try:
+            values, vectorized = _evaluate_grid(function, function_code, grids)
+        except MemoryError as exc:
+            raise ValueError("Memoria esaurita durante l'esecuzione.") from exc
+        except Exception as exc:  # noqa: BLE001  pylint: disable=broad-except
+            raise ValueError(f"Errore durante l'esecuzione: {exc}") from exc
+
+    if values.dtype == bool or not np.issubdtype(values.dtype, np.number):
+        raise ValueError("La funzione deve restituire un valore numerico.")
+    if np.iscomplexobj(values):
+        if np.any(np.abs(values.imag) > 1e-12):
+            raise ValueError("Risultati complessi non supportati in modalità batch.")
+        values = values.real
+    values = values.astype(float)
+
+    valid = np.isfinite(values)
+    if not valid.any():
+        raise ValueError("Risultato non valido (NaN o infinito) in tutti i punti.")
+    flat_values = values.ravel()
+    flat_valid = valid.ravel()
+    finite = np.where(flat_valid, flat_values, np.nan)
+
+    def at(index: int) -> Dict[str, float]:
+        position = np.unravel_index(index, values.shape)
+        return {name: float(axis[i]) for name, axis, i in zip(variables, axes, position)}
+
+    i_min, i_max = int(np.nanargmin(finite)), int(np.nanargmax(finite))
+    rows = np.unique(np.linspace(0, points - 1, min(points, TABLE_ROWS)).round().astype(int))
+    table = [
+        (list(at(int(i)).values()), float(flat_values[i])) for i in rows
+    ]
+    roots: List[float] = []
+    if len(variables) == 1:
+        roots = _sign_change_roots(axes[0], values, valid)
+
+    return BatchResult(
+        variables=variables,
+        points=points,
+        invalid_points=int(points - flat_valid.sum()),
+        minimum=(at(i_min), float(flat_values[i_min])),
+        maximum=(at(i_max), float(flat_values[i_max])),
+        mean=float(np.nanmean(finite)),
+        roots=roots,
+        table=table,
+        vectorized=vectorized,
+    )
@@ -0,0 +1,436 @@
+"""Validation and sandboxed execution of LLM-written math functions.
+
+``execute_math_function`` receives the source of a zero-argument Python
+function (or, for batch evaluation, of a function of some variables, see
+``math_batch``). This module validates it in a single AST pass (one function, no
+imports, whitelisted names and attributes, no dunder strings), caches the
+validation and the compiled code object by source, and runs the function in
+one of two backends:
+
+- ``process``: a pool of pre-warmed worker processes. Each call has a wall
+  clock timeout (the worker is killed and replaced when it expires) and every
+  worker runs under an ``RLIMIT_AS`` memory cap, so ``factorial(10**7)`` or a
+  huge ``pow`` cannot freeze or exhaust the flow process.
+- ``inline``: same validation and code cache, executed in the calling process
+  (no isolation; for platforms without ``multiprocessing`` support).
+
+The same pool runs the SymPy jobs of ``equation_solver`` (`MathExecutor.call`),
+so a solve that exceeds its timeout is killed with its worker instead of
+occupying a thread forever. Workers import `PRELOAD_MODULES` when they start
+and then report "ready"; the pool waits for that message (when it starts and
+when it replaces a worker) before handing the worker a job, so the imports of
+a replaced worker are not charged to the next job's time budget.
+
+This module has no CrewAI dependency so that worker processes start quickly.
+"""
+
+import ast
+import functools
+import importlib
+import math
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+try:
+    import resource
+except ImportError:  # Windows: nessun limite di memoria per processo
+    resource = None
+
+from ragflow.runtime import FLOW_SETTINGS
+
+Number = Union[int, float, complex]
+
+ALLOWED_MATH_FUNCTIONS = {
+    "abs", "round", "min", "max", "sum", "pow", "int", "float", "complex",
+    "sin", "cos", "tan", "asin", "acos", "atan", "atan2",
+    "sinh", "cosh", "tanh", "sqrt", "exp", "log", "log10", "log2",
+    "ceil", "floor", "degrees", "radians", "factorial", "pi", "e"
+}
+
+# Prefissi consentiti per variabili locali e nomi di funzione
+ALLOWED_NAME_PREFIXES = ('x', 'y', 'z', 'a', 'b', 'c', 'n', 't', 'def', 'return')
+
+FORBIDDEN_NAMES = {
+    "exec", "eval", "compile", "open", "input", "print", "globals", "locals",
+    "vars", "getattr", "setattr", "delattr", "breakpoint", "type", "object",
+}
+
+_FORBIDDEN_NODES = (
+    ast.Import, ast.ImportFrom, ast.Global, ast.Nonlocal, ast.ClassDef,
+    ast.AsyncFunctionDef, ast.Await, ast.Yield, ast.YieldFrom, ast.With,
+    ast.AsyncWith, ast.AsyncFor, ast.Try, ast.Raise, ast.Delete,
+)
+
+_BUILTINS: Dict[str, Any] = {
+    "abs": abs, "round": round, "min": min, "max": max, "sum": sum, "pow": pow,
+    "int": int, "float": float, "complex": complex,
+    "range": range, "len": len,  # cicli del tipo `for n in range(...)`
+}
+
+MATH_NAMESPACE: Dict[str, Any] = {
+    name: _BUILTINS[name] if name in _BUILTINS else getattr(math, name)
+    for name in ALLOWED_MATH_FUNCTIONS
+}
+
+# Namespace di esecuzione delle funzioni scalari
+SCALAR_NAMESPACE: Dict[str, Any] = {**MATH_NAMESPACE, **_BUILTINS}
+
+MAX_SOURCE_LENGTH = 2000
+
+# Moduli importati da ogni worker all'avvio (il solver simbolico importa sympy)
+PRELOAD_MODULES: Tuple[str, ...] = ("ragflow.tools.equation_solver",)
+
+# Attesa massima dell'avvio di un worker (import inclusi), fuori dal tempo limite dei job
+WORKER_START_TIMEOUT_S = 30.0
+
+
+class ExecutionTimeout(ValueError):
+    """A job exceeded its wall clock limit (its worker was killed and replaced)."""
+
+
+# Attributi ammessi su qualunque valore (parti di un numero complesso)
+ALLOWED_ATTRIBUTES = {"real", "imag"}
+
+# Attributi di introspezione di generatori, frame, coroutine e traceback: mai ammessi
+_FRAME_ATTRIBUTE_PREFIXES = ("gi_", "f_", "cr_", "tb_", "ag_")
+
+
+def _is_allowed_attribute(node: ast.Attribute) -> bool:
+    """Whitelist of attribute accesses: ``math.<allowed name>``, ``.real`` and ``.imag``."""
+    attr = node.attr
+    if attr.startswith("_") or attr.startswith(_FRAME_ATTRIBUTE_PREFIXES):
+        return False
+    if attr in ALLOWED_ATTRIBUTES:
+        return True
+    return (
+        isinstance(node.value, ast.Name)
+        and node.value.id == "math"
+        and attr in ALLOWED_MATH_FUNCTIONS
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def validate_function_code(function_code: str) -> str:
+    """Validate the source of a single math function in one AST pass.
+
+    Results are cached by source, so repeated submissions of the same code
+    skip parsing entirely.
+
+    Args:
+        function_code (str): Python code defining exactly one function.
+
+    Returns:
+        str: The name of the defined function.
+
+    Raises:
+        ValueError: If the code is empty, too long, not valid Python, does not
+            define exactly one function or uses forbidden constructs or names.
+    """
+    if not isinstance(function_code, str) or len(function_code.strip()) == 0:
+        raise ValueError("Codice vuoto o non valido.")
+    if len(function_code) > MAX_SOURCE_LENGTH:
+        raise ValueError(f"Codice troppo lungo (max {MAX_SOURCE_LENGTH} caratteri).")
+    try:
+        tree = ast.parse(function_code)
+    except SyntaxError as exc:
+        raise ValueError("Sintassi Python non valida.") from exc
+
+    functions = [node for node in tree.body if isinstance(node, ast.FunctionDef)]
+    if len(functions) != 1 or len(tree.body) != 1:
+        raise ValueError("Deve essere definita esattamente una funzione.")
+
+    for node in ast.walk(tree):
+        if isinstance(node, _FORBIDDEN_NODES):
+            raise ValueError("Codice contiene elementi non matematici non consentiti.")
+        if isinstance(node, ast.Attribute) and not _is_allowed_attribute(node):
+            raise ValueError(f"Attributo non consentito in funzioni matematiche: {node.attr}")
+        if isinstance(node, ast.Constant) and isinstance(node.value, str) and "__" in node.value:
+            raise ValueError("Codice contiene elementi non matematici non consentiti.")
+        if isinstance(node, ast.Name):
+            name = node.id
+            if name.startswith("__") or name in FORBIDDEN_NAMES or (
+                name not in ALLOWED_MATH_FUNCTIONS
+                and name not in _BUILTINS
+                and name != "math"
+                and not name.startswith(ALLOWED_NAME_PREFIXES)
+            ):
+                raise ValueError(f"Nome non consentito in funzioni matematiche: {name}")
+    return functions[0].name
+
+
+@functools.lru_cache(maxsize=256)
+def _compiled(function_code: str):
+    """Code object of an already validated source (cached per process)."""
+    return compile(function_code, "<math_function>", "exec")
+
+
+def load_function(function_code: str, namespace: Dict[str, Any]) -> Callable[..., Any]:
+    """Validate the source and return its function, bound to ``namespace`` without builtins."""
+    func_name = validate_function_code(function_code)
+    safe_globals = {"__builtins__": {}, "math": math, **namespace}
+    exec(_compiled(function_code), safe_globals)  # pylint: disable=exec-used
+    return safe_globals[func_name]
+
+
+def run_function(function_code: str) -> Number:
+    """Validate, compile (cached) and call the function in the current process.
+
+    Raises:
+        ValueError: On validation or execution errors, or a non-numeric result.
+    """
+    validate_function_code(function_code)
+    try:
+        result = load_function(function_code, SCALAR_NAMESPACE)()
+    except MemoryError as exc:
+        raise ValueError("Memoria esaurita durante l'esecuzione.") from exc
+    except Exception as exc:  # noqa: BLE001  pylint: disable=broad-except
+        raise ValueError(f"Errore durante l'esecuzione: {exc}") from exc
+    return check_result(result)
+
+
+def check_result(result: Any) -> Number:
+    """Output guardrail: the result must be a finite number.
+
+    Raises:
+        ValueError: If ``result`` is not numeric, NaN or infinite.
+    """
+    if not isinstance(result, (int, float, complex)) or isinstance(result, bool):
+        raise ValueError("La funzione deve restituire un valore numerico.")
+    if isinstance(result, float) and (math.isnan(result) or math.isinf(result)):
+        raise ValueError("Risultato non valido (NaN o infinito).")
+    return result
+
+
+def _worker_main(conn, memory_mb: int, preload: Tuple[str, ...] = ()) -> None:
+    """Loop of a worker process: receive ``(function, args)`` jobs, send back results.
+
+    ``"ready"`` is sent once, after the preload imports, before the first job.
+    """
+    # Un solo thread BLAS per worker: i buffer per thread sforerebbero il limite di memoria
+    os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    for module in preload:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass  # il job che ne ha bisogno riporterà l'errore
+    if resource is not None and memory_mb > 0:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    conn.send("ready")
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        func, args = job
+        try:
+            conn.send(("ok", func(*args)))
+        except MemoryError:
+            conn.send(("error", "Memoria esaurita durante l'esecuzione."))
+        except ValueError as exc:
+            conn.send(("error", str(exc)))
+        except Exception as exc:  # noqa: BLE001  pylint: disable=broad-except
+            # Qualsiasi altro errore torna al chiamante: il worker resta vivo
+            conn.send(("error", f"Errore durante l'esecuzione: {type(exc).__name__}: {exc}"))
+
+
+class _Worker:
+    """A worker process and the parent end of its pipe."""
+
+    def __init__(self, context, memory_mb: int, preload: Tuple[str, ...] = ()):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, memory_mb, preload), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def wait_ready(self, timeout_s: float) -> bool:
+        """Wait for the "ready" message sent once the preload modules are imported."""
+        if not self.ready:
+            try:
+                if self.conn.poll(timeout_s):
+                    self.ready = self.conn.recv() == "ready"
+            except (EOFError, OSError):
+                pass  # morto durante l'avvio: il primo job lo tratterà come un crash
+        return self.ready
+
+    def kill(self) -> None:
+        """Terminate the process immediately."""
+        self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+class MathExecutor:
+    """Runs math functions with the ``process`` or ``inline`` backend.
+
+    Args:
+        backend (str): "process" (isolated worker pool) or "inline".
+        workers (int): Number of worker processes.
+        timeout_s (float): Wall clock limit of a single call.
+        memory_mb (int): Address space cap of each worker (0 disables it).
+        preload (Tuple[str, ...]): Modules imported by each worker when it starts.
+    """
+
+    def __init__(
+        self,
+        backend: str = "process",
+        workers: int = 2,
+        timeout_s: float = 2.0,
+        memory_mb: int = 512,
+        preload: Tuple[str, ...] = (),
+    ):
+        if backend not in ("process", "inline"):
+            raise ValueError(f"Backend di esecuzione sconosciuto: {backend}")
+        self.backend = backend
+        self.workers = workers
+        self.timeout_s = timeout_s
+        self.memory_mb = memory_mb
+        self.preload = preload
+        self.stats: Counter = Counter()
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        self._context = None
+
+    def start(self) -> None:
+        """Pre-warm the worker processes (no-op for the inline backend)."""
+        if self.backend != "process":
+            return
+        with self._lock:
+            if self._started:
+                return
+            methods = multiprocessing.get_all_start_methods()
+            self._context = multiprocessing.get_context(
+                "forkserver" if "forkserver" in methods else "spawn"
+            )
+            workers = [_Worker(self._context, self.memory_mb, self.preload) for _ in range(self.workers)]
+            for worker in workers:
+                worker.wait_ready(WORKER_START_TIMEOUT_S)
+                self._idle.put(worker)
+            self._started = True
+
+    def run(self, function_code: str) -> Number:
+        """Execute the function defined in ``function_code`` and return its value.
+
+        Raises:
+            ValueError: On validation errors, execution errors, timeouts or
+                memory exhaustion.
+        """
+        return check_result(self._dispatch(run_function, function_code))
+
+    def run_batch(self, function_code: str, ranges: str) -> Any:
+        """Evaluate a function of one or more variables over a grid (see ``math_batch``).
+
+        Returns:
+            BatchResult: Table, extrema and roots of the function.
+
+        Raises:
+            ValueError: As `run`, plus invalid ranges or too many points.
+        """
+        from ragflow.tools.math_batch import evaluate_batch  # pylint: disable=import-outside-toplevel
+        return self._dispatch(evaluate_batch, function_code, ranges)
+
+    def call(self, func: Callable[..., Any], *args: Any, timeout_s: Optional[float] = None) -> Any:
+        """Run a trusted module-level ``func(*args)`` on the backend, without code validation.
+
+        Args:
+            func (Callable[..., Any]): Picklable function (defined at module level).
+            timeout_s (Optional[float]): Wall clock limit (default: ``self.timeout_s``).
+
+        Raises:
+            ExecutionTimeout: If the process backend kills the job at the timeout.
+            ValueError: If the job fails (process backend; inline errors propagate as raised).
+        """
+        if self.backend == "inline":
+            return func(*args)
+        return self._run_in_worker(func, args, timeout_s)
+
+    def _dispatch(self, func: Callable[..., Any], function_code: str, *args: Any) -> Any:
+        """Validate ``function_code`` locally, then run ``func`` on the selected backend."""
+        started = time.perf_counter()
+        hits_before = validate_function_code.cache_info().hits
+        validate_function_code(function_code)  # errori di validazione senza IPC
+        if validate_function_code.cache_info().hits > hits_before:
+            self.stats["validation_cache_hits"] += 1
+        self.stats["calls"] += 1
+        try:
+            if self.backend == "inline":
+                return func(function_code, *args)
+            return self._run_in_worker(func, (function_code, *args))
+        finally:
+            self.stats["total_us"] += int((time.perf_counter() - started) * 1e6)
+
+    def _run_in_worker(self, func: Callable[..., Any], args: tuple, timeout_s: Optional[float] = None) -> Any:
+        timeout_s = self.timeout_s if timeout_s is None else timeout_s
+        self.start()
+        worker = self._idle.get()
+        try:
+            try:
+                if not worker.wait_ready(WORKER_START_TIMEOUT_S):
+                    raise EOFError("Il worker non si è avviato.")
+                worker.conn.send((func, args))
+                ready = worker.conn.poll(timeout_s)
+                outcome = worker.conn.recv() if ready else None
+            except (EOFError, OSError) as exc:
+                # Il worker è morto (es. ucciso dal sistema per memoria)
+                self.stats["crashes"] += 1
+                worker = self._replace(worker)
+                raise ValueError("Esecuzione interrotta: limite di risorse superato.") from exc
+            if outcome is None:
+                self.stats["timeouts"] += 1
+                worker = self._replace(worker)
+                raise ExecutionTimeout(f"Tempo limite superato ({timeout_s:.1f}s).")
+        finally:
+            self._idle.put(worker)
+        status, payload = outcome
+        if status == "error":
+            raise ValueError(payload)
+        return payload
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        replacement = _Worker(self._context, self.memory_mb, self.preload)
+        # Gli import del nuovo worker si pagano qui, non nel tempo limite del prossimo job
+        replacement.wait_ready(WORKER_START_TIMEOUT_S)
+        return replacement
+
+    def shutdown(self) -> None:
+        """Stop every worker process."""
+        with self._lock:
+            while not self._idle.empty():
+                worker = self._idle.get_nowait()
+                try:
+                    worker.conn.send(None)
+                except OSError:
+                    pass
+                worker.kill()
+            self._started = False
+
+
+# Istanza globale
+_math_executor: Optional[MathExecutor] = None
+
+
+def get_math_executor() -> MathExecutor:
+    """Return the process-wide executor configured by ``FLOW_SETTINGS``."""
+    global _math_executor  # pylint: disable=global-statement
+    if _math_executor is None:
+        _math_executor = MathExecutor(
+            backend=FLOW_SETTINGS.math_executor_backend,
+            workers=FLOW_SETTINGS.math_executor_workers,
+            timeout_s=FLOW_SETTINGS.math_executor_timeout_s,
+            memory_mb=FLOW_SETTINGS.math_executor_memory_mb,
+            preload=PRELOAD_MODULES,
+        )
+    return _math_executor
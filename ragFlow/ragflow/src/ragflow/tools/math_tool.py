@@ -1,29 +1,18 @@
 """Safe execution of a single mathematical function defined in Python code.
 
 This module exposes a CrewAI tool that validates and executes one math
-function in a restricted environment with safe math utilities only.
+function in a restricted environment with safe math utilities only, a
+batch tool that evaluates a function of some variables over whole ranges,
+and the tool of the symbolic equation solver (``equation_solver``).
 """
 
-import ast
-import math
-import re
 from crewai.tools import tool  # pylint: disable=import-error
 
-ALLOWED_MATH_FUNCTIONS = {
-    "abs", "round", "min", "max", "sum", "pow", "int", "float", "complex",
-    "sin", "cos", "tan", "asin", "acos", "atan", "atan2",
-    "sinh", "cosh", "tanh", "sqrt", "exp", "log", "log10", "log2",
-    "ceil", "floor", "degrees", "radians", "factorial", "pi", "e"
-}
-
-FORBIDDEN_PATTERNS = [
-    r'import\s+(?!math\b)', r'from\s+(?!math\b)', r'__.*__', r'exec\s*\(',
-    r'eval\s*\(', r'open\s*\(', r'input\s*\(', r'print\s*\(', r'os\.',
-    r'sys\.', r'subprocess', r'socket', r'file\s*\(', r'globals\s*\('
-]
+# La whitelist e l'esecuzione isolata vivono in math_executor (senza dipendenze CrewAI)
+from ragflow.tools.math_executor import ALLOWED_MATH_FUNCTIONS, get_math_executor  # pylint: disable=unused-import
 
 @tool("Math function executor")
-def execute_math_function(function_code: str) -> str:  # pylint: disable=too-many-branches
+def execute_math_function(function_code: str) -> str:
     """
     Executes a single mathematical function defined in Python code.
 
@@ -42,84 +31,74 @@ def execute_math_function(function_code: str) -> str:  # pylint: disable=too-man
 
     Raises:
         ValueError: If the input is empty, too long, contains forbidden patterns,
-            defines more than one function, uses disallowed names, or if the result
-            is not a valid numeric value.
+            defines more than one function, uses disallowed names, exceeds the
+            time or memory limits, or if the result is not a valid numeric value.
 
     Guardrails:
         - Only allows a single function definition.
         - Only allows safe math functions and variables.
         - Blocks dangerous code patterns (imports, exec, eval, file operations, etc.).
+        - Runs in a sandboxed worker process with time and memory limits.
         - Ensures the result is numeric and not NaN or infinite.
     """
-    # Guardrail INPUT
-    if not isinstance(function_code, str) or len(function_code.strip()) == 0:
-        raise ValueError("Codice vuoto o non valido.")
-
-    if len(function_code) > 2000:
-        raise ValueError("Codice troppo lungo (max 2000 caratteri).")
-
-    # Controlla pattern pericolosi
-    for pattern in FORBIDDEN_PATTERNS:
-        if re.search(pattern, function_code, re.IGNORECASE):
-            raise ValueError("Codice contiene elementi non matematici non consentiti.")
-
-    # Parse AST e valida nomi
-    try:
-        tree = ast.parse(function_code)
-    except SyntaxError as exc:
-        raise ValueError("Sintassi Python non valida.") from exc
-
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Name):
-            if (
-                node.id not in ALLOWED_MATH_FUNCTIONS
-                and not node.id.startswith(
-                    (
-                        'x', 'y', 'z', 'a', 'b', 'c', 'n', 't',
-                        'def', 'return',
-                    )
-                )
-            ):
-                raise ValueError(
-                    f"Nome non consentito in funzioni matematiche: {node.id}"
-                )
-
-    # Controlla che ci sia esattamente una funzione
-    functions = [node for node in tree.body if isinstance(node, ast.FunctionDef)]
-    if len(functions) != 1:
-        raise ValueError("Deve essere definita esattamente una funzione.")
-
-    try:
-        # Ambiente sicuro per esecuzione
-        safe_globals = {
-            '__builtins__': {},
-            'math': math,
-            'abs': abs, 'round': round, 'min': min, 'max': max, 'sum': sum, 'pow': pow,
-            'int': int, 'float': float, 'complex': complex,
-            'sin': math.sin, 'cos': math.cos, 'tan': math.tan,
-            'sqrt': math.sqrt, 'log': math.log, 'exp': math.exp,
-            'pi': math.pi, 'e': math.e
-        }
-
-        # Esegui il codice
-        exec(function_code, safe_globals)  # pylint: disable=exec-used
-
-        # Trova la funzione definita
-        func_name = functions[0].name
-        if func_name not in safe_globals:
-            raise ValueError("Funzione non trovata dopo l'esecuzione.")
-
-        func = safe_globals[func_name]
-        result = func()
-
-    except Exception as exc:  # noqa: BLE001
-        raise ValueError(f"Errore durante l'esecuzione: {exc}") from exc
-
-    # Guardrail OUTPUT
-    if not isinstance(result, (int, float, complex)):
-        raise ValueError("La funzione deve restituire un valore numerico.")
-
-    if isinstance(result, float) and (math.isnan(result) or math.isinf(result)):
-        raise ValueError("Risultato non valido (NaN o infinito).")
-
+    result = get_math_executor().run(function_code)
     return f"Risultato: {result}"
+
+
+@tool("Math batch evaluator")
+def evaluate_math_batch(function_code: str, ranges: str) -> str:
+    """
+    Evaluates a mathematical function over ranges of values in a single call.
+
+    Use this tool instead of calling execute_math_function once per point: to
+    tabulate a function, find its minimum or maximum on an interval or locate
+    its zeros. The function is evaluated vectorized on the whole grid, with the
+    same safe math functions and guardrails as execute_math_function.
+
+    Args:
+        function_code (str): Python code defining one function whose arguments
+            are the variables.
+            Example:
+                def f(x):
+                    return x**2 - 2*x - 3
+        ranges (str): The values of each variable, separated by ";":
+            "x=start:stop:points" (evenly spaced) or "x=v1,v2,v3" (explicit).
+            Example: "x=-5:5:101" or "x=0:2:21; y=1,2,3"
+
+    Returns:
+        str: Number of points, minimum and maximum with coordinates, mean,
+            zeros by sign change (one variable) and a short table.
+
+    Raises:
+        ValueError: On validation errors, invalid ranges, too many points, or if
+            no point gives a finite numeric value.
+    """
+    return get_math_executor().run_batch(function_code, ranges).format()
+
+
+@tool("Equation solver")
+def solve_equations(equations: str) -> str:
+    """
+    Solves equations and systems of equations exactly (symbolic engine).
+
+    Use this tool for equations instead of writing a Python function: it
+    handles polynomial and linear equations, linear systems and simple
+    transcendental equations over the real numbers.
+
+    Args:
+        equations (str): One equation, or several separated by ";" for a system.
+            Variables are single letters; use ^ or ** for powers.
+            Example: "x^2 + 2x - 3 = 0" or "2x + y = 5; x - y = 1"
+
+    Returns:
+        str: The exact solutions with numeric approximations, or an error message.
+    """
+    from ragflow.tools.equation_solver import solve_text  # pylint: disable=import-outside-toplevel
+
+    result = solve_text(equations)
+    if result is None:
+        return (
+            "Equazione non supportata dal solver simbolico: usa execute_math_function "
+            "con una funzione Python."
+        )
+    return result.format()
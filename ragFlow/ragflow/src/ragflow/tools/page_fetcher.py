@@ -0,0 +1,359 @@
+"""Concurrent fetching and main-text extraction of web result pages.
+
+``search_web`` only returns the three search snippets, so the web research
+agent summarizes from very thin context. When ``RAGFLOW_WEB_FETCH_ENABLED=1``
+the top result URLs are also downloaded and their main text is passed to the
+agent as short passages.
+
+`PageFetcher` owns a background event loop with one shared ``httpx``
+connection pool. The pages of a search are fetched concurrently, with at
+most ``web_fetch_per_host`` requests per host, a hard timeout per request, a
+size cap per page and one overall latency budget: whatever is not fetched and
+extracted by the deadline is dropped. The HTML is reduced to its main text
+(scripts, navigation, headers, footers and forms removed) in a process pool,
+so parsing does not compete with the flow for the GIL, and `select_passages`
+keeps the paragraphs most related to the query.
+"""
+
+import asyncio
+import multiprocessing
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from ragflow.cache import TTLCache
+from ragflow.runtime import FLOW_SETTINGS
+from ragflow.tracing import trace_call
+
+# Elementi il cui contenuto non fa parte del testo principale
+_SKIPPED_TAGS = {
+    "script", "style", "noscript", "nav", "header", "footer", "aside", "form",
+    "button", "svg", "iframe", "template", "select",
+}
+_BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "li", "br", "tr", "h1", "h2", "h3",
+    "h4", "h5", "h6", "blockquote", "pre", "dd", "dt", "td",
+}
+_VOID_TAGS = {"br", "img", "hr", "meta", "link", "input", "source", "wbr", "area", "col", "embed"}
+_MIN_PARAGRAPH_CHARS = 40
+_WORD = re.compile(r"\w{3,}")
+
+
+@dataclass
+class FetchedPage:
+    """Main text of a fetched result page.
+
+    Attributes:
+        url (str): The page URL.
+        title (str): The HTML title.
+        text (str): Main text, one paragraph per line.
+        latency_s (float): Time spent downloading and extracting the page.
+    """
+    url: str
+    title: str
+    text: str
+    latency_s: float = 0.0
+
+
+class _MainTextParser(HTMLParser):
+    """Collect the title and the text outside boilerplate elements."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self._in_title = False
+        # Tag saltati aperti: i figli non contano (<li> e <option> spesso non sono chiusi)
+        self._skipped: List[str] = []
+        self._main_depth = 0
+        self._buffer: List[str] = []
+        self.paragraphs: List[Tuple[bool, str]] = []
+
+    def _flush(self) -> None:
+        text = " ".join("".join(self._buffer).split())
+        if text:
+            self.paragraphs.append((self._main_depth > 0, text))
+        self._buffer = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _VOID_TAGS:
+            if tag == "br" and not self._skipped:
+                self._flush()
+            return
+        if tag == "title":
+            self._in_title = True
+        elif tag in _SKIPPED_TAGS:
+            self._skipped.append(tag)
+        elif self._skipped:
+            return
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+        if tag in ("article", "main") and not self._skipped:
+            self._main_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in _VOID_TAGS:
+            return
+        if tag == "title":
+            self._in_title = False
+        elif self._skipped:
+            if tag in self._skipped:
+                # Chiude anche i tag saltati interni rimasti aperti (es. <form> in <nav>)
+                del self._skipped[len(self._skipped) - 1 - self._skipped[::-1].index(tag):]
+            return
+        if tag in _BLOCK_TAGS:
+            self._flush()
+        if tag in ("article", "main") and self._main_depth:
+            self._main_depth -= 1
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skipped:
+            self._buffer.append(data)
+
+
+def extract_main_text(html: str) -> Tuple[str, str]:
+    """Reduce an HTML page to its title and main text.
+
+    When the page marks its content with ``<article>`` or ``<main>`` only that
+    part is kept; otherwise every paragraph long enough to be prose.
+
+    Args:
+        html (str): The page source.
+
+    Returns:
+        Tuple[str, str]: The title and the main text, one paragraph per line.
+    """
+    parser = _MainTextParser()
+    parser.feed(html)
+    parser.close()
+    parser._flush()  # pylint: disable=protected-access
+    paragraphs = parser.paragraphs
+    if any(in_main for in_main, _ in paragraphs):
+        texts = [text for in_main, text in paragraphs if in_main]
+    else:
+        texts = [text for _, text in paragraphs if len(text) >= _MIN_PARAGRAPH_CHARS]
+    return " ".join(parser.title.split()), "\n".join(texts)
+
+
+def select_passages(text: str, query: str, max_chars: int) -> str:
+    """Keep the paragraphs of ``text`` most related to ``query`` within ``max_chars``.
+
+    Paragraphs are ranked by the number of query words they contain (ties
+    keep the page order) and returned in their original order.
+
+    Args:
+        text (str): Main text, one paragraph per line.
+        query (str): The search query.
+        max_chars (int): Maximum length of the result.
+
+    Returns:
+        str: The selected passages separated by " … ".
+    """
+    paragraphs = [p for p in text.split("\n") if p.strip()]
+    terms = {w.lower() for w in _WORD.findall(query)}
+    ranked = sorted(
+        range(len(paragraphs)),
+        key=lambda i: (-len(terms & {w.lower() for w in _WORD.findall(paragraphs[i])}), i),
+    )
+    chosen, used = [], 0
+    for i in ranked:
+        paragraph = paragraphs[i]
+        if used + len(paragraph) > max_chars:
+            if not chosen:
+                chosen.append(i)
+                paragraphs[i] = paragraph[:max_chars].rsplit(" ", 1)[0] + "…"
+            break
+        chosen.append(i)
+        used += len(paragraph)
+    return " … ".join(paragraphs[i] for i in sorted(chosen))
+
+
+class PageFetcher:
+    """Fetch result pages concurrently within one latency budget.
+
+    Args:
+        budget_s (float): Overall deadline of one `fetch` call.
+        timeout_s (float): Hard timeout of a single request.
+        per_host (int): Maximum concurrent requests to the same host.
+        max_connections (int): Size of the shared connection pool.
+        max_bytes (int): Pages larger than this are truncated.
+        extract_workers (int): Extraction processes (0 extracts in a thread).
+        cache_size (int): Extracted pages kept in memory.
+        cache_ttl_s (float): Time-to-live of an extracted page.
+    """
+
+    def __init__(
+        self,
+        budget_s: float = 4.0,
+        timeout_s: float = 3.0,
+        per_host: int = 2,
+        max_connections: int = 10,
+        max_bytes: int = 1_000_000,
+        extract_workers: int = 2,
+        cache_size: int = 128,
+        cache_ttl_s: float = 900.0,
+    ):
+        self.budget_s = budget_s
+        self.timeout_s = timeout_s
+        self.per_host = per_host
+        self.max_connections = max_connections
+        self.max_bytes = max_bytes
+        self.extract_workers = extract_workers
+        self.cache = TTLCache(max_size=cache_size, ttl_s=cache_ttl_s)
+        self.fetched = 0
+        self.failed = 0
+        self.over_budget = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._extractor = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the event loop thread, the connection pool and the extraction pool."""
+        import httpx  # pylint: disable=import-error,import-outside-toplevel
+
+        with self._lock:
+            if self._loop is not None:
+                return
+            if self.extract_workers > 0:
+                methods = multiprocessing.get_all_start_methods()
+                self._extractor = ProcessPoolExecutor(
+                    max_workers=self.extract_workers,
+                    mp_context=multiprocessing.get_context(
+                        "forkserver" if "forkserver" in methods else "spawn"
+                    ),
+                )
+            else:
+                self._extractor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="extract")
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="page-fetcher", daemon=True).start()
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout_s,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=self.max_connections),
+                headers={"User-Agent": "Mozilla/5.0 (compatible; ragflow)"},
+            )
+            self._loop = loop
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self._host_limits[host]
+
+    async def _download(self, url: str) -> str:
+        async with self._host_limit(url):
+            async with self._client.stream("GET", url) as response:
+                response.raise_for_status()
+                if "html" not in response.headers.get("content-type", "html"):
+                    raise ValueError(f"contenuto non HTML: {url}")
+                chunks, size = [], 0
+                async for chunk in response.aiter_bytes():
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= self.max_bytes:
+                        break
+                return b"".join(chunks)[: self.max_bytes].decode(response.encoding or "utf-8", "replace")
+
+    async def _fetch_one(self, url: str) -> Optional[FetchedPage]:
+        started = time.perf_counter()
+        try:
+            html = await asyncio.wait_for(self._download(url), self.timeout_s)
+            title, text = await asyncio.get_running_loop().run_in_executor(
+                self._extractor, extract_main_text, html
+            )
+        except Exception as exc:  # pylint: disable=broad-except
+            # Timeout, errori di rete e HTTP (httpx.HTTPError), contenuti non HTML
+            self.failed += 1
+            print(f"⚠️ Pagina non scaricata ({url}): {exc or type(exc).__name__}")
+            return None
+        self.fetched += 1
+        return FetchedPage(url, title, text, time.perf_counter() - started)
+
+    async def _fetch_all(self, urls: Sequence[str], budget_s: float) -> List[Optional[FetchedPage]]:
+        tasks = [asyncio.ensure_future(self._fetch_one(url)) for url in urls]
+        done, pending = await asyncio.wait(tasks, timeout=budget_s)
+        for pending_task in pending:
+            pending_task.cancel()
+        self.over_budget += len(pending)
+        return [task.result() if task in done else None for task in tasks]
+
+    def fetch(self, urls: Sequence[str], budget_s: Optional[float] = None) -> List[FetchedPage]:
+        """Fetch and extract ``urls`` concurrently, within the latency budget.
+
+        Args:
+            urls (Sequence[str]): Pages to fetch, in result order.
+            budget_s (Optional[float]): Overrides the fetcher's budget.
+
+        Returns:
+            List[FetchedPage]: The pages fetched in time, in the order of ``urls``;
+            failed or late pages are omitted.
+        """
+        budget_s = self.budget_s if budget_s is None else budget_s
+        pages: Dict[str, FetchedPage] = {}
+        missing = []
+        for url in dict.fromkeys(urls):
+            cached = self.cache.get(url)
+            if cached is not None:
+                pages[url] = cached
+            elif urlparse(url).scheme in ("http", "https"):
+                missing.append(url)
+        if missing:
+            self.start()
+            future = asyncio.run_coroutine_threadsafe(self._fetch_all(missing, budget_s), self._loop)
+            with trace_call("web", count=len(missing)):
+                fetched = future.result(timeout=budget_s + 1.0)
+            for url, page in zip(missing, fetched):
+                if page is not None and page.text:
+                    self.cache.set(url, page)
+                    pages[url] = page
+        return [pages[url] for url in urls if url in pages]
+
+    def shutdown(self) -> None:
+        """Close the connection pool, the event loop and the extraction pool."""
+        with self._lock:
+            if self._loop is None:
+                return
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._extractor.shutdown(cancel_futures=True)
+            self._loop = None
+            self._host_limits.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return fetched, failed and over-budget page counts and cache hits."""
+        return {
+            "fetched": self.fetched,
+            "failed": self.failed,
+            "over_budget": self.over_budget,
+            "cache_hits": self.cache.hits,
+        }
+
+
+# Istanza globale
+_page_fetcher: Optional[PageFetcher] = None
+_page_fetcher_lock = threading.Lock()
+
+
+def get_page_fetcher() -> Optional[PageFetcher]:
+    """Return the process-wide page fetcher, or None when page fetching is disabled."""
+    global _page_fetcher  # pylint: disable=global-statement
+    if not FLOW_SETTINGS.web_fetch_enabled:
+        return None
+    with _page_fetcher_lock:
+        if _page_fetcher is None:
+            _page_fetcher = PageFetcher(
+                budget_s=FLOW_SETTINGS.web_fetch_budget_s,
+                timeout_s=FLOW_SETTINGS.web_fetch_timeout_s,
+                per_host=FLOW_SETTINGS.web_fetch_per_host,
+                max_bytes=FLOW_SETTINGS.web_fetch_max_kb * 1024,
+                extract_workers=FLOW_SETTINGS.web_fetch_extract_workers,
+            )
+        return _page_fetcher
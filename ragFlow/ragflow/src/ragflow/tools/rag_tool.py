@@ -6,8 +6,12 @@ from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
+import math
 import os
-from typing import List, Dict, Any, Iterable, Tuple
+import threading
+import time
+from collections import Counter, deque
+from typing import List, Dict, Any, Iterable, Tuple, Optional
 from langchain_core.prompts import ChatPromptTemplate
 from qdrant_client import QdrantClient
 from qdrant_client.models import (
@@ -17,20 +21,79 @@ from qdrant_client.models import (
     OptimizersConfigDiff,
     ScalarQuantization,
     ScalarQuantizationConfig,
+    ScalarType,
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    QuantizationSearchParams,
     PayloadSchemaType,
     FieldCondition,
     MatchValue,
     MatchText,
+    HasIdCondition,
     Filter,
     SearchParams,
     PointStruct,
+    ScoredPoint,
 )
 from langchain_openai import AzureOpenAIEmbeddings
 from langchain_openai import AzureChatOpenAI
 from dotenv import load_dotenv
+from ragflow.tools.chunk_store import get_chunk_store
+from ragflow.tools.retrieval_cache import get_retrieval_cache
+from ragflow.tools.dedup import deduplicate_chunks
+from ragflow.tools.embedding_cache import CachedEmbeddings
+from ragflow.llm_cache_langchain import LangChainTraceHandler, langchain_llm_cache
+from ragflow.tracing import trace_call
 
 load_dotenv()
 
+@dataclass
+class StorageProfile:
+    """
+    Memory-tiering options for the rag_chunks collection.
+
+    Attributes:
+        on_disk_vectors: Keep original float32 vectors on disk (memory-mapped);
+            None here and below leaves the Qdrant server default
+        quantization: "scalar" (int8, ~4x smaller), "binary" (1 bit, ~32x smaller) or "none"
+        quantized_always_ram: Pin quantized vectors in RAM
+        hnsw_on_disk: Keep the HNSW graph on disk
+        on_disk_payload: Keep payloads on disk instead of RAM
+        oversampling: Candidates fetched from quantized vectors per requested result
+            (None = Qdrant defaults, no quantization search params)
+        rescore: Rescore the oversampled candidates with the original vectors
+    """
+    on_disk_vectors: Optional[bool]
+    quantization: str
+    quantized_always_ram: bool
+    hnsw_on_disk: Optional[bool]
+    on_disk_payload: Optional[bool]
+    oversampling: Optional[float]
+    rescore: bool
+
+STORAGE_PROFILES: Dict[str, StorageProfile] = {
+    # Layout storico della collezione: int8 on-disk, default del server per il resto
+    "baseline": StorageProfile(
+        on_disk_vectors=None, quantization="scalar", quantized_always_ram=False,
+        hnsw_on_disk=None, on_disk_payload=None, oversampling=None, rescore=False,
+    ),
+    # Tutto in RAM: latenza minima, memoria massima
+    "low-latency": StorageProfile(
+        on_disk_vectors=False, quantization="scalar", quantized_always_ram=True,
+        hnsw_on_disk=False, on_disk_payload=False, oversampling=1.0, rescore=False,
+    ),
+    # Vettori int8 e grafo in RAM, originali e payload su disco (solo per il rescoring)
+    "balanced": StorageProfile(
+        on_disk_vectors=True, quantization="scalar", quantized_always_ram=True,
+        hnsw_on_disk=False, on_disk_payload=True, oversampling=2.0, rescore=True,
+    ),
+    # Solo i vettori binari in RAM, tutto il resto su disco
+    "low-memory": StorageProfile(
+        on_disk_vectors=True, quantization="binary", quantized_always_ram=True,
+        hnsw_on_disk=True, on_disk_payload=True, oversampling=3.0, rescore=True,
+    ),
+}
+
 @dataclass
 class Settings:
     """
@@ -48,6 +111,7 @@ class Settings:
     Qdrant server URL.
     - Default: Local development instance
     - Production: Use your Qdrant cloud URL or server address
+    - ":memory:": Embedded in-process Qdrant (offline benchmarks, no server needed)
     - Alternative: Can be overridden via environment variable QDRANT_URL
     """
    
@@ -60,6 +124,24 @@ class Settings:
     """
 
    
+    storage_profile: str = "baseline"
+    """
+    Named memory-tiering profile applied when the collection is created and searched.
+
+    Available Profiles (see STORAGE_PROFILES):
+    - "baseline": The existing layout, int8 quantized vectors with always_ram=False,
+      server defaults for originals, HNSW graph, payload and search params (default)
+    - "low-latency": Vectors, int8 quantized vectors, HNSW graph and payload in RAM
+    - "balanced": int8 quantized vectors and HNSW graph in RAM, originals and payload
+      on disk, 2x oversampling with rescoring
+    - "low-memory": Binary quantized vectors in RAM, everything else on disk,
+      3x oversampling with rescoring
+
+    Sizing (1M chunks, 1536-dim embeddings):
+    - float32 originals: ~6 GB, int8: ~1.5 GB, binary: ~0.2 GB
+    - Benchmark: python -m ragflow.bench.storage_profiles
+    """
+
     # =========================
     # Document Chunking Configuration
     # =========================
@@ -103,6 +185,36 @@ class Settings:
     - 20% overlap: ~20% increase in storage
     - 50% overlap: ~50% increase in storage
     """
+
+    # =========================
+    # Near-Duplicate Elimination Configuration
+    # =========================
+    dedup_enabled: bool = True
+    """
+    Whether near-duplicate chunks are merged between split_documents and upsert_chunks.
+
+    Dedup Benefits:
+    - One embedding call, one index entry and one prompt slot per distinct passage
+    - Kept chunks list the merged copies in metadata/payload 'merged_sources'
+    """
+
+    dedup_threshold: float = 0.85
+    """
+    Minimum Jaccard similarity (word shingles) for two chunks to be merged.
+    - 0.95+: Only copies differing by a few words (boilerplate, headers)
+    - 0.8-0.9: Near-identical passages with small edits (current setting)
+    - <0.7: Aggressive, risks merging distinct passages on the same topic
+    """
+
+    dedup_num_perm: int = 128
+    """
+    MinHash signature length; more permutations make LSH candidates more accurate.
+    """
+
+    dedup_shingle_size: int = 3
+    """
+    Number of consecutive words per shingle.
+    """
    
     # =========================
     # Hybrid Search Configuration
@@ -243,6 +355,138 @@ class Settings:
     - Increase if results seem too diverse
     """
 
+    # =========================
+    # Candidate Payload Configuration
+    # =========================
+    search_with_payload: bool = False
+    """
+    Whether semantic candidates are fetched together with their payload.
+
+    Payload Strategy:
+    - False: Candidates carry only ID, score and (for MMR) vector; the chunk text
+      of the final_k winners is hydrated afterwards (current setting)
+    - True: Every candidate ships its full payload (legacy behaviour)
+
+    Performance Impact:
+    - Most candidates are discarded by fusion and MMR, so their texts are pure
+      network and deserialization overhead
+    """
+
+    chunk_store_path: str = ""
+    """
+    Optional SQLite file backing the local chunk-text store.
+
+    Hydration Sources:
+    - Empty string: In-process store filled by upsert_chunks
+    - File path: Store shared across processes and restarts
+    - Points missing from the store are fetched with a targeted Qdrant retrieve
+    """
+
+    shared_caches: bool = True
+    """
+    Whether ingestion writes to the process-wide chunk store and retrieval cache.
+
+    - True: upsert_chunks mirrors payloads in the chunk store, and
+      recreate/upsert clear the store and bump the collection version
+    - False: Ephemeral collections (e.g. the per-search web index) leave the
+      shared store and cache untouched; use with search_with_payload=True
+    """
+
+    # =========================
+    # Adaptive Search Configuration
+    # =========================
+    adaptive_search: bool = False
+    """
+    Whether hybrid_search adapts candidate depth and MMR to each query.
+
+    Adaptive Behaviour:
+    - Fetches adaptive_min_semantic candidates first and deepens to
+      top_n_semantic only when the score distribution is flat
+    - Restricts the text prefilter to the semantic candidates (single page)
+    - Skips MMR when the top results are already diverse
+    - Falls back to plain top-K when latency_budget_ms is exhausted
+    """
+
+    adaptive_min_semantic: int = 10
+    """
+    Initial candidate depth in adaptive mode.
+    - Should be at least final_k; values of 1.5-2x final_k work well
+    """
+
+    adaptive_gap_threshold: float = 0.05
+    """
+    Cosine score gap between rank final_k and the last initial candidate.
+    - Gap above threshold: top results clearly dominate, no deepening
+    - Embedding models with compressed score ranges (e.g. ada-002) need small values
+    """
+
+    adaptive_entropy_threshold: float = 0.6
+    """
+    Normalized entropy (0.0 to 1.0) of the initial score distribution.
+    - Entropy below threshold: scores are peaked, no deepening
+    - Entropy near 1.0: flat distribution, deeper search is worthwhile
+    """
+
+    mmr_skip_similarity: float = 0.85
+    """
+    Maximum pairwise cosine similarity among the fused top final_k results
+    below which MMR is skipped in adaptive mode (results already diverse).
+    """
+
+    latency_budget_ms: float = 0.0
+    """
+    Per-query latency budget for adaptive mode (0 disables the budget).
+    - Once exceeded, deepening, text prefilter and MMR are skipped
+    """
+
+    # =========================
+    # Retrieval Result Cache Configuration
+    # =========================
+    retrieval_cache_enabled: bool = True
+    """
+    Whether hybrid_search results are cached by normalized query.
+
+    Cache Key:
+    - Normalized query + fingerprint of these Settings + collection version
+    - Ingestion (recreate/upsert) bumps the collection version, so a reindex
+      invalidates every older entry
+    - A hit skips embedding, ANN search, text prefilter and MMR entirely
+    """
+
+    retrieval_cache_size: int = 256
+    """
+    Maximum number of cached queries kept in process (LRU eviction).
+    """
+
+    retrieval_cache_ttl_s: float = 600.0
+    """
+    Time-to-live of a cached ranking in seconds (0 disables expiry).
+    """
+
+    retrieval_cache_path: str = ""
+    """
+    Optional SQLite file shared by every process on the host.
+    - Empty string: in-process cache only
+    - The collection version counter is stored there as well
+    """
+
+    # =========================
+    # Embedding Cache Configuration
+    # =========================
+    embedding_cache_size: int = 4096
+    """
+    Embedding vectors kept in process (LRU eviction).
+    - Shared by ingestion, queries and the ephemeral web index
+    - Only texts missing from the cache are sent to the embedding model
+    """
+
+    embedding_cache_path: str = ""
+    """
+    Optional SQLite file persisting the embedding vectors.
+    - Empty string: in-process cache only
+    - With a path, a restarted process does not re-embed the same chunks
+    """
+
 SETTINGS = Settings()
 
 class RAGSystem:
@@ -255,17 +499,14 @@ class RAGSystem:
         
         self._initialize_rag()
     
-    def _get_embeddings(self) -> AzureOpenAIEmbeddings:
-        """Inizializza embedding Azure OpenAI"""
-        api_key = os.getenv("AZURE_API_KEY")
-        return AzureOpenAIEmbeddings(
-            model="text-embedding-ada-002",
-            azure_endpoint=os.getenv("AZURE_API_BASE"),
-            api_key=api_key
-        )
+    def _get_embeddings(self) -> CachedEmbeddings:
+        """Inizializza embedding Azure OpenAI (con cache dei vettori)"""
+        return get_embeddings()
     
     def _get_llm(self) -> AzureChatOpenAI:
-        """Inizializza LLM Azure OpenAI"""
+        """Inizializza LLM Azure OpenAI (risposte identiche servite dalla cache LLM)"""
+        if _chat_model is not None:
+            return _chat_model
         api_key = os.getenv("AZURE_API_KEY")
         endpoint = os.getenv("AZURE_API_BASE")
         deployment = os.getenv("MODEL")
@@ -275,7 +516,9 @@ class RAGSystem:
             openai_api_version="2024-02-15-preview",
             azure_endpoint=endpoint,
             openai_api_key=api_key,
-            temperature=0.1
+            temperature=0.1,
+            cache=langchain_llm_cache(),
+            callbacks=[LangChainTraceHandler()]
         )
     
     def _create_medical_documents(self) -> List[Document]:
@@ -535,6 +778,8 @@ class RAGSystem:
         """Inizializza il sistema RAG con documenti medici"""
         documents = self._create_medical_documents()
         chunks = split_documents(documents, SETTINGS)
+        chunks, report = deduplicate_chunks(chunks, SETTINGS)
+        print(report.summary())
         
         client = get_qdrant_client(SETTINGS)
         sample_vec = self.embeddings.embed_query("test")
@@ -563,14 +808,61 @@ class RAGSystem:
 
 # Istanza globale
 _rag_system = None
+# Richieste concorrenti (service) non devono creare e indicizzare due sistemi
+_rag_system_lock = threading.Lock()
 
 def get_rag_system() -> RAGSystem:
     """Ottiene l'istanza del sistema RAG"""
     global _rag_system
     if _rag_system is None:
-        _rag_system = RAGSystem()
+        with _rag_system_lock:
+            if _rag_system is None:
+                _rag_system = RAGSystem()
     return _rag_system
-    
+
+_embeddings = None
+# Modelli sostitutivi (benchmark offline), None in produzione
+_chat_model = None
+
+def _cached_embeddings(embeddings: Any, model: str) -> CachedEmbeddings:
+    return CachedEmbeddings(
+        embeddings,
+        model=model,
+        memory_size=SETTINGS.embedding_cache_size,
+        path=SETTINGS.embedding_cache_path,
+    )
+
+def get_embeddings() -> CachedEmbeddings:
+    """Ottiene gli embedding Azure OpenAI condivisi, dietro la cache dei vettori"""
+    global _embeddings
+    if _embeddings is None:
+        model = "text-embedding-ada-002"
+        _embeddings = _cached_embeddings(
+            AzureOpenAIEmbeddings(
+                model=model,
+                azure_endpoint=os.getenv("AZURE_API_BASE"),
+                api_key=os.getenv("AZURE_API_KEY")
+            ),
+            model,
+        )
+    return _embeddings
+
+def override_models(embeddings: Any = None, llm: Any = None):
+    """
+    Sostituisce gli embedding e il LLM Azure con modelli locali.
+
+    Usata dal benchmark offline; va chiamata prima che il sistema RAG
+    venga creato. Gli embedding restano dietro la cache dei vettori.
+
+    Args:
+        embeddings: Modello con embed_query/embed_documents (None lascia Azure)
+        llm: Chat model LangChain della catena RAG (None lascia Azure)
+    """
+    global _embeddings, _chat_model
+    if embeddings is not None:
+        _embeddings = _cached_embeddings(embeddings, type(embeddings).__name__)
+    _chat_model = llm
+
 def split_documents(docs: List[Document], settings: Settings) -> List[Document]:
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=settings.chunk_size,
@@ -584,8 +876,57 @@ def split_documents(docs: List[Document], settings: Settings) -> List[Document]:
 # =========================
 
 def get_qdrant_client(settings: Settings) -> QdrantClient:
+    if settings.qdrant_url == ":memory:":
+        return QdrantClient(location=":memory:")
     return QdrantClient(url=settings.qdrant_url)
 
+def get_storage_profile(settings: Settings) -> StorageProfile:
+    """
+    Return the StorageProfile selected by settings.storage_profile.
+
+    Raises:
+        ValueError: If the profile name is unknown
+    """
+    try:
+        return STORAGE_PROFILES[settings.storage_profile]
+    except KeyError as exc:
+        raise ValueError(
+            f"Profilo di storage sconosciuto: {settings.storage_profile!r} "
+            f"(disponibili: {', '.join(STORAGE_PROFILES)})"
+        ) from exc
+
+def quantization_config_for(profile: StorageProfile):
+    """
+    Build the Qdrant quantization config of a storage profile (None = no quantization).
+    """
+    if profile.quantization == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, always_ram=profile.quantized_always_ram)
+        )
+    if profile.quantization == "binary":
+        return BinaryQuantization(
+            binary=BinaryQuantizationConfig(always_ram=profile.quantized_always_ram)
+        )
+    return None
+
+def semantic_search_params(settings: Settings) -> SearchParams:
+    """
+    Build the search parameters (HNSW ef and quantization rescoring) for settings.
+    """
+    profile = get_storage_profile(settings)
+    quantization = None
+    if profile.quantization != "none" and profile.oversampling is not None:
+        quantization = QuantizationSearchParams(
+            ignore=False,
+            rescore=profile.rescore,
+            oversampling=profile.oversampling,
+        )
+    return SearchParams(
+        hnsw_ef=256,  # ampiezza lista in fase di ricerca (recall/latency)
+        exact=False,  # True = ricerca esatta (lenta); False = ANN HNSW
+        quantization=quantization,
+    )
+
 def recreate_collection_for_rag(client: QdrantClient, settings: Settings, vector_size: int):
     """
     Create or recreate a Qdrant collection optimized for RAG (Retrieval-Augmented Generation).
@@ -619,11 +960,12 @@ def recreate_collection_for_rag(client: QdrantClient, settings: Settings, vector
     - Benefits: Faster indexing, better resource utilization
     - Considerations: More segments = more memory overhead
         
-    Quantization Strategy:
-    - Scalar quantization: Reduces vector precision from float32 to int8
-    - Memory savings: ~4x reduction in vector storage
-    - Quality impact: Minimal impact on search accuracy
-    - always_ram=False: Vectors stored on disk, loaded to RAM as needed
+    Quantization & Memory Tiering (settings.storage_profile):
+    - Scalar quantization: Reduces vector precision from float32 to int8 (~4x)
+    - Binary quantization: One bit per dimension (~32x), needs oversampling + rescoring
+    - on_disk vectors / HNSW / payload: Memory-mapped, loaded by the OS page cache
+    - always_ram=True: Quantized vectors pinned in RAM for the first search phase
+    - Default "baseline" profile: int8 with always_ram=False, as before the profiles
         
     Payload Indexing Strategy:
     - Text index: Full-text search capabilities (BM25 scoring)
@@ -646,19 +988,24 @@ def recreate_collection_for_rag(client: QdrantClient, settings: Settings, vector
     - Medium collections (100K-1M vectors): Increase m to 48-64
     - Large collections (1M+ vectors): Consider multiple collections or sharding
     """
+    profile = get_storage_profile(settings)
     client.recreate_collection(
         collection_name=settings.collection,
-        vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
+        vectors_config=VectorParams(
+            size=vector_size,
+            distance=Distance.COSINE,
+            on_disk=profile.on_disk_vectors  # vettori originali memory-mapped
+        ),
         hnsw_config=HnswConfigDiff(
             m=32,             # grado medio del grafo HNSW (maggiore = più memoria/qualità)
-            ef_construct=256  # ampiezza lista candidati in fase costruzione (qualità/tempo build)
+            ef_construct=256, # ampiezza lista candidati in fase costruzione (qualità/tempo build)
+            on_disk=profile.hnsw_on_disk
         ),
         optimizers_config=OptimizersConfigDiff(
             default_segment_number=2  # parallelismo/segmentazione iniziale
         ),
-        quantization_config=ScalarQuantization(
-            scalar=ScalarQuantizationConfig(type="int8", always_ram=False)  # on-disk quantization dei vettori
-        ),
+        quantization_config=quantization_config_for(profile),
+        on_disk_payload=profile.on_disk_payload,
     )
 
     # Indice full-text sul campo 'text' per filtri MatchText
@@ -676,6 +1023,11 @@ def recreate_collection_for_rag(client: QdrantClient, settings: Settings, vector
             field_schema=PayloadSchemaType.KEYWORD
         )
 
+    # I testi dei chunk e i risultati in cache della vecchia collection non sono più validi
+    if settings.shared_caches:
+        get_chunk_store(settings.chunk_store_path).clear(settings.collection)
+        get_retrieval_cache(settings).bump_version(settings.collection)
+
 # =========================
 # Ingest: chunk -> embed -> upsert
 # =========================
@@ -689,7 +1041,8 @@ def build_points(chunks: List[Document], embeds: List[List[float]]) -> List[Poin
             "title": doc.metadata.get("title"),
             "lang": doc.metadata.get("lang", "en"),
             "text": doc.page_content,
-            "chunk_id": i - 1
+            "chunk_id": i - 1,
+            "merged_sources": doc.metadata.get("merged_sources", [])
         }
         pts.append(PointStruct(id=i, vector=vec, payload=payload))
     return pts
@@ -697,7 +1050,15 @@ def build_points(chunks: List[Document], embeds: List[List[float]]) -> List[Poin
 def upsert_chunks(client: QdrantClient, settings: Settings, chunks: List[Document], embeddings: AzureOpenAIEmbeddings):
     vecs = embeddings.embed_documents([c.page_content for c in chunks])
     points = build_points(chunks, vecs)
-    client.upsert(collection_name=settings.collection, points=points, wait=True)
+    with trace_call("qdrant"):
+        client.upsert(collection_name=settings.collection, points=points, wait=True)
+    if not settings.shared_caches:
+        return
+    # Copia locale dei payload per l'idratazione dei risultati finali
+    get_chunk_store(settings.chunk_store_path).put_many(
+        settings.collection, [(p.id, p.payload) for p in points]
+    )
+    get_retrieval_cache(settings).bump_version(settings.collection)
 
 # =========================
 # Ricerca: semantica / testuale / ibrida
@@ -709,52 +1070,99 @@ def qdrant_semantic_search(
     query: str,
     embeddings: AzureOpenAIEmbeddings,
     limit: int,
-    with_vectors: bool = False
+    with_vectors: bool = False,
+    with_payload: bool = True,
+    query_vector: Optional[List[float]] = None,
+    offset: int = 0
 ):
-    qv = embeddings.embed_query(query)
-    res = client.query_points(
-        collection_name=settings.collection,
-        query=qv,
-        limit=limit,
-        with_payload=True,
-        with_vectors=with_vectors,
-        search_params=SearchParams(
-            hnsw_ef=256,  # ampiezza lista in fase di ricerca (recall/latency)
-            exact=False   # True = ricerca esatta (lenta); False = ANN HNSW
-        ),
-    )
+    qv = query_vector if query_vector is not None else embeddings.embed_query(query)
+    with trace_call("qdrant"):
+        res = client.query_points(
+            collection_name=settings.collection,
+            query=qv,
+            limit=limit,
+            offset=offset,
+            with_payload=with_payload,
+            with_vectors=with_vectors,
+            search_params=semantic_search_params(settings),
+        )
     return res.points
 
 def qdrant_text_prefilter_ids(
     client: QdrantClient,
     settings: Settings,
     query: str,
-    max_hits: int
+    max_hits: int,
+    candidate_ids: Optional[List[int]] = None
 ) -> List[int]:
     """
     Usa l'indice full-text su 'text' per prefiltrare i punti che contengono parole chiave.
     Non restituisce uno score BM25: otteniamo un sottoinsieme di id da usare come boost.
+    Se candidate_ids è indicato, la ricerca è ristretta a quegli id (una sola pagina).
     """
     # Scroll con filtro MatchText per ottenere id dei match testuali
     # (nota: scroll è paginato; qui prendiamo solo i primi max_hits per semplicità)
+    must: List[Any] = [FieldCondition(key="text", match=MatchText(text=query))]
+    if candidate_ids is not None:
+        if not candidate_ids:
+            return []
+        must.append(HasIdCondition(has_id=list(candidate_ids)))
+        max_hits = min(max_hits, len(candidate_ids))
     matched_ids: List[int] = []
     next_page = None
     while True:
-        points, next_page = client.scroll(
-            collection_name=settings.collection,
-            scroll_filter=Filter(
-                must=[FieldCondition(key="text", match=MatchText(text=query))]
-            ),
-            limit=min(256, max_hits - len(matched_ids)),
-            offset=next_page,
-            with_payload=False,
-            with_vectors=False,
-        )
+        with trace_call("qdrant"):
+            points, next_page = client.scroll(
+                collection_name=settings.collection,
+                scroll_filter=Filter(must=must),
+                limit=min(256, max_hits - len(matched_ids)),
+                offset=next_page,
+                with_payload=False,
+                with_vectors=False,
+            )
         matched_ids.extend([p.id for p in points])
         if not next_page or len(matched_ids) >= max_hits:
             break
     return matched_ids
 
+def hydrate_payloads(client: QdrantClient, settings: Settings, points: List[Any]) -> List[Any]:
+    """
+    Attach chunk payloads to points retrieved without them.
+
+    Payloads are read from the local chunk store first; only the IDs it does not
+    know are fetched with a single targeted ``retrieve`` (no vectors). Vectors are
+    dropped from the returned points since they are no longer needed.
+
+    Args:
+        client: Qdrant client instance for database operations
+        settings: Configuration object containing collection parameters
+        points: Scored points, usually the final_k winners of hybrid_search
+
+    Returns:
+        List[Any]: The same points, in the same order, with payload set
+    """
+    pending = [p for p in points if not p.payload]
+    if pending:
+        store = get_chunk_store(settings.chunk_store_path)
+        found = store.get_many(settings.collection, [p.id for p in pending])
+        missing = [p.id for p in pending if p.id not in found]
+        if missing:
+            with trace_call("qdrant"):
+                records = client.retrieve(
+                    collection_name=settings.collection,
+                    ids=missing,
+                    with_payload=True,
+                    with_vectors=False,
+                )
+            fetched = [(r.id, r.payload or {}) for r in records]
+            store.put_many(settings.collection, fetched)
+            found.update(fetched)
+        for p in pending:
+            p.payload = found.get(p.id, {})
+    for p in points:
+        p.vector = None
+    return points
+
 def mmr_select(
     query_vec: List[float],
     candidates_vecs: List[List[float]],
@@ -957,11 +1365,144 @@ def mmr_select(
         remaining.remove(best_idx)
     return selected
 
+# =========================
+# Ricerca adattiva: profondità candidati / early exit
+# =========================
+
+# Conteggio dei percorsi seguiti da hybrid_search e ultimi tracciati per query
+SEARCH_PATH_COUNTS: Counter = Counter()
+SEARCH_PATH_LOG: deque = deque(maxlen=1000)
+
+def score_distribution(scores: List[float], k: int) -> Tuple[float, float]:
+    """
+    Summarize how dominant the top semantic scores are.
+
+    Args:
+        scores: Semantic scores sorted in descending order
+        k: Number of results that will eventually be returned (final_k)
+
+    Returns:
+        Tuple[float, float]: (gap, entropy) where gap is the score drop between
+        rank k and the last candidate, and entropy is the normalized Shannon
+        entropy (0.0 = one dominant candidate, 1.0 = flat scores)
+    """
+    if len(scores) <= 1:
+        return 0.0, 0.0
+    gap = scores[min(k, len(scores)) - 1] - scores[-1] if len(scores) > k else 0.0
+    smin = min(scores)
+    weights = [s - smin + 1e-6 for s in scores]
+    total = sum(weights)
+    entropy = -sum((w / total) * math.log(w / total) for w in weights)
+    return gap, entropy / math.log(len(scores))
+
+def _elapsed_ms(t0: float) -> float:
+    return (time.perf_counter() - t0) * 1000.0
+
+def _over_budget(settings: Settings, t0: float) -> bool:
+    return settings.latency_budget_ms > 0 and _elapsed_ms(t0) >= settings.latency_budget_ms
+
+def adaptive_semantic_candidates(
+    client: QdrantClient,
+    settings: Settings,
+    query: str,
+    embeddings: AzureOpenAIEmbeddings,
+    query_vector: List[float],
+    path: Dict[str, Any],
+    t0: float
+):
+    """
+    Fetch a shallow candidate list and deepen it only when the scores are flat.
+
+    The first adaptive_min_semantic candidates are inspected with
+    score_distribution: when the top results clearly dominate (large gap or low
+    entropy) or the latency budget is exhausted, deeper candidates are not
+    fetched. Otherwise the remaining ones up to top_n_semantic are fetched with
+    an offset query, so no candidate is transferred twice.
+
+    Args:
+        client: Qdrant client for database operations
+        settings: Configuration object containing adaptive thresholds
+        query: User's search query string
+        embeddings: Embedding model (unused when query_vector is given)
+        query_vector: Pre-computed query embedding
+        path: Dictionary updated with the decisions taken
+        t0: perf_counter timestamp of the start of the search
+
+    Returns:
+        List[ScoredPoint]: Semantic candidates sorted by score
+    """
+    depth = max(1, min(settings.adaptive_min_semantic, settings.top_n_semantic))
+    search = dict(
+        with_vectors=settings.use_mmr,
+        with_payload=settings.search_with_payload,
+        query_vector=query_vector,
+    )
+    sem = qdrant_semantic_search(client, settings, query, embeddings, limit=depth, **search)
+    gap, entropy = score_distribution([p.score for p in sem], settings.final_k)
+    path.update(gap=round(gap, 4), entropy=round(entropy, 4))
+
+    if len(sem) < depth or depth >= settings.top_n_semantic:
+        path["depth"] = "exhausted"
+    elif gap >= settings.adaptive_gap_threshold or entropy <= settings.adaptive_entropy_threshold:
+        path["depth"] = "shallow"
+    elif _over_budget(settings, t0):
+        path["depth"] = "shallow_budget"
+    else:
+        sem = sem + qdrant_semantic_search(
+            client, settings, query, embeddings,
+            limit=settings.top_n_semantic - depth, offset=depth, **search
+        )
+        path["depth"] = "deep"
+    path["candidates"] = len(sem)
+    return sem
+
+def max_pairwise_similarity(vecs: List[List[float]]) -> float:
+    """
+    Return the highest cosine similarity between two distinct vectors.
+
+    Args:
+        vecs: Candidate embedding vectors
+
+    Returns:
+        float: Maximum off-diagonal cosine similarity (0.0 for fewer than two vectors)
+    """
+    import numpy as np
+    if len(vecs) < 2:
+        return 0.0
+    V = np.array(vecs, dtype=float)
+    V /= np.linalg.norm(V, axis=1, keepdims=True) + 1e-12
+    sims = V @ V.T
+    np.fill_diagonal(sims, -1.0)
+    return float(sims.max())
+
+def record_search_path(path: Dict[str, Any], t0: float, trace: Optional[Dict[str, Any]] = None):
+    """
+    Store the path taken by one hybrid_search call.
+
+    The path label (e.g. "adaptive/shallow/scoped/mmr_skipped_diverse") is counted
+    in SEARCH_PATH_COUNTS and the full record appended to SEARCH_PATH_LOG, so the
+    savings of adaptive mode can be measured over many queries.
+
+    Args:
+        path: Decisions taken during the search
+        t0: perf_counter timestamp of the start of the search
+        trace: Optional dictionary filled with the same record for the caller
+    """
+    path["elapsed_ms"] = round(_elapsed_ms(t0), 3)
+    path["label"] = "/".join(
+        str(path[key]) for key in ("mode", "depth", "prefilter", "mmr") if key in path
+    )
+    SEARCH_PATH_COUNTS[path["label"]] += 1
+    SEARCH_PATH_LOG.append(dict(path))
+    if trace is not None:
+        trace.update(path)
+
 def hybrid_search(
     client: QdrantClient,
     settings: Settings,
     query: str,
-    embeddings: AzureOpenAIEmbeddings
+    embeddings: AzureOpenAIEmbeddings,
+    trace: Optional[Dict[str, Any]] = None
 ):
     """
     Perform hybrid search combining semantic similarity and text-based matching.
@@ -975,12 +1516,17 @@ def hybrid_search(
         settings: Configuration object containing search parameters
         query: User's search query string
         embeddings: Embedding model for semantic search
+        trace: Optional dictionary filled with the path taken (see record_search_path)
         
     Returns:
         List[ScoredPoint]: Ranked list of relevant document chunks
         
     Hybrid Search Strategy Overview:
     
+    0. RESULT CACHE (Optional):
+       - Looks up the normalized query in the versioned retrieval cache
+       - A hit returns the cached ranking, hydrated from the chunk store
+        
     1. SEMANTIC SEARCH (Vector Similarity):
        - Converts query to embedding vector
        - Performs approximate nearest neighbor search using HNSW index
@@ -1089,16 +1635,52 @@ def hybrid_search(
     - Low text_boost (0.1-0.2): Facts over style
     - MMR optional: Precision over diversity
     """
-    # (1) semantica
-    sem = qdrant_semantic_search(
-        client, settings, query, embeddings,
-        limit=settings.top_n_semantic, with_vectors=True
-    )
+    t0 = time.perf_counter()
+    adaptive = settings.adaptive_search
+    path: Dict[str, Any] = {"mode": "adaptive" if adaptive else "full"}
+
+    # (0) cache dei risultati: un hit evita embedding, ANN e MMR
+    cache = get_retrieval_cache(settings) if settings.retrieval_cache_enabled else None
+    if cache is not None:
+        ranked = cache.get(query, settings)
+        if ranked is not None:
+            path.update(mode="cache", depth="hit")
+            record_search_path(path, t0, trace)
+            points = [ScoredPoint(id=pid, version=0, score=score) for pid, score in ranked]
+            return hydrate_payloads(client, settings, points)
+
+    # (1) semantica: solo id, score e (per MMR) vettori; i testi arrivano dopo
+    qv = embeddings.embed_query(query)
+    if adaptive:
+        sem = adaptive_semantic_candidates(client, settings, query, embeddings, qv, path, t0)
+    else:
+        sem = qdrant_semantic_search(
+            client, settings, query, embeddings,
+            limit=settings.top_n_semantic,
+            with_vectors=settings.use_mmr,
+            with_payload=settings.search_with_payload,
+            query_vector=qv,
+        )
+        path.update(depth="fixed", candidates=len(sem))
     if not sem:
+        record_search_path(path, t0, trace)
+        if cache is not None:
+            cache.set(query, settings, [])
         return []
 
-    # (2) full-text prefilter (id)
-    text_ids = set(qdrant_text_prefilter_ids(client, settings, query, settings.top_n_text))
+    # (2) full-text prefilter (id); in adattivo solo sui candidati semantici
+    if adaptive and _over_budget(settings, t0):
+        text_ids = set()
+        path["prefilter"] = "skipped_budget"
+    elif adaptive:
+        text_ids = set(qdrant_text_prefilter_ids(
+            client, settings, query, settings.top_n_text,
+            candidate_ids=[p.id for p in sem]
+        ))
+        path["prefilter"] = "scoped"
+    else:
+        text_ids = set(qdrant_text_prefilter_ids(client, settings, query, settings.top_n_text))
+        path["prefilter"] = "full"
 
     # Normalizzazione score semantici per fusione
     scores = [p.score for p in sem]
@@ -1117,20 +1699,32 @@ def hybrid_search(
 
     # ordina per fused_score desc
     fused.sort(key=lambda t: t[1], reverse=True)
+    top_k = [p for _, _, p in fused[:settings.final_k]]
 
     # MMR opzionale per diversificare i top-K
-    if settings.use_mmr:
-        qv = embeddings.embed_query(query)
+    if not settings.use_mmr:
+        path["mmr"] = "disabled"
+        picked = top_k
+    elif adaptive and _over_budget(settings, t0):
+        path["mmr"] = "skipped_budget"
+        picked = top_k
+    elif adaptive and max_pairwise_similarity([p.vector for p in top_k]) < settings.mmr_skip_similarity:
+        # i primi final_k sono già abbastanza diversi tra loro
+        path["mmr"] = "skipped_diverse"
+        picked = top_k
+    else:
         # prendiamo i primi N dopo fusione (es. 30) e poi MMR per final_k
         N = min(len(fused), max(settings.final_k * 5, settings.final_k))
         cut = fused[:N]
         vecs = [sem[i].vector for i, _, _ in cut]
         mmr_idx = mmr_select(qv, vecs, settings.final_k, settings.mmr_lambda)
         picked = [cut[i][2] for i in mmr_idx]
-        return picked
+        path["mmr"] = "run"
 
-    # altrimenti, prendi i primi final_k dopo fusione
-    return [p for _, _, p in fused[:settings.final_k]]
+    record_search_path(path, t0, trace)
+    if cache is not None:
+        cache.set(query, settings, picked)
+    return hydrate_payloads(client, settings, picked)
 
 # =========================
 # Prompt/Chain per generazione con citazioni
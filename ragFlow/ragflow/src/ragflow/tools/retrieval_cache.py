@@ -0,0 +1,102 @@
+"""Versioned cache of hybrid search results.
+
+Caches the final ranked point IDs (and scores) returned by ``hybrid_search``
+keyed by the normalized query, a fingerprint of the RAG ``Settings`` and a
+per-collection version counter. Ingestion bumps the counter, so entries
+computed before a reindex are never served afterwards.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from ragflow.cache import SqliteStore, TTLCache, fingerprint, normalize_query
+
+
+class RetrievalCache:
+    """In-process LRU/TTL cache of ranked point IDs, optionally backed by SQLite.
+
+    Args:
+        max_size (int): Maximum number of in-process entries.
+        ttl_s (float): Time-to-live of an entry in seconds.
+        path (str): Optional SQLite file shared by every process on the host.
+    """
+
+    def __init__(self, max_size: int = 256, ttl_s: float = 600.0, path: str = ""):
+        self.memory = TTLCache(max_size=max_size, ttl_s=ttl_s)
+        self.store: Optional[SqliteStore] = None
+        self.versions: Optional[SqliteStore] = None
+        self._local_versions: Dict[str, int] = {}
+        if path:
+            self.store = SqliteStore(path, "retrieval", max_entries=max_size * 8, ttl_s=ttl_s)
+            self.versions = SqliteStore(path, "retrieval_versions")
+
+    def collection_version(self, collection: str) -> int:
+        """Return the current version counter of ``collection``."""
+        if self.versions is not None:
+            return int(self.versions.get(collection, 0))
+        return self._local_versions.get(collection, 0)
+
+    def bump_version(self, collection: str) -> int:
+        """Invalidate every cached result of ``collection``.
+
+        Args:
+            collection (str): Name of the reindexed collection.
+
+        Returns:
+            int: The new version counter.
+        """
+        version = self.collection_version(collection) + 1
+        if self.versions is not None:
+            self.versions.set(collection, version)
+        self._local_versions[collection] = version
+        return version
+
+    def key(self, query: str, settings: Any) -> str:
+        """Build the cache key for ``query`` under ``settings``."""
+        version = self.collection_version(settings.collection)
+        return f"{settings.collection}:{version}:{fingerprint(settings)}:{normalize_query(query)}"
+
+    def get(self, query: str, settings: Any) -> Optional[List[Tuple[Any, float]]]:
+        """Return the cached ``(point_id, score)`` ranking or None on a miss."""
+        key = self.key(query, settings)
+        ranked = self.memory.get(key)
+        if ranked is None and self.store is not None:
+            stored = self.store.get(key)
+            if stored is not None:
+                ranked = [tuple(item) for item in stored]
+                self.memory.set(key, ranked)
+        return ranked
+
+    def set(self, query: str, settings: Any, points: List[Any]) -> None:
+        """Cache the ranking of ``points`` (ScoredPoint-like objects)."""
+        key = self.key(query, settings)
+        ranked = [(p.id, p.score) for p in points]
+        self.memory.set(key, ranked)
+        if self.store is not None:
+            self.store.set(key, ranked)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss statistics of the in-process layer."""
+        return self.memory.stats()
+
+
+# Istanza globale
+_retrieval_cache: Optional[RetrievalCache] = None
+
+
+def get_retrieval_cache(settings: Any) -> RetrievalCache:
+    """Return the process-wide retrieval cache, creating it from ``settings`` on first use.
+
+    Args:
+        settings: RAG ``Settings`` providing the retrieval_cache_* parameters.
+
+    Returns:
+        RetrievalCache: The shared cache.
+    """
+    global _retrieval_cache  # pylint: disable=global-statement
+    if _retrieval_cache is None:
+        _retrieval_cache = RetrievalCache(
+            max_size=settings.retrieval_cache_size,
+            ttl_s=settings.retrieval_cache_ttl_s,
+            path=settings.retrieval_cache_path,
+        )
+    return _retrieval_cache
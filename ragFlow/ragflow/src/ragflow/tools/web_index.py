@@ -0,0 +1,97 @@
+"""Ephemeral in-memory index over the fetched web pages of one search.
+
+Sending whole pages to the web research agent wastes prompt tokens and LLM
+time. `rank_web_passages` chunks the pages fetched by ``page_fetcher``,
+embeds the chunks through the cached embedding layer, loads them into a
+throwaway in-memory Qdrant collection and runs the same ``hybrid_search``
+(semantic candidates, full-text boost, MMR) as the medical RAG path. Only
+the top passages are passed on; the collection is dropped right after.
+
+Every search uses its own in-memory client and its own collection name, so
+concurrent flows never see each other's pages. The index is built with
+``shared_caches=False``: payloads travel with the search results instead of
+being mirrored in the process-wide chunk store, and creating or filling the
+collection leaves the chunk store and the retrieval cache of the medical RAG
+collection untouched. The retrieval cache is also disabled for the search
+itself, since the content changes with every search.
+"""
+
+import dataclasses
+import uuid
+import warnings
+from typing import Any, List, Sequence
+
+from langchain.schema import Document  # pylint: disable=import-error
+from qdrant_client import QdrantClient  # pylint: disable=import-error
+
+from ragflow.runtime import FLOW_SETTINGS
+from ragflow.tools.page_fetcher import FetchedPage
+from ragflow.tools.rag_tool import (
+    SETTINGS,
+    Settings,
+    get_embeddings,
+    hybrid_search,
+    recreate_collection_for_rag,
+    split_documents,
+    upsert_chunks,
+)
+
+WEB_COLLECTION_PREFIX = "web_ephemeral"
+
+
+def web_index_settings() -> Settings:
+    """Return the RAG settings of a new ephemeral web collection (unique name)."""
+    top_k = FLOW_SETTINGS.web_index_top_k
+    return dataclasses.replace(
+        SETTINGS,
+        collection=f"{WEB_COLLECTION_PREFIX}_{uuid.uuid4().hex[:12]}",
+        storage_profile="low-latency",
+        chunk_size=FLOW_SETTINGS.web_index_chunk_size,
+        chunk_overlap=FLOW_SETTINGS.web_index_chunk_size // 6,
+        top_n_semantic=max(top_k * 4, 20),
+        final_k=top_k,
+        adaptive_search=False,
+        search_with_payload=True,
+        retrieval_cache_enabled=False,
+        shared_caches=False,
+    )
+
+
+def rank_web_passages(
+    query: str, pages: Sequence[FetchedPage], embeddings: Any = None, lang: str = ""
+) -> List[Any]:
+    """Return the passages of ``pages`` most relevant to ``query``.
+
+    Args:
+        query (str): The search query.
+        pages (Sequence[FetchedPage]): Pages fetched for the search.
+        embeddings: Embedding model; defaults to the shared cached embeddings.
+        lang (str): Language of the search region ("" when unknown).
+
+    Returns:
+        List[Any]: Scored points whose payload holds ``text``, ``source`` (URL)
+        and ``title``, best first.
+    """
+    documents = [
+        Document(
+            page_content=page.text,
+            metadata={"id": page.url, "source": page.url, "title": page.title, "lang": lang},
+        )
+        for page in pages
+        if page.text.strip()
+    ]
+    if not documents:
+        return []
+    embeddings = embeddings or get_embeddings()
+    settings = web_index_settings()
+    chunks = split_documents(documents, settings)
+    client = QdrantClient(location=":memory:")
+    try:
+        with warnings.catch_warnings():
+            # Qdrant locale: gli indici di payload non hanno effetto (nessun danno)
+            warnings.simplefilter("ignore")
+            recreate_collection_for_rag(client, settings, len(embeddings.embed_query(query)))
+        upsert_chunks(client, settings, chunks, embeddings)
+        return hybrid_search(client, settings, query, embeddings)
+    finally:
+        client.close()
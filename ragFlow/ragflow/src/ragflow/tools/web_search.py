@@ -0,0 +1,275 @@
+"""Pooled, cached and deduplicated web search backends.
+
+``search_web`` used to open a new ``DDGS(verify=False)`` session (and its
+HTTP clients) on every call, and repeated questions went back to DuckDuckGo
+each time. `WebSearcher` sits in front of a search backend and adds:
+
+* a TTL result cache keyed by ``(normalized query, region, max_results)``;
+* in-flight deduplication: concurrent identical searches (e.g. the
+  speculative prefetch and the crew's own tool call) share one request;
+* latency and hit-rate metrics (`WebSearcher.stats`).
+
+Two backends are available: `DDGSBackend`, which keeps a small process-wide
+pool of ``DDGS`` sessions, and `HTTPBackend`, which queries any HTTP
+endpoint returning the same JSON records (``title``, ``href``, ``body``)
+through one pooled ``httpx`` client. The latter is selected with
+``RAGFLOW_WEB_SEARCH_BACKEND=http`` and ``RAGFLOW_WEB_SEARCH_URL``, and is
+what ``python -m ragflow.bench.web_search`` uses against a local stand-in
+server.
+"""
+
+import queue
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Deque, Dict, Hashable, List, Optional, Tuple
+
+from ragflow.cache import TTLCache, normalize_query
+from ragflow.runtime import FLOW_SETTINGS
+from ragflow.tracing import trace_call
+
+SearchResults = List[Dict[str, str]]
+
+
+class DDGSBackend:
+    """DuckDuckGo search through a pool of reusable ``DDGS`` sessions.
+
+    Args:
+        pool_size (int): Maximum number of sessions used concurrently.
+        timeout_s (float): Request timeout of each session.
+    """
+
+    name = "ddgs"
+
+    def __init__(self, pool_size: int = 2, timeout_s: float = 10.0):
+        self.timeout_s = timeout_s
+        self._sessions: "queue.LifoQueue[Any]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    def _session(self):
+        try:
+            return self._sessions.get_nowait()
+        except queue.Empty:
+            from ddgs import DDGS  # pylint: disable=import-error,import-outside-toplevel
+            return DDGS(timeout=int(self.timeout_s), verify=False)
+
+    def search(self, query: str, region: str, max_results: int) -> SearchResults:
+        """Return the raw DuckDuckGo text results for ``query``.
+
+        ``ddgs`` reports an empty result set as an exception: it becomes an empty
+        list. Its timeouts become `TimeoutError` and the other failures (rate
+        limits included) `OSError`, like those of `HTTPBackend`.
+        """
+        # pylint: disable=import-error,import-outside-toplevel
+        from ddgs.exceptions import DDGSException, TimeoutException
+
+        with self._slots:
+            session = self._session()
+            try:
+                results = list(
+                    session.text(query, region=region, safesearch="off", max_results=max_results)
+                )
+            except TimeoutException as exc:
+                raise TimeoutError(str(exc)) from exc
+            except DDGSException as exc:
+                if "no results" not in str(exc).lower():
+                    raise OSError(str(exc)) from exc
+                results = []
+            # Dopo un errore la sessione è in stato incerto e non torna nel pool
+            self._sessions.put(session)
+        return results
+
+    def close(self) -> None:
+        """Drop the pooled sessions."""
+        while not self._sessions.empty():
+            self._sessions.get_nowait()
+
+
+class HTTPBackend:
+    """Search through an HTTP endpoint with a pooled keep-alive client.
+
+    The endpoint receives ``GET <url>?q=...&region=...&max_results=...`` and
+    answers with a JSON list of results (or ``{"results": [...]}``) shaped like
+    the DuckDuckGo ones.
+
+    Args:
+        url (str): Search endpoint.
+        pool_size (int): Maximum concurrent connections.
+        timeout_s (float): Request timeout.
+    """
+
+    name = "http"
+
+    def __init__(self, url: str, pool_size: int = 2, timeout_s: float = 10.0):
+        import httpx  # pylint: disable=import-error,import-outside-toplevel
+
+        if not url:
+            raise ValueError("RAGFLOW_WEB_SEARCH_URL è obbligatorio con il backend http")
+        self.url = url
+        self.client = httpx.Client(
+            timeout=timeout_s,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    def search(self, query: str, region: str, max_results: int) -> SearchResults:
+        """Return the results of the endpoint for ``query``."""
+        import httpx  # pylint: disable=import-error,import-outside-toplevel
+
+        try:
+            response = self.client.get(
+                self.url, params={"q": query, "region": region, "max_results": max_results}
+            )
+            response.raise_for_status()
+            payload = response.json()
+        except httpx.TimeoutException as exc:
+            raise TimeoutError(str(exc)) from exc
+        except httpx.HTTPError as exc:
+            raise OSError(str(exc)) from exc
+        if isinstance(payload, dict):
+            payload = payload.get("results", [])
+        return list(payload)[:max_results]
+
+    def close(self) -> None:
+        """Close the pooled connections."""
+        self.client.close()
+
+
+class WebSearcher:
+    """Cache and in-flight deduplication in front of a search backend.
+
+    Args:
+        backend: Object with a ``search(query, region, max_results)`` method.
+        cache_size (int): Maximum cached result lists (LRU eviction).
+        ttl_s (float): Time-to-live of a cached result list.
+        latency_window (int): Number of recent backend latencies kept for the metrics.
+    """
+
+    def __init__(self, backend: Any, cache_size: int = 256, ttl_s: float = 900.0, latency_window: int = 1000):
+        self.backend = backend
+        self.cache = TTLCache(max_size=cache_size, ttl_s=ttl_s)
+        self.shared = 0
+        self.requests = 0
+        self.errors = 0
+        self._inflight: Dict[Hashable, Future] = {}
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(query: str, region: str, max_results: int) -> Tuple[str, str, int]:
+        """Build the cache key of a search."""
+        return normalize_query(query), region, max_results
+
+    def search(self, query: str, region: str = "it-it", max_results: int = 3) -> SearchResults:
+        """Return the results of ``query``, from the cache when possible.
+
+        Args:
+            query (str): The search query.
+            region (str): DuckDuckGo region code.
+            max_results (int): Number of results.
+
+        Returns:
+            SearchResults: The result records (``title``, ``href``, ``body``).
+
+        Raises:
+            OSError: If the backend request fails.
+            TimeoutError: If the backend request times out.
+            ValueError: If the backend rejects the query.
+        """
+        key = self.key(query, region, max_results)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.shared += 1
+        if not owner:
+            # Stessa ricerca già in corso: si attende il suo risultato
+            return future.result()
+
+        started = time.perf_counter()
+        try:
+            with trace_call("web"):
+                results = self.backend.search(query, region, max_results)
+        except BaseException as exc:
+            with self._lock:
+                self.errors += 1
+                del self._inflight[key]
+            future.set_exception(exc)
+            raise
+        latency = time.perf_counter() - started
+        if results:
+            self.cache.set(key, results)
+        with self._lock:
+            self.requests += 1
+            self._latencies.append(latency)
+            del self._inflight[key]
+        future.set_result(results)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache, deduplication and backend latency metrics."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+        cache = self.cache.stats()
+        lookups = cache["hits"] + cache["misses"]
+        stats: Dict[str, Any] = {
+            "backend": self.backend.name,
+            "lookups": lookups,
+            "cache_hits": cache["hits"],
+            "shared": self.shared,
+            "requests": self.requests,
+            "errors": self.errors,
+            "hit_rate": round((cache["hits"] + self.shared) / lookups, 4) if lookups else 0.0,
+            "p50_ms": 0.0,
+            "p95_ms": 0.0,
+        }
+        if latencies:
+            stats["p50_ms"] = round(statistics.median(latencies) * 1000.0, 2)
+            stats["p95_ms"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000.0, 2)
+        return stats
+
+
+def region_language(region: str) -> str:
+    """Return the language of a DuckDuckGo region code ("it-it" → "it", "wt-wt" → "")."""
+    language = region.rsplit("-", 1)[-1].lower()
+    return "" if language == "wt" else language
+
+
+def build_backend(name: str, url: str = "", pool_size: int = 2, timeout_s: float = 10.0):
+    """Instantiate the search backend called ``name`` ("ddgs" or "http")."""
+    if name == "ddgs":
+        return DDGSBackend(pool_size=pool_size, timeout_s=timeout_s)
+    if name == "http":
+        return HTTPBackend(url, pool_size=pool_size, timeout_s=timeout_s)
+    raise ValueError(f"Backend di ricerca sconosciuto: {name}")
+
+
+# Istanza globale
+_web_searcher: Optional[WebSearcher] = None
+_web_searcher_lock = threading.Lock()
+
+
+def get_web_searcher() -> WebSearcher:
+    """Return the process-wide web searcher configured by `FLOW_SETTINGS`."""
+    global _web_searcher  # pylint: disable=global-statement
+    with _web_searcher_lock:
+        if _web_searcher is None:
+            backend = build_backend(
+                FLOW_SETTINGS.web_search_backend,
+                url=FLOW_SETTINGS.web_search_url,
+                pool_size=FLOW_SETTINGS.web_search_pool_size,
+                timeout_s=FLOW_SETTINGS.web_search_timeout_s,
+            )
+            _web_searcher = WebSearcher(
+                backend,
+                cache_size=FLOW_SETTINGS.web_cache_size,
+                ttl_s=FLOW_SETTINGS.web_cache_ttl_s,
+            )
+        return _web_searcher
@@ -0,0 +1,256 @@
+"""Per-run cost, token and latency accounting of the Intelligent Search Flow.
+
+A run (one question) opens a `RunTrace`. Every flow step decorated with
+`traced_step` is timed, and the instrumented calls made while it runs are
+charged to it:
+
+* ``llm``: LLM calls (CrewAI ``CachedLLM`` and the LangChain chain of the RAG
+  system), with cache hits and prompt/completion tokens;
+* ``embedding``: embedding model calls and embedded texts;
+* ``qdrant``: Qdrant queries, scrolls, retrievals and upserts;
+* ``web``: web searches and result page fetches.
+
+The active run is kept in a context variable and, for the worker threads
+CrewAI and the tools start without copying the context, in a process-wide
+fallback used only while a single run is active (with concurrent runs, as
+in the service, such calls are not charged rather than charged to the wrong
+question). At the end of the run the trace is appended to
+``.ragflow/traces.jsonl``; ``python -m ragflow.tracing`` prints the aggregate
+report (p50/p95 latency, LLM calls and tokens per route).
+"""
+
+import argparse
+import contextvars
+import functools
+import json
+import os
+import statistics
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from ragflow.runtime import FLOW_SETTINGS
+
+CALL_KINDS = ("llm", "embedding", "qdrant", "web")
+
+
+class RunTrace:
+    """Accounting of one question through the flow.
+
+    Args:
+        query (str): The user's question (may be set later).
+    """
+
+    def __init__(self, query: str = ""):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.query = query
+        self.route = ""
+        self.started = time.time()
+        self.seconds = 0.0
+        self.steps: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, step: str, **amounts: float) -> None:
+        """Add ``amounts`` (counters or ``<kind>_s`` seconds) to ``step``."""
+        with self._lock:
+            bucket = self.steps.setdefault(step, defaultdict(float))
+            for name, amount in amounts.items():
+                bucket[name] += amount
+
+    def totals(self) -> Dict[str, float]:
+        """Return every counter and duration summed over the steps."""
+        totals: Dict[str, float] = defaultdict(float)
+        with self._lock:
+            for bucket in self.steps.values():
+                for name, amount in bucket.items():
+                    totals[name] += amount
+        return dict(totals)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the JSON record of the run."""
+        with self._lock:
+            steps = {name: {k: round(v, 4) for k, v in bucket.items()} for name, bucket in self.steps.items()}
+        return {
+            "run_id": self.run_id,
+            "ts": self.started,
+            "query": self.query,
+            "route": self.route,
+            "seconds": round(self.seconds or time.time() - self.started, 4),
+            "totals": {k: round(v, 4) for k, v in self.totals().items()},
+            "steps": steps,
+        }
+
+    def format(self) -> str:
+        """Return a compact text report of the run so far."""
+        totals = self.totals()
+        elapsed = self.seconds or time.time() - self.started
+        lines = [
+            f"🧾 Costo della domanda: {elapsed:.2f}s, {totals.get('llm_calls', 0):.0f} chiamate LLM "
+            f"({totals.get('llm_cached', 0):.0f} dalla cache), "
+            f"{totals.get('prompt_tokens', 0):.0f}+{totals.get('completion_tokens', 0):.0f} token, "
+            f"{totals.get('embedding_calls', 0):.0f} embedding, {totals.get('qdrant_calls', 0):.0f} Qdrant, "
+            f"{totals.get('web_calls', 0):.0f} web"
+        ]
+        with self._lock:
+            steps = [(name, dict(bucket)) for name, bucket in self.steps.items()]
+        for name, bucket in steps:
+            calls = ", ".join(
+                f"{kind} {bucket[kind + '_s']:.2f}s" for kind in CALL_KINDS if bucket.get(kind + "_s")
+            )
+            lines.append(f"   - {name}: {bucket.get('step_s', 0.0):.2f}s" + (f" ({calls})" if calls else ""))
+        return "\n".join(lines)
+
+
+_trace_var: contextvars.ContextVar = contextvars.ContextVar("ragflow_trace", default=None)
+_step_var: contextvars.ContextVar = contextvars.ContextVar("ragflow_step", default=None)
+# Fallback per i thread avviati senza copiare il contesto (task asincroni, prefetch)
+_active_traces: List[RunTrace] = []
+_active_lock = threading.Lock()
+_active_step: Optional[str] = None
+
+
+def _single_active_trace() -> Optional[RunTrace]:
+    with _active_lock:
+        return _active_traces[0] if len(_active_traces) == 1 else None
+
+
+def current_trace() -> Optional[RunTrace]:
+    """Return the trace of the run in progress, if any."""
+    return _trace_var.get() or _single_active_trace()
+
+
+def current_step() -> str:
+    """Return the name of the flow step in progress."""
+    return _step_var.get() or _active_step or "(fuori dagli step)"
+
+
+def record(**amounts: float) -> None:
+    """Charge ``amounts`` to the current step of the run in progress (no-op otherwise)."""
+    trace = current_trace()
+    if trace is not None:
+        trace.add(current_step(), **amounts)
+
+
+@contextmanager
+def trace_call(kind: str, count: int = 1) -> Iterator[None]:
+    """Count and time ``count`` calls of ``kind`` ("llm", "embedding", "qdrant" or "web")."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(**{f"{kind}_calls": count, f"{kind}_s": time.perf_counter() - started})
+
+
+@contextmanager
+def trace_run(query: str = "") -> Iterator[Optional[RunTrace]]:
+    """Open the trace of one run and append it to the JSONL log when it ends.
+
+    Yields:
+        Optional[RunTrace]: The trace, or None when tracing is disabled.
+    """
+    if not FLOW_SETTINGS.trace_enabled:
+        yield None
+        return
+    trace = RunTrace(query)
+    token = _trace_var.set(trace)
+    with _active_lock:
+        _active_traces.append(trace)
+    try:
+        yield trace
+    finally:
+        trace.seconds = time.time() - trace.started
+        _trace_var.reset(token)
+        with _active_lock:
+            _active_traces.remove(trace)
+        log_trace(trace)
+
+
+def traced_step(method: Callable) -> Callable:
+    """Decorator timing a flow step and charging the calls it makes to it.
+
+    Place it below the ``@start``/``@listen``/``@router`` decorator.
+    """
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        global _active_step  # pylint: disable=global-statement
+        name = method.__name__
+        token = _step_var.set(name)
+        previous, _active_step = _active_step, name
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            record(step_s=time.perf_counter() - started)
+            _step_var.reset(token)
+            _active_step = previous
+
+    return wrapper
+
+
+def log_trace(trace: RunTrace, path: Optional[str] = None) -> None:
+    """Append ``trace`` to the JSONL trace log."""
+    path = path or FLOW_SETTINGS.trace_log_path
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps(trace.to_dict(), ensure_ascii=False) + "\n")
+
+
+def read_traces(path: str) -> List[Dict[str, Any]]:
+    """Read every run record of the JSONL trace log."""
+    with open(path, encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def aggregate(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """Aggregate run records per route.
+
+    Returns:
+        Dict[str, Dict[str, float]]: For each route the number of runs, p50/p95
+        latency, mean LLM calls, mean and total tokens and mean embedding calls.
+    """
+    by_route: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for record_ in records:
+        by_route[record_.get("route") or "?"].append(record_)
+    report = {}
+    for route, runs in sorted(by_route.items()):
+        seconds = [r["seconds"] for r in runs]
+        tokens = [r["totals"].get("prompt_tokens", 0) + r["totals"].get("completion_tokens", 0) for r in runs]
+        report[route] = {
+            "runs": len(runs),
+            "p50_s": round(statistics.median(seconds), 3),
+            "p95_s": round(_percentile(seconds, 0.95), 3),
+            "llm_calls": round(statistics.mean(r["totals"].get("llm_calls", 0) for r in runs), 2),
+            "tokens": round(statistics.mean(tokens), 1),
+            "tokens_total": sum(tokens),
+            "embedding_calls": round(statistics.mean(r["totals"].get("embedding_calls", 0) for r in runs), 2),
+        }
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Print the aggregate report of the trace log."""
+    parser = argparse.ArgumentParser(description="Report aggregato delle tracce del flow")
+    parser.add_argument("--log", default=FLOW_SETTINGS.trace_log_path)
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.log):
+        print(f"❌ Nessuna traccia trovata in {args.log}")
+        return
+    report = aggregate(read_traces(args.log))
+    print(f"{'rotta':<14} {'run':>5} {'p50_s':>8} {'p95_s':>8} {'LLM':>6} {'token':>8} {'token_tot':>10} {'emb':>5}")
+    for route, row in report.items():
+        print(
+            f"{route:<14} {row['runs']:>5} {row['p50_s']:>8.2f} {row['p95_s']:>8.2f} {row['llm_calls']:>6.1f} "
+            f"{row['tokens']:>8.0f} {row['tokens_total']:>10.0f} {row['embedding_calls']:>5.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
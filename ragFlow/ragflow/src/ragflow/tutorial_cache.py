@@ -0,0 +1,273 @@
+"""Persistent cache of generated math tutorials keyed by normalized topic.
+
+Explanation questions repeat a lot ("Spiega come risolvere le equazioni di
+secondo grado" is also the flow's default example) and each one costs the
+whole four-task ``TutorialCrew`` pipeline. The cache stores every generated
+tutorial under its normalized topic (lead-in phrases such as "spiegami come"
+and Italian stopwords removed) in the local SQLite store, with LRU eviction
+bounded both by number of entries and by total size.
+
+Lookups first try the exact normalized topic, then the most similar stored
+topic (Jaccard similarity of the stemmed topic words, so "risolvere" and
+"risolvono" match while "primo grado" and "secondo grado" do not); matches
+at or above ``tutorial_cache_similarity`` are returned immediately. Entries older than ``tutorial_cache_stale_s`` are still
+served (stale-while-revalidate) while a background thread regenerates them.
+
+Like the routing cache, entries are tied to a fingerprint of the tutorial
+prompts (``crews/tutorial_crew/config/*.yaml``) and can be cleared with
+``python -m ragflow.tutorial_cache --clear``.
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from ragflow.cache import SqliteStore, normalize_query
+from ragflow.runtime import FLOW_SETTINGS
+
+TUTORIAL_CONFIG_DIR = Path(__file__).parent / "crews" / "tutorial_crew" / "config"
+
+_LEAD_IN = re.compile(
+    r"^(?:(?:mi|ci|per favore|puoi|potresti)\s+)*"
+    r"(?:spiega(?:mi|re)?|illustra(?:mi)?|descrivi(?:mi)?|insegna(?:mi)?|parlami\s+di|"
+    r"fammi\s+(?:un\s+)?tutorial\s+(?:su|di)|tutorial\s+(?:su|di)|"
+    r"(?:che\s+)?cos(?:'|\s)?(?:è|e)|cosa\s+(?:sono|è|e)|explain)\s*",
+)
+_STOPWORDS = {
+    "il", "lo", "la", "i", "gli", "le", "l'", "un", "uno", "una", "un'", "di", "a",
+    "da", "in", "con", "su", "per", "tra", "fra", "e", "o", "del", "della", "dei",
+    "delle", "degli", "dello", "al", "alla", "ai", "alle", "nel", "nella", "nei",
+    "nelle", "sul", "sulla", "come", "si", "che", "mi", "ci", "the", "of", "how", "to",
+}
+
+
+def normalize_topic(topic: str) -> str:
+    """Reduce an explanation question to its topic words.
+
+    Args:
+        topic (str): The user's question.
+
+    Returns:
+        str: Lower-cased topic without lead-in phrase, punctuation and stopwords.
+    """
+    text = _LEAD_IN.sub("", normalize_query(topic))
+    text = re.sub(r"[^\w\s']", " ", text).replace("'", "' ")
+    words = [w for w in text.split() if w not in _STOPWORDS]
+    return " ".join(words)
+
+
+def topic_terms(key: str, stem: int = 5) -> FrozenSet[str]:
+    """Return the topic words of a normalized topic truncated to a crude stem."""
+    return frozenset(word[:stem] for word in key.split())
+
+
+def topic_similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Jaccard similarity of two sets of topic terms."""
+    union = a | b
+    return len(a & b) / len(union) if union else 0.0
+
+
+def tutorial_prompt_fingerprint() -> str:
+    """Return a hash of the tutorial agents and tasks YAML configuration."""
+    digest = hashlib.sha256()
+    for name in ("agents.yaml", "tasks.yaml"):
+        digest.update((TUTORIAL_CONFIG_DIR / name).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+@dataclass
+class CachedTutorial:
+    """A tutorial returned by the cache.
+
+    Attributes:
+        topic (str): The original question the tutorial was generated for.
+        tutorial (str): The tutorial text.
+        similarity (float): 1.0 for an exact topic match, the topic similarity otherwise.
+        age_s (float): Seconds since the tutorial was generated.
+        stale (bool): Whether the entry is due for regeneration.
+    """
+    topic: str
+    tutorial: str
+    similarity: float
+    age_s: float
+    stale: bool
+
+
+class TutorialCache:
+    """SQLite-backed tutorial cache with near-duplicate topic matching.
+
+    Args:
+        path (str): SQLite file.
+        max_entries (int): Maximum number of tutorials (LRU eviction).
+        max_bytes (int): Maximum total size of the stored tutorials.
+        similarity (float): Minimum topic similarity of a near-duplicate match.
+        stale_s (float): Age after which an entry is served stale and regenerated.
+    """
+
+    def __init__(self, path: str, max_entries: int, max_bytes: int, similarity: float, stale_s: float):
+        self.store = SqliteStore(path, "tutorials", max_entries=max_entries, max_bytes=max_bytes)
+        self.meta = SqliteStore(path, "tutorials_meta")
+        self.similarity = similarity
+        self.stale_s = stale_s
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self._index: Dict[str, FrozenSet[str]] = {}
+        self._revalidating: Set[str] = set()
+        self._lock = threading.Lock()
+        self.prompt_fingerprint = tutorial_prompt_fingerprint()
+        if self.meta.get("prompt_fingerprint") != self.prompt_fingerprint:
+            # I prompt dei tutorial sono cambiati: i tutorial salvati non valgono più
+            self.invalidate()
+
+    def _nearest(self, key: str) -> Optional[Tuple[str, float]]:
+        """Return ``(stored_key, similarity)`` of the most similar stored topic."""
+        keys = list(self.store.keys())
+        with self._lock:
+            if set(keys) != set(self._index):
+                # Indice ricostruito quando altre voci sono state aggiunte o rimosse
+                self._index = {k: self._index.get(k) or topic_terms(k) for k in keys}
+            index = dict(self._index)
+        query = topic_terms(key)
+        return max(
+            ((k, topic_similarity(query, terms)) for k, terms in index.items()),
+            key=lambda item: item[1],
+            default=None,
+        )
+
+    def lookup(self, topic: str) -> Optional[CachedTutorial]:
+        """Return the cached tutorial for ``topic`` or a near-duplicate of it.
+
+        Args:
+            topic (str): The user's question.
+
+        Returns:
+            Optional[CachedTutorial]: The match, or None on a miss.
+        """
+        key = normalize_topic(topic)
+        similarity = 1.0
+        entry = self.store.get_with_age(key) if key else None
+        if entry is None and key:
+            nearest = self._nearest(key)
+            if nearest is not None and nearest[1] >= self.similarity:
+                key, similarity = nearest
+                entry = self.store.get_with_age(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if similarity < 1.0:
+            self.near_hits += 1
+        else:
+            self.hits += 1
+        value, age_s = entry
+        return CachedTutorial(
+            topic=value["topic"],
+            tutorial=value["tutorial"],
+            similarity=similarity,
+            age_s=age_s,
+            stale=bool(self.stale_s) and age_s >= self.stale_s,
+        )
+
+    def set(self, topic: str, tutorial: str) -> None:
+        """Store the tutorial generated for ``topic``."""
+        key = normalize_topic(topic)
+        if not key or not tutorial.strip():
+            return
+        self.store.set(key, {"topic": topic, "tutorial": tutorial})
+        with self._lock:
+            self._index[key] = topic_terms(key)
+
+    def revalidate(self, topic: str, generate: Callable[[], str]) -> bool:
+        """Regenerate the tutorial of ``topic`` in a background thread.
+
+        At most one regeneration per topic runs at a time. The thread is not a
+        daemon, so a command-line run waits for it before exiting.
+
+        Args:
+            topic (str): The user's question.
+            generate (Callable[[], str]): Produces the fresh tutorial.
+
+        Returns:
+            bool: True if a regeneration was started.
+        """
+        key = normalize_topic(topic)
+        with self._lock:
+            if key in self._revalidating:
+                return False
+            self._revalidating.add(key)
+
+        def run():
+            try:
+                self.set(topic, generate())
+            except Exception as exc:  # pylint: disable=broad-except
+                print(f"⚠️ Rigenerazione del tutorial fallita: {exc}")
+            finally:
+                with self._lock:
+                    self._revalidating.discard(key)
+
+        threading.Thread(target=run, name="tutorial-revalidate").start()
+        return True
+
+    def invalidate(self) -> None:
+        """Drop every tutorial and record the current prompt fingerprint."""
+        self.store.clear()
+        with self._lock:
+            self._index.clear()
+        self.meta.set("prompt_fingerprint", self.prompt_fingerprint)
+
+    def stats(self) -> Dict[str, float]:
+        """Return size, exact hits, near-duplicate hits, misses and hit rate."""
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            "size": len(self.store),
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.near_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Istanza globale
+_tutorial_cache: Optional[TutorialCache] = None
+
+
+def get_tutorial_cache() -> Optional[TutorialCache]:
+    """Return the process-wide tutorial cache, or None when disabled."""
+    global _tutorial_cache  # pylint: disable=global-statement
+    if not FLOW_SETTINGS.tutorial_cache_enabled:
+        return None
+    if _tutorial_cache is None:
+        _tutorial_cache = TutorialCache(
+            os.path.join(FLOW_SETTINGS.state_dir, "tutorial_cache.sqlite"),
+            max_entries=FLOW_SETTINGS.tutorial_cache_size,
+            max_bytes=FLOW_SETTINGS.tutorial_cache_max_mb * 1024 * 1024,
+            similarity=FLOW_SETTINGS.tutorial_cache_similarity,
+            stale_s=FLOW_SETTINGS.tutorial_cache_stale_s,
+        )
+    return _tutorial_cache
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Inspect or clear the tutorial cache from the command line."""
+    parser = argparse.ArgumentParser(description="Gestione della cache dei tutorial")
+    parser.add_argument("--clear", action="store_true", help="svuota la cache")
+    args = parser.parse_args(argv)
+    cache = get_tutorial_cache()
+    if cache is None:
+        print("Cache dei tutorial disabilitata (RAGFLOW_TUTORIAL_CACHE_ENABLED=0)")
+        return
+    if args.clear:
+        cache.invalidate()
+        print("🧹 Cache dei tutorial svuotata")
+    print(f"Tutorial: {len(cache.store)} — fingerprint prompt: {cache.prompt_fingerprint}")
+    for key in sorted(cache.store.keys()):
+        print(f"  - {key}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""Shared fixtures: a local stand-in for the search service and the result pages."""
+
+import pytest
+
+from ragflow.bench.standin import StandinServer
+
+
+@pytest.fixture
+def standin():
+    """A running `StandinServer` with short latencies, stopped after the test."""
+    with StandinServer(latency_s=0.01, page_latency_s=0.01) as server:
+        yield server
@@ -0,0 +1,36 @@
+"""Tests of the deterministic arithmetic fast path."""
+
+import pytest
+
+from ragflow.tools.arithmetic import extract_expression, try_evaluate
+
+
+@pytest.mark.parametrize(
+    "question, expected",
+    [
+        ("Calcola 5+5", 10),
+        ("Quanto fa 2,5 * 2?", 5.0),
+        ("Calcola complex(1,2)", complex(1, 2)),
+        ("Calcola max(1,2)", 2),
+        ("pow(10,3)", 1000),
+        ("Calcola pow(10,999)", 10 ** 999),
+        ("Quanto fa 10 diviso per 4?", 2.5),
+        ("Calcola la radice quadrata di 16 per 2", 8.0),
+    ],
+)
+def test_fast_path_values(question, expected):
+    result = try_evaluate(question)
+
+    assert result is not None
+    assert result.value == expected
+
+
+@pytest.mark.parametrize("question", ["log(1)", "Calcola log(1) + 1", "log10(1000)"])
+def test_questions_starting_with_log_keep_the_function_name(question):
+    assert extract_expression(question).startswith("log")
+    assert try_evaluate(question) is not None
+
+
+@pytest.mark.parametrize("question", ["Calcola 1.000 + 1", "Quanto fa 15:30?"])
+def test_ambiguous_notation_falls_back_to_the_crew(question):
+    assert try_evaluate(question) is None
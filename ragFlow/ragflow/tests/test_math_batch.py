@@ -0,0 +1,37 @@
+"""Tests of the vectorized batch evaluation of math functions."""
+
+import pytest
+
+from ragflow.tools.math_batch import evaluate_batch
+
+
+def _values(result):
+    return [value for _, value in result.table]
+
+
+def test_polynomial_is_vectorized_with_its_roots():
+    result = evaluate_batch("def f(x):\n    return x**2 - 4", "x=-3:3:61")
+
+    assert result.vectorized
+    assert result.roots == pytest.approx([-2.0, 2.0])
+
+
+def test_sum_is_evaluated_per_point():
+    result = evaluate_batch("def f(x):\n    return sum([x, x]) + 1", "x=0,1,2")
+
+    assert not result.vectorized
+    assert _values(result) == pytest.approx([1.0, 3.0, 5.0])
+
+
+@pytest.mark.parametrize(
+    "code, expected, vectorized",
+    [
+        ("def f(x):\n    return max(x, 1)", [1.0, 1.0, 2.0], True),
+        ("def f(x):\n    return max(x, 1, 1.5)", [1.5, 1.5, 2.0], False),
+    ],
+)
+def test_min_max_are_element_wise(code, expected, vectorized):
+    result = evaluate_batch(code, "x=0,1,2")
+
+    assert result.vectorized is vectorized
+    assert _values(result) == pytest.approx(expected)
@@ -0,0 +1,85 @@
+"""Tests of the validation and sandboxed execution of math functions."""
+
+import time
+
+import pytest
+
+from ragflow.tools.math_executor import (
+    PRELOAD_MODULES,
+    ExecutionTimeout,
+    MathExecutor,
+    run_function,
+    validate_function_code,
+)
+
+# Risale ai globals del modulo tramite il frame di un generatore e raggiunge `os`
+FRAME_ESCAPE = '''
+def f():
+    c = []
+    a = (c[0].gi_frame.f_back.f_back.f_globals for n in [1])
+    c.append(a)
+    for n in a:
+        return n["os"].getpid()
+'''
+
+DUNDER_STRING = '''
+def f():
+    return len(abs.__doc__ if 0 else "__builtins__")
+'''
+
+
+@pytest.mark.parametrize("code", [FRAME_ESCAPE, DUNDER_STRING])
+def test_escape_payloads_are_rejected(code):
+    with pytest.raises(ValueError):
+        validate_function_code(code)
+    with pytest.raises(ValueError):
+        run_function(code)
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "def f():\n    x = []\n    return x.append(1)",
+        "def f():\n    return (1).f_back",
+        "def f():\n    return math.sys",
+        "def f():\n    return a.b",
+        "def f():\n    return tb.tb_frame",
+        "def f():\n    return getattr(math, '__loader__')",
+    ],
+)
+def test_attributes_outside_the_whitelist_are_rejected(code):
+    with pytest.raises(ValueError):
+        validate_function_code(code)
+
+
+@pytest.mark.parametrize(
+    "code, expected",
+    [
+        ("def f():\n    return math.sqrt(16) + sin(pi / 2)", 5.0),
+        ("def f():\n    z = complex(3, 4)\n    return z.real + z.imag", 7.0),
+        ("def f():\n    return sum(n * n for n in range(4))", 14),
+    ],
+)
+def test_math_functions_still_run(code, expected):
+    assert run_function(code) == pytest.approx(expected)
+
+
+def test_process_backend_rejects_the_frame_escape():
+    executor = MathExecutor(workers=1, timeout_s=5.0)
+    try:
+        with pytest.raises(ValueError):
+            executor.run(FRAME_ESCAPE)
+    finally:
+        executor.shutdown()
+
+
+def test_replaced_worker_imports_outside_the_next_job_budget():
+    executor = MathExecutor(workers=1, timeout_s=5.0, preload=PRELOAD_MODULES)
+    try:
+        with pytest.raises(ExecutionTimeout):
+            executor.call(time.sleep, 5, timeout_s=0.2)
+
+        assert executor.call(abs, -3, timeout_s=0.2) == 3
+        assert executor.stats["timeouts"] == 1
+    finally:
+        executor.shutdown()
@@ -0,0 +1,126 @@
+"""Tests of page fetching and main-text extraction against the stand-in server."""
+
+import time
+
+import pytest
+
+from ragflow.tools.page_fetcher import PageFetcher, extract_main_text, select_passages
+
+LONG = "Questo paragrafo è abbastanza lungo da essere considerato testo principale della pagina."
+
+
+@pytest.fixture
+def fetcher():
+    """A `PageFetcher` extracting in a thread, shut down after the test."""
+    page_fetcher = PageFetcher(budget_s=3.0, timeout_s=2.0, per_host=2, extract_workers=0)
+    yield page_fetcher
+    page_fetcher.shutdown()
+
+
+def page_urls(standin, count, **params):
+    """URLs of ``count`` fixture pages, with optional query parameters."""
+    query = "&".join(f"{name}={value}" for name, value in params.items())
+    return [f"{standin.base_url}/pages/{i}" + (f"?{query}" if query else "") for i in range(1, count + 1)]
+
+
+def test_extraction_keeps_article_and_drops_boilerplate():
+    html = (
+        "<html><head><title>Titolo</title><script>var a = 1 < 2;</script></head><body>"
+        "<nav><a href='/'>Home</a></nav><article><h1>Titolo</h1>"
+        f"<p>{LONG}</p><p>Breve.</p></article><footer>Copyright</footer></body></html>"
+    )
+
+    title, text = extract_main_text(html)
+
+    assert title == "Titolo"
+    assert text.splitlines() == ["Titolo", LONG, "Breve."]
+
+
+def test_extraction_without_article_keeps_long_paragraphs():
+    html = f"<body><div>Menu corto</div><p>{LONG}</p><div>{LONG}<br>{LONG}</div></body>"
+
+    assert extract_main_text(html)[1].splitlines() == [LONG, LONG, LONG]
+
+
+def test_unclosed_list_items_in_nav_do_not_hide_the_body():
+    html = (
+        "<html><head><title>T</title></head><body>"
+        "<nav><ul><li>Home<li>Chi siamo<li>Contatti</ul></nav>"
+        f"<p>{LONG}</p><p>{LONG} Fine.</p></body></html>"
+    )
+
+    assert extract_main_text(html) == ("T", f"{LONG}\n{LONG} Fine.")
+
+
+def test_unclosed_options_in_form_do_not_hide_the_body():
+    html = f"<body><form><select><option>A<option>B</select><input></form><p>{LONG}</p></body>"
+
+    assert extract_main_text(html) == ("", LONG)
+
+
+def test_inner_skipped_tag_left_open_is_closed_with_its_parent():
+    html = f"<body><nav><form><input>menu</nav><article><p>{LONG}</p></article></body>"
+
+    assert extract_main_text(html) == ("", LONG)
+
+
+def test_select_passages_prefers_paragraphs_with_query_words():
+    text = "Il meteo di oggi è variabile.\nIl GPS usa i satelliti per la posizione.\nAltro testo."
+
+    assert select_passages(text, "come funziona il GPS satelliti", 60) == "Il GPS usa i satelliti per la posizione."
+
+
+def test_fetch_extracts_the_main_text_of_each_page(fetcher, standin):
+    urls = page_urls(standin, 3, q="gps")
+
+    pages = fetcher.fetch(urls)
+
+    assert [page.url for page in pages] == urls
+    for index, page in enumerate(pages, 1):
+        assert page.title == f"Pagina {index} — gps"
+        assert f"Paragrafo 1 della pagina {index} su gps" in page.text
+        assert "Copyright" not in page.text and "Accedi" not in page.text
+    assert fetcher.stats()["fetched"] == 3
+
+
+def test_fetched_pages_are_cached(fetcher, standin):
+    urls = page_urls(standin, 2)
+    fetcher.fetch(urls)
+
+    again = fetcher.fetch(urls)
+
+    assert len(again) == 2
+    assert standin.requests["/pages"] == 2
+    assert fetcher.stats()["cache_hits"] == 2
+
+
+def test_requests_per_host_are_limited(fetcher, standin):
+    standin.page_latency_s = 0.2
+    started = time.perf_counter()
+
+    pages = fetcher.fetch(page_urls(standin, 6))
+
+    assert len(pages) == 6
+    assert standin.peak["/pages"] == 2
+    # 6 pagine, 2 alla volta: almeno tre turni da 0.2s
+    assert time.perf_counter() - started >= 0.6
+
+
+def test_pages_over_the_budget_are_dropped(fetcher, standin):
+    urls = page_urls(standin, 2) + [f"{standin.base_url}/pages/3?delay=2"]
+    started = time.perf_counter()
+
+    pages = fetcher.fetch(urls, budget_s=0.5)
+
+    assert time.perf_counter() - started < 1.5
+    assert [page.url for page in pages] == urls[:2]
+    assert fetcher.stats()["over_budget"] == 1
+
+
+def test_failed_and_non_http_urls_are_skipped(fetcher, standin):
+    urls = [f"{standin.base_url}/missing", "ftp://example.com/file", *page_urls(standin, 1)]
+
+    pages = fetcher.fetch(urls)
+
+    assert [page.url for page in pages] == urls[2:]
+    assert fetcher.stats()["failed"] == 1
@@ -0,0 +1,37 @@
+"""Tests of the flow settings loaded from the environment."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import ragflow
+
+SRC = str(Path(ragflow.__file__).resolve().parents[1])
+
+
+def _settings_in(cwd: Path, *fields: str, env=None) -> list:
+    code = (
+        "from ragflow.runtime import FLOW_SETTINGS\n"
+        f"print(*[getattr(FLOW_SETTINGS, f) for f in {list(fields)!r}])"
+    )
+    environment = {k: v for k, v in os.environ.items() if not k.startswith("RAGFLOW_")}
+    environment["PYTHONPATH"] = os.pathsep.join([SRC, *sys.path])
+    environment.update(env or {})
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=cwd, env=environment,
+        capture_output=True, text=True, check=True,
+    )
+    return out.stdout.split()
+
+
+def test_dotenv_values_reach_the_flow_settings(tmp_path):
+    (tmp_path / ".env").write_text("RAGFLOW_SERVICE_PORT=9123\nRAGFLOW_VERBOSE=false\n")
+
+    assert _settings_in(tmp_path, "service_port", "verbose") == ["9123", "False"]
+
+
+def test_exported_variables_win_over_the_dotenv_file(tmp_path):
+    (tmp_path / ".env").write_text("RAGFLOW_SERVICE_PORT=9123\n")
+
+    assert _settings_in(tmp_path, "service_port", env={"RAGFLOW_SERVICE_PORT": "9200"}) == ["9200"]
@@ -0,0 +1,51 @@
+"""Tests of the admission accounting of the HTTP service."""
+
+import asyncio
+import threading
+from http import HTTPStatus
+
+import pytest
+
+service_module = pytest.importorskip("ragflow.service")
+
+
+def test_timed_out_flow_keeps_its_slot_until_it_ends(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(service_module.FlowService, "run_flow", staticmethod(lambda q: release.wait(5) and {}))
+    service = service_module.FlowService(workers=1, max_pending=1, timeout_s=0.05)
+
+    async def scenario():
+        first = await service.ask("lenta")
+        second = await service.ask("rifiutata")
+        return first, second
+
+    try:
+        first, second = asyncio.run(scenario())
+        assert first[0] == HTTPStatus.GATEWAY_TIMEOUT
+        assert second[0] == HTTPStatus.SERVICE_UNAVAILABLE
+        assert service.stats()["pending"] == 1
+
+        release.set()
+        service.shutdown()
+        assert service.stats()["pending"] == 0
+    finally:
+        release.set()
+        service.shutdown()
+
+
+def test_queued_flow_is_cancelled_and_released_on_timeout(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(service_module.FlowService, "run_flow", staticmethod(lambda q: release.wait(5) and {}))
+    service = service_module.FlowService(workers=1, max_pending=2, timeout_s=0.05)
+
+    async def scenario():
+        return await asyncio.gather(service.ask("in esecuzione"), service.ask("in coda"))
+
+    try:
+        statuses = [status for status, _ in asyncio.run(scenario())]
+        assert statuses == [HTTPStatus.GATEWAY_TIMEOUT, HTTPStatus.GATEWAY_TIMEOUT]
+        assert service.stats()["pending"] == 1  # solo il flow in esecuzione
+    finally:
+        release.set()
+        service.shutdown()
+    assert service.stats()["pending"] == 0
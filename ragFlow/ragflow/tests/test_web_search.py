@@ -0,0 +1,121 @@
+"""Tests of the cached and deduplicated web searcher against the stand-in server."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ragflow.tools.web_search import DDGSBackend, HTTPBackend, WebSearcher
+
+
+@pytest.fixture
+def searcher(standin):
+    """A `WebSearcher` on the HTTP backend of the stand-in server."""
+    backend = HTTPBackend(standin.search_url, pool_size=4, timeout_s=5.0)
+    yield WebSearcher(backend, cache_size=16, ttl_s=60.0)
+    backend.close()
+
+
+def test_results_come_from_the_endpoint(searcher, standin):
+    results = searcher.search("capitale australia", max_results=3)
+
+    assert [r["title"] for r in results] == [f"Risultato {i} per capitale australia" for i in (1, 2, 3)]
+    assert all(r["href"].startswith(standin.base_url) for r in results)
+    assert standin.requests["/search"] == 1
+
+
+def test_repeated_search_is_served_from_the_cache(searcher, standin):
+    first = searcher.search("Come funziona il GPS?")
+    second = searcher.search("  come funziona il   GPS ")
+
+    assert second == first
+    assert standin.requests["/search"] == 1
+    stats = searcher.stats()
+    assert stats["cache_hits"] == 1
+    assert stats["requests"] == 1
+
+
+def test_cache_key_includes_region_and_result_count(searcher, standin):
+    searcher.search("gps", region="it-it", max_results=3)
+    searcher.search("gps", region="us-en", max_results=3)
+    searcher.search("gps", region="it-it", max_results=5)
+
+    assert standin.requests["/search"] == 3
+
+
+def test_cached_results_expire_after_the_ttl(standin):
+    backend = HTTPBackend(standin.search_url)
+    searcher = WebSearcher(backend, ttl_s=0.2)
+    try:
+        searcher.search("gps")
+        searcher.search("gps")
+        assert standin.requests["/search"] == 1
+        time.sleep(0.3)
+        searcher.search("gps")
+        assert standin.requests["/search"] == 2
+    finally:
+        backend.close()
+
+
+def test_concurrent_identical_searches_share_one_request(searcher, standin):
+    standin.latency_s = 0.3
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        results = list(pool.map(lambda _: searcher.search("stessa domanda"), range(5)))
+
+    assert all(r == results[0] for r in results)
+    assert standin.requests["/search"] == 1
+    assert searcher.shared == 4
+    assert searcher.stats()["hit_rate"] == pytest.approx(0.8)
+
+
+def test_concurrent_different_searches_are_not_merged(searcher, standin):
+    standin.latency_s = 0.1
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        list(pool.map(searcher.search, ["uno", "due", "tre"]))
+
+    assert standin.requests["/search"] == 3
+    assert searcher.shared == 0
+
+
+def test_failed_search_is_not_cached(standin):
+    backend = HTTPBackend(f"{standin.base_url}/missing")
+    searcher = WebSearcher(backend)
+    try:
+        with pytest.raises(OSError):
+            searcher.search("gps")
+        with pytest.raises(OSError):
+            searcher.search("gps")
+        assert searcher.errors == 2
+        assert len(searcher.cache) == 0
+    finally:
+        backend.close()
+
+
+class _RaisingSession:
+    """Stand-in for a ``DDGS`` session whose searches fail with ``exc``."""
+
+    def __init__(self, exc):
+        self.exc = exc
+
+    def text(self, *args, **kwargs):
+        raise self.exc
+
+
+@pytest.mark.parametrize(
+    "name, message, expected",
+    [
+        ("DDGSException", "No results found.", None),
+        ("RatelimitException", "202 Ratelimit", OSError),
+        ("TimeoutException", "timed out", TimeoutError),
+    ],
+)
+def test_ddgs_errors_are_mapped_like_the_http_ones(name, message, expected):
+    exceptions = pytest.importorskip("ddgs.exceptions")
+    backend = DDGSBackend(pool_size=1)
+    backend._sessions.put(_RaisingSession(getattr(exceptions, name)(message)))
+
+    if expected is None:
+        assert backend.search("zzzz", region="it-it", max_results=3) == []
+    else:
+        with pytest.raises(expected):
+            backend.search("zzzz", region="it-it", max_results=3)